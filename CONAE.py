@@ -2,18 +2,21 @@ import streamlit as st
 import streamlit_authenticator as stauth
 import pandas as pd
 import plotly.express as px
-import numpy as np 
+import pytz
+import threading
+import time
 from PIL import Image
-from sqlalchemy import text
-from datetime import date
+from sqlalchemy import exc, text
+from datetime import date, datetime
+from core.conae import (
+    COLUNAS_PESSOAS, COLUNAS_RESUMO, COLUNAS_VOLANTES, SQL_DATA_HOJE, TABELAS_MONITORADAS, buscar_pessoas,
+    derivar_colunas_resumo, derivar_colunas_volantes, filtrar_por_cargos, indexar_snapshot, sql_snapshot,
+)
+from core.db import metricas_pool, obter_conexao
 
 # ==============================================================================
 # CONFIGURAÇÕES E CONSTANTES GLOBAIS
 # ==============================================================================
-# Snippet SQL seguro para garantir a data de Brasília diretamente no banco
-# CAST(... AS DATE) evita o erro de sintaxe do "::" no Python/SQLAlchemy
-SQL_DATA_HOJE = "CAST(timezone('America/Sao_Paulo', now()) AS DATE)"
-
 def configurar_pagina():
     st.set_page_config(page_title="Mesa Operacional", layout="wide", page_icon="📊")
     st.markdown("""
@@ -66,20 +69,126 @@ def realizar_login():
 # ==============================================================================
 @st.cache_data(ttl=600, show_spinner=False)
 def buscar_dados_auxiliares(_conn):
-    df_unidades = _conn.query('SELECT "UnidadeID", "NomeUnidade" FROM "Unidades" ORDER BY "NomeUnidade"')
-    df_cargos = _conn.query('SELECT "CargoID", "NomeCargo" FROM "Cargos" ORDER BY "NomeCargo"')
+    df_unidades = _conn.query('SELECT "UnidadeID", "NomeUnidade" FROM "Unidades" ORDER BY "NomeUnidade"', ttl=0)
+    df_cargos = _conn.query('SELECT "CargoID", "NomeCargo" FROM "Cargos" ORDER BY "NomeCargo"', ttl=0)
     return df_unidades, df_cargos
 
-@st.cache_data(ttl=60, show_spinner=False) 
-def buscar_dados_operacionais(_conn):
-    # --- 1. QUERY QUADRO (EDITAL VS REAL) ---
-    query_resumo = """
+@st.cache_data(ttl=600, show_spinner=False)
+def mapas_auxiliares(_conn):
+    """Listas de nomes e dicionários nome -> ID / nome -> posição, montados uma vez por carga das tabelas auxiliares."""
+    df_unidades, df_cargos = buscar_dados_auxiliares(_conn)
+    unidades = df_unidades['NomeUnidade'].tolist()
+    cargos = df_cargos['NomeCargo'].tolist()
+    return {
+        'unidades': unidades,
+        'cargos': cargos,
+        'id_unidade': dict(zip(unidades, df_unidades['UnidadeID'].astype(int).tolist())),
+        'id_cargo': dict(zip(cargos, df_cargos['CargoID'].astype(int).tolist())),
+        'pos_unidade': {n: i for i, n in enumerate(unidades)},
+        'pos_cargo': {n: i for i, n in enumerate(cargos)},
+    }
+
+# Colaboradores da unidade em páginas por keyset (Nome, ColaboradorID): custo por página
+# independe do tamanho do quadro (índice em sql/002_indice_colaboradores_unidade.sql)
+TAMANHO_PAGINA_COLABORADORES = 50
+
+@st.cache_data(ttl=600, show_spinner=False)
+def buscar_pagina_colaboradores(_conn, unidade_id, cursor=None, limite=TAMANHO_PAGINA_COLABORADORES):
+    """
+    Uma página de colaboradores fixos ativos da unidade, em ordem (Nome, ColaboradorID); Nome nulo ordena como ''.
+    cursor = (Nome, ColaboradorID) da última linha da página anterior; None = primeira página.
+    Retorna (df, tem_proxima, total). total (todos os cargos) só vem na primeira página; nas outras é None.
+    """
+    filtro_cursor = """AND (COALESCE(col."Nome", ''), col."ColaboradorID") > (COALESCE(CAST(:cur_nome AS TEXT), ''), :cur_id)""" \
+        if cursor else ''
+    # Só a primeira página conta o total: nas seguintes o COUNT percorreria a unidade inteira a cada clique
+    sel_total = ', COUNT(*) OVER () AS "Total"' if cursor is None else ''
+    query = f"""
+    SELECT col."ColaboradorID" AS "ID", col."Nome" AS "Funcionario", c."NomeCargo" AS "Cargo"{sel_total}
+    FROM "Colaboradores" col
+    JOIN "Cargos" c ON col."CargoID" = c."CargoID"
+    WHERE col."UnidadeID" = :uid
+      AND col."Ativo" = TRUE
+      AND NOT EXISTS (SELECT 1 FROM "ColaboradoresVolantes" v WHERE v."ColaboradorID" = col."ColaboradorID")
+      {filtro_cursor}
+    ORDER BY COALESCE(col."Nome", ''), col."ColaboradorID"
+    LIMIT :limite
+    """
+    params = {'uid': int(unidade_id), 'limite': limite + 1}
+    if cursor:
+        params.update(cur_nome=cursor[0], cur_id=cursor[1])
+    df = _conn.query(query, params=params, ttl=0)
+    total = None
+    if cursor is None:
+        total = int(df['Total'].iloc[0]) if not df.empty else 0
+        df = df.drop(columns='Total')
+    return df.iloc[:limite], len(df) > limite, total
+
+# Janelas e agrupamentos do gráfico de histórico (agregação feita no banco)
+JANELAS_HISTORICO = {"30 dias": 30, "90 dias": 90, "12 meses": 365, "Tudo": None}
+AGRUPAMENTOS_HISTORICO = {"Diário": "day", "Semanal": "week", "Mensal": "month"}
+MAX_PONTOS_HISTORICO = 400
+
+@st.cache_data(ttl=600, show_spinner=False)
+def buscar_historico_volantes(_conn, agrupamento="day", dias=None):
+    """Série de uso agregada por dia/semana/mês, limitada à janela e a MAX_PONTOS_HISTORICO pontos."""
+    filtro = f'WHERE "DataRegistro" >= {SQL_DATA_HOJE} - CAST(:dias AS INTEGER)' if dias else ''
+    query = f"""
+    SELECT * FROM (
+        SELECT 
+            CAST(date_trunc(:agrup, "DataRegistro") AS DATE) AS "DataRegistro",
+            ROUND(AVG("PercentualUso")::numeric, 2) AS "PercentualUso",
+            ROUND(AVG("QtdAlocados")::numeric, 1) AS "QtdAlocados",
+            MAX("TotalVolantes") AS "TotalVolantes",
+            COUNT(*) AS "Dias"
+        FROM "HistoricoVolantes"
+        {filtro}
+        GROUP BY 1
+        ORDER BY 1 DESC
+        LIMIT :limite
+    ) h
+    ORDER BY "DataRegistro" ASC
+    """
+    params = {'agrup': agrupamento, 'limite': MAX_PONTOS_HISTORICO}
+    if dias:
+        params['dias'] = int(dias)
+    return _conn.query(query, params=params, ttl=0)
+
+# ------------------------------------------------------------------------------
+# SNAPSHOT OPERACIONAL COMPARTILHADO (RECARGA INCREMENTAL)
+# ------------------------------------------------------------------------------
+# O snapshot é único por processo e compartilhado entre todas as sessões.
+# Escritas feitas pela própria aplicação marcam as unidades/volantes alterados
+# e o próximo render recarrega só essas linhas. Alterações externas são
+# detectadas pela marca d'água de cada tabela (contadores do pg_stat).
+TTL_RECARGA_COMPLETA = 600      # segundos - recarga total de segurança
+TTL_VERIFICACAO_MARCAS = 60     # segundos - intervalo entre checagens das marcas d'água
+
+@st.cache_resource(show_spinner=False)
+def _estado_operacional():
+    return {
+        'lock': threading.Lock(),
+        'frames': None,
+        'carregado_em': 0.0,
+        'verificado_em': 0.0,
+        'dia': None,
+        'marcas': None,
+        'unidades_alteradas': set(),
+        'volantes_alterados': False,
+        'sem_consulta_unica_ate': 0.0,   # monotonic até quando pular a consulta única (tabela ausente)
+    }
+
+def _sql_resumo(filtrar_unidades=False):
+    filtro_contagem = 'AND c."UnidadeID" = ANY(:uids)' if filtrar_unidades else ''
+    filtro_quadro = 'WHERE q."UnidadeID" = ANY(:uids)' if filtrar_unidades else ''
+    return f"""
     WITH ContagemReal AS (
         SELECT c."UnidadeID", c."CargoID", COUNT(*) as "QtdReal"
         FROM "Colaboradores" c
         LEFT JOIN "ColaboradoresVolantes" v ON c."ColaboradorID" = v."ColaboradorID"
         WHERE c."Ativo" = TRUE 
           AND v."ColaboradorID" IS NULL 
+          {filtro_contagem}
         GROUP BY c."UnidadeID", c."CargoID"
     )
     SELECT 
@@ -98,11 +207,13 @@ def buscar_dados_operacionais(_conn):
     JOIN "TiposUnidades" t ON u."TipoID" = t."TipoID"
     JOIN "Supervisores" s ON u."SupervisorID" = s."SupervisorID"
     LEFT JOIN ContagemReal cr ON q."UnidadeID" = cr."UnidadeID" AND q."CargoID" = cr."CargoID"
+    {filtro_quadro}
     ORDER BY u."NomeUnidade", c."NomeCargo";
     """
-    
-    # --- 2. QUERY FUNCIONÁRIOS (LISTAGEM) ---
-    query_funcionarios = """
+
+def _sql_funcionarios(filtrar_unidades=False):
+    filtro = 'AND col."UnidadeID" = ANY(:uids)' if filtrar_unidades else ''
+    return f"""
     SELECT u."UnidadeID", u."NomeUnidade" AS "Escola", c."NomeCargo" AS "Cargo", col."Nome" AS "Funcionario", col."ColaboradorID" AS "ID"
     FROM "Colaboradores" col
     JOIN "Unidades" u ON col."UnidadeID" = u."UnidadeID"
@@ -110,9 +221,11 @@ def buscar_dados_operacionais(_conn):
     LEFT JOIN "ColaboradoresVolantes" v ON col."ColaboradorID" = v."ColaboradorID"
     WHERE col."Ativo" = TRUE 
       AND v."ColaboradorID" IS NULL
+      {filtro}
     ORDER BY u."NomeUnidade", c."NomeCargo", col."Nome";
     """
 
+def _carregar_volantes(_conn):
     # --- 3. QUERY ALOCAÇÕES (USANDO SQL_DATA_HOJE) ---
     query_alocacoes = f"""
     SELECT av."ColaboradorID" AS "ID", av."UnidadeDestinoID", u."NomeUnidade" AS "EscolaDestino"
@@ -135,38 +248,188 @@ def buscar_dados_operacionais(_conn):
     WHERE col."Ativo" = TRUE
     """
 
-    df_resumo = _conn.query(query_resumo)
-    df_pessoas = _conn.query(query_funcionarios)
-    
     try:
-        df_alocacoes = _conn.query(query_alocacoes)
+        df_alocacoes = _conn.query(query_alocacoes, ttl=0)
     except:
         df_alocacoes = pd.DataFrame(columns=["ID", "UnidadeDestinoID", "EscolaDestino"])
 
     try:
-        df_volantes_info = _conn.query(query_volantes_base)
+        df_volantes_info = _conn.query(query_volantes_base, ttl=0)
     except:
         df_volantes_info = pd.DataFrame(columns=["ID", "BaseOriginal", "Funcionario", "Cargo"])
 
     # --- PROCESSAMENTO DOS VOLANTES ---
-    if not df_volantes_info.empty:
-        df_volantes_status = pd.merge(df_volantes_info, df_alocacoes, on="ID", how="left")
-        
-        df_volantes_status['Status_Texto'] = np.where(df_volantes_status['UnidadeDestinoID'].notnull(), 
-                                                      "Cobrindo: " + df_volantes_status['EscolaDestino'].fillna(''), 
-                                                      "Disponível")
-        df_volantes_status['Status_Icon'] = np.where(df_volantes_status['UnidadeDestinoID'].notnull(), "🔴", "🟢")
+    if df_volantes_info.empty:
+        return pd.DataFrame()
+    return derivar_colunas_volantes(pd.merge(df_volantes_info, df_alocacoes, on="ID", how="left"))
+
+def _ler_marcas_tabelas(_conn):
+    """Marca d'água por tabela: total de linhas inseridas/alteradas/removidas segundo o pg_stat."""
+    try:
+        df = _conn.query(
+            'SELECT relname, (n_tup_ins + n_tup_upd + n_tup_del) AS marca FROM pg_stat_user_tables WHERE relname = ANY(:tabelas)',
+            params={'tabelas': TABELAS_MONITORADAS}, ttl=0
+        )
+        return dict(zip(df['relname'], df['marca'].astype(int)))
+    except:
+        return None
+
+# ------------------------------------------------------------------------------
+# CONSULTA ÚNICA (UMA IDA AO BANCO)
+# ------------------------------------------------------------------------------
+# Comando em core/conae.sql_snapshot. Só se faltar uma tabela (migração sql/001 ou tabela
+# de volantes ainda não criada) cai para as consultas separadas, que recontam os colaboradores.
+# Timeout, queda do banco etc. sobem: repetir em 3+ consultas só dobraria a carga.
+def _tabela_ausente(e):
+    """ProgrammingError com SQLSTATE 42P01 (undefined_table), psycopg2 (pgcode) ou psycopg 3 (sqlstate)."""
+    orig = getattr(e, 'orig', None)
+    codigo = getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)
+    return isinstance(e, exc.ProgrammingError) and codigo == '42P01'
+
+def _consultar_snapshot(_conn, unidades=None, quadro=True, volantes=True):
+    """Executa o comando único e devolve (df_resumo, df_pessoas, df_volantes_status, marcas); partes não pedidas vêm None."""
+    params = {'tabelas': TABELAS_MONITORADAS}
+    if unidades is not None:
+        params['uids'] = sorted(unidades)
+    linha = _conn.query(sql_snapshot(unidades is not None, quadro, volantes), params=params, ttl=0).iloc[0]
+
+    df_resumo = df_pessoas = df_volantes_status = None
+    if quadro:
+        df_resumo = derivar_colunas_resumo(pd.DataFrame(linha['resumo'], columns=COLUNAS_RESUMO))
+        df_pessoas = pd.DataFrame(linha['pessoas'], columns=COLUNAS_PESSOAS)
+    if volantes:
+        df_volantes_status = derivar_colunas_volantes(pd.DataFrame(linha['volantes'], columns=COLUNAS_VOLANTES))
+    marcas = {k: int(v) for k, v in (linha['marcas'] or {}).items()} or None
+    return df_resumo, df_pessoas, df_volantes_status, marcas
+
+def _consulta_unica(_conn, **kwargs):
+    """
+    _consultar_snapshot, ou None se falta uma tabela dela. A ausência fica lembrada por
+    TTL_RECARGA_COMPLETA: cada tentativa custa as 3 repetições + reset de conexão do st.connection.
+    Chamado com o lock do estado operacional já tomado.
+    """
+    estado = _estado_operacional()
+    if time.monotonic() < estado['sem_consulta_unica_ate']:
+        return None
+    try:
+        return _consultar_snapshot(_conn, **kwargs)
+    except exc.ProgrammingError as e:
+        if not _tabela_ausente(e):
+            raise
+        print(f"Consulta única indisponível (tabela ausente), usando consultas separadas: {e.orig}")
+        estado['sem_consulta_unica_ate'] = time.monotonic() + TTL_RECARGA_COMPLETA
+        return None
+
+def _recarga_completa(_conn):
+    resultado = _consulta_unica(_conn)
+    if resultado is not None:
+        df_resumo, df_pessoas, df_volantes_status, marcas = resultado
+    else:
+        marcas = _ler_marcas_tabelas(_conn)
+        # --- 1. QUERY QUADRO (EDITAL VS REAL) ---
+        df_resumo = derivar_colunas_resumo(_conn.query(_sql_resumo(), ttl=0))
+        # --- 2. QUERY FUNCIONÁRIOS (LISTAGEM) ---
+        df_pessoas = _conn.query(_sql_funcionarios(), ttl=0)
+        df_volantes_status = _carregar_volantes(_conn)
+
+    frames = (df_resumo, df_pessoas, df_volantes_status) + indexar_snapshot(df_resumo, df_pessoas)
+    return frames, marcas
+
+def _recarga_incremental(_conn, frames, unidades, volantes):
+    """Recarrega apenas as linhas das unidades/volantes alterados e substitui no snapshot."""
+    df_resumo, df_pessoas, df_volantes_status, df_escolas, matriz_cargos, indice_pessoas = frames
+
+    resultado = _consulta_unica(_conn, unidades=unidades, quadro=bool(unidades), volantes=volantes)
+    if resultado is not None:
+        delta_resumo, delta_pessoas, delta_volantes, marcas = resultado
     else:
-        df_volantes_status = pd.DataFrame()
+        marcas = _ler_marcas_tabelas(_conn)
+        delta_resumo = delta_pessoas = delta_volantes = None
+        if unidades:
+            uids = sorted(unidades)
+            delta_resumo = derivar_colunas_resumo(_conn.query(_sql_resumo(True), params={'uids': uids}, ttl=0))
+            delta_pessoas = _conn.query(_sql_funcionarios(True), params={'uids': uids}, ttl=0)
+        if volantes:
+            delta_volantes = _carregar_volantes(_conn)
+
+    if unidades:
+        uids = sorted(unidades)
+        df_resumo = pd.concat([df_resumo[~df_resumo['UnidadeID'].isin(uids)], delta_resumo], ignore_index=True)
+        df_resumo = df_resumo.sort_values(['Escola', 'Cargo'], ignore_index=True)
+        df_pessoas = pd.concat([df_pessoas[~df_pessoas['UnidadeID'].isin(uids)], delta_pessoas], ignore_index=True)
+        df_pessoas = df_pessoas.sort_values(['Escola', 'Cargo', 'Funcionario'], ignore_index=True)
+        df_escolas, matriz_cargos, indice_pessoas = indexar_snapshot(df_resumo, df_pessoas)
+
+    if volantes:
+        df_volantes_status = delta_volantes
+
+    return (df_resumo, df_pessoas, df_volantes_status, df_escolas, matriz_cargos, indice_pessoas), marcas
+
+def registrar_alteracao(unidades=(), volantes=False):
+    """Marca no snapshot compartilhado o que uma escrita da aplicação alterou."""
+    estado = _estado_operacional()
+    with estado['lock']:
+        estado['unidades_alteradas'].update(int(u) for u in unidades)
+        estado['volantes_alterados'] = estado['volantes_alterados'] or volantes
 
-    condicoes = [df_resumo['Diferenca_num'] < 0, df_resumo['Diferenca_num'] > 0]
-    df_resumo['Status_Codigo'] = np.select(condicoes, ['FALTA', 'EXCEDENTE'], default='OK')
-    df_resumo['Status_Display'] = np.select(condicoes, ['🔴 FALTA', '🔵 EXCEDENTE'], default='🟢 OK')
-    
-    df_resumo['Diferenca_Display'] = df_resumo['Diferenca_num'].apply(lambda x: f"+{x}" if x > 0 else str(int(x)))
-    df_resumo['DataConferencia'] = pd.to_datetime(df_resumo['DataConferencia'])
-    
-    return df_resumo, df_pessoas, df_volantes_status
+def buscar_dados_operacionais(_conn):
+    estado = _estado_operacional()
+    with estado['lock']:
+        agora = time.monotonic()
+        dia = datetime.now(pytz.timezone('America/Sao_Paulo')).date()
+        recarregar = (
+            estado['frames'] is None
+            or estado['dia'] != dia
+            or agora - estado['carregado_em'] > TTL_RECARGA_COMPLETA
+        )
+
+        # Alterações externas: compara marcas d'água no máximo uma vez por intervalo
+        if not recarregar and agora - estado['verificado_em'] > TTL_VERIFICACAO_MARCAS:
+            marcas = _ler_marcas_tabelas(_conn)
+            recarregar = marcas is None or marcas != estado['marcas']
+            estado['verificado_em'] = agora
+
+        if recarregar:
+            # Alteração externa (ou recarga de segurança): as páginas de colaboradores também ficaram velhas
+            invalidar_dados(colaboradores=True)
+            if estado['dia'] != dia:
+                _garantir_historico_do_dia(_conn)
+            estado['frames'], estado['marcas'] = _recarga_completa(_conn)
+            estado['carregado_em'] = estado['verificado_em'] = agora
+            estado['dia'] = dia
+            estado['unidades_alteradas'] = set()
+            estado['volantes_alterados'] = False
+        elif estado['unidades_alteradas'] or estado['volantes_alterados']:
+            # As marcas lidas junto absorvem as próprias escritas (alterações externas simultâneas caem na recarga total)
+            estado['frames'], estado['marcas'] = _recarga_incremental(
+                _conn, estado['frames'], estado['unidades_alteradas'], estado['volantes_alterados'])
+            estado['unidades_alteradas'] = set()
+            estado['volantes_alterados'] = False
+
+        return estado['frames']
+
+# ------------------------------------------------------------------------------
+# INVALIDAÇÃO SELETIVA
+# ------------------------------------------------------------------------------
+# Cada escrita declara o que sujou; nada de st.cache_data.clear(), que apagaria
+# o cache de todas as páginas (feriados HCM, Portal Gestor, SME...) para todos.
+def invalidar_dados(unidades=(), volantes=False, historico=False, auxiliares=False, colaboradores=False):
+    """
+    unidades      -> linhas de quadro/colaboradores dessas UnidadeIDs no snapshot
+    volantes      -> status diário dos volantes
+    historico     -> série de uso dos volantes (HistoricoVolantes)
+    auxiliares    -> listas de Unidades/Cargos
+    colaboradores -> páginas de colaboradores do detalhe da escola (implícito em unidades)
+    """
+    if unidades or volantes:
+        registrar_alteracao(unidades=unidades, volantes=volantes)
+    if historico:
+        buscar_historico_volantes.clear()
+    if unidades or colaboradores:
+        buscar_pagina_colaboradores.clear()
+    if auxiliares:
+        buscar_dados_auxiliares.clear()
+        mapas_auxiliares.clear()
 
 def acao_atualizar_data(unidade_id, nova_data, conn):
     try:
@@ -176,7 +439,7 @@ def acao_atualizar_data(unidade_id, nova_data, conn):
                 {'nova_data': nova_data, 'uid': unidade_id}
             )
             session.commit()
-        st.cache_data.clear()
+        invalidar_dados(unidades=[unidade_id])
         st.toast("Data salva!", icon="✅")
         st.rerun()
     except Exception as e:
@@ -185,64 +448,94 @@ def acao_atualizar_data(unidade_id, nova_data, conn):
 # ==============================================================================
 # FUNÇÕES: REGISTRO HISTÓRICO (Lógica SQL)
 # ==============================================================================
-def registrar_historico_uso(conn):
+# O histórico é derivado das próprias escritas de alocação: cada transação que
+# aloca/libera volantes recalcula a linha do dia num único comando. Abrir o modal
+# é só leitura; a linha de dias sem nenhuma alocação é criada uma vez por dia,
+# na primeira carga do snapshot (ON CONFLICT DO NOTHING, sem disputa de lock).
+def _sql_historico_dia(ao_conflitar):
+    return f"""
+    INSERT INTO "HistoricoVolantes" ("DataRegistro", "TotalVolantes", "QtdAlocados", "PercentualUso")
+    SELECT {SQL_DATA_HOJE}, t.total, a.alocados,
+           CASE WHEN t.total > 0 THEN ROUND(a.alocados * 100.0 / t.total, 2) ELSE 0 END
+    FROM (SELECT COUNT(*) AS total FROM "ColaboradoresVolantes") t,
+         (SELECT COUNT(*) AS alocados FROM "AlocacaoVolantes" WHERE "DataAlocacao" = {SQL_DATA_HOJE}) a
+    ON CONFLICT ("DataRegistro") {ao_conflitar}
+    """
+
+def _atualizar_historico(s):
+    """Recalcula o uso do dia dentro da sessão/transação recebida (sem commit)."""
+    # Savepoint: falha no histórico não desfaz a alocação
+    try:
+        with s.begin_nested():
+            s.execute(text(_sql_historico_dia(
+                'DO UPDATE SET "TotalVolantes" = EXCLUDED."TotalVolantes", "QtdAlocados" = EXCLUDED."QtdAlocados", "PercentualUso" = EXCLUDED."PercentualUso"'
+            )))
+    except Exception as e:
+        print(f"Erro ao registrar histórico: {e}")
+
+def _garantir_historico_do_dia(conn):
     try:
-        q_total = text('SELECT COUNT(*) FROM "ColaboradoresVolantes"')
-        
-        # Injeta o SQL_DATA_HOJE
-        q_aloc = text(f'SELECT COUNT(*) FROM "AlocacaoVolantes" WHERE "DataAlocacao" = {SQL_DATA_HOJE}')
-        
         with conn.session as s:
-            total = s.execute(q_total).scalar()
-            alocados = s.execute(q_aloc).scalar()
-            
-            pct = round((alocados / total) * 100, 2) if total > 0 else 0.0
-            
-            # Insert com data SQL
-            s.execute(text(f"""
-                INSERT INTO "HistoricoVolantes" ("DataRegistro", "TotalVolantes", "QtdAlocados", "PercentualUso")
-                VALUES ({SQL_DATA_HOJE}, :t, :a, :p)
-                ON CONFLICT ("DataRegistro") 
-                DO UPDATE SET "TotalVolantes" = :t, "QtdAlocados" = :a, "PercentualUso" = :p
-            """), {'t': total, 'a': alocados, 'p': pct})
+            s.execute(text(_sql_historico_dia('DO NOTHING')))
             s.commit()
+        buscar_historico_volantes.clear()
     except Exception as e:
         print(f"Erro ao registrar histórico: {e}")
 
 # ==============================================================================
 # AÇÕES VOLANTES (Lógica SQL)
 # ==============================================================================
+def _gravar_alocacoes(s, alocacoes):
+    """alocacoes: lista de (ColaboradorID, UnidadeDestinoID). Um DELETE e um INSERT em lote (executemany)."""
+    # Delete usando a data SQL
+    s.execute(text(f'DELETE FROM "AlocacaoVolantes" WHERE "ColaboradorID" = ANY(:ids) AND "DataAlocacao" = {SQL_DATA_HOJE}'), 
+              {'ids': [int(cid) for cid, _ in alocacoes]})
+    
+    # Insert usando a data SQL
+    s.execute(text(f'INSERT INTO "AlocacaoVolantes" ("ColaboradorID", "UnidadeDestinoID", "DataAlocacao") VALUES (:cid, :uid, {SQL_DATA_HOJE})'),
+              [{'cid': int(cid), 'uid': int(uid)} for cid, uid in alocacoes])
+
 def acao_alocar_volante(colab_id, unidade_destino_id, conn):
     try:
         with conn.session as s:
-            # Delete usando a data SQL
-            s.execute(text(f'DELETE FROM "AlocacaoVolantes" WHERE "ColaboradorID" = :id AND "DataAlocacao" = {SQL_DATA_HOJE}'), 
-                      {'id': colab_id})
-            
-            # Insert usando a data SQL
-            s.execute(text(f'INSERT INTO "AlocacaoVolantes" ("ColaboradorID", "UnidadeDestinoID", "DataAlocacao") VALUES (:cid, :uid, {SQL_DATA_HOJE})'),
-                      {'cid': colab_id, 'uid': unidade_destino_id})
+            _gravar_alocacoes(s, [(colab_id, unidade_destino_id)])
+            _atualizar_historico(s)
             s.commit()
         
-        registrar_historico_uso(conn)
+        invalidar_dados(volantes=True, historico=True)
 
-        st.cache_data.clear()
         st.toast("Volante alocado!", icon="🚙")
         st.rerun()
     except Exception as e:
         st.error(f"Erro ao alocar: {e}")
 
+def acao_alocar_volantes_lote(alocacoes, conn):
+    """Aloca vários volantes numa única transação, recalculando o histórico uma só vez."""
+    if not alocacoes: return
+    try:
+        with conn.session as s:
+            _gravar_alocacoes(s, alocacoes)
+            _atualizar_historico(s)
+            s.commit()
+        
+        invalidar_dados(volantes=True, historico=True)
+
+        st.toast(f"{len(alocacoes)} volantes alocados!", icon="🚙")
+        st.rerun()
+    except Exception as e:
+        st.error(f"Erro ao alocar em lote: {e}")
+
 def acao_desalocar_volante(colab_id, conn):
     try:
         with conn.session as s:
             # Delete usando a data SQL
             s.execute(text(f'DELETE FROM "AlocacaoVolantes" WHERE "ColaboradorID" = :id AND "DataAlocacao" = {SQL_DATA_HOJE}'), 
                       {'id': colab_id})
+            _atualizar_historico(s)
             s.commit()
         
-        registrar_historico_uso(conn)
+        invalidar_dados(volantes=True, historico=True)
         
-        st.cache_data.clear()
         st.toast("Volante liberado!", icon="🟢")
         st.rerun()
     except Exception as e:
@@ -303,18 +596,46 @@ def modal_lista_volantes(df_volantes, conn, df_unidades_list, df_cargos_list):
                 if not esta_alocado:
                     with st.form("form_alocacao"):
                         st.write(f"Alocar **{nome_selecionado}** (Base: {row['BaseOriginal']}) hoje para:")
-                        lst_esc = df_unidades_list['NomeUnidade'].tolist()
-                        destino = st.selectbox("Escolha a Escola:", lst_esc)
+                        destino = st.selectbox("Escolha a Escola:", mapas_auxiliares(conn)['unidades'])
                         
                         if st.form_submit_button("🚙 Confirmar Alocação"):
-                            uid_dest = int(df_unidades_list[df_unidades_list['NomeUnidade'] == destino]['UnidadeID'].iloc[0])
+                            uid_dest = mapas_auxiliares(conn)['id_unidade'][destino]
                             acao_alocar_volante(colab_id, uid_dest, conn)
+
+            df_disp = df_volantes[df_volantes['UnidadeDestinoID'].isnull()]
+            if not df_disp.empty:
+                with st.expander("📦 Alocação em Lote"):
+                    st.caption("Escolha a escola de destino de cada volante e confirme tudo de uma vez.")
+                    with st.form("form_alocacao_lote"):
+                        df_lote = df_disp[['ID', 'Funcionario', 'BaseOriginal', 'Cargo']].assign(Destino=None)
+                        df_lote_edit = st.data_editor(
+                            df_lote, use_container_width=True, hide_index=True,
+                            disabled=['Funcionario', 'BaseOriginal', 'Cargo'],
+                            column_config={
+                                "ID": None,
+                                "BaseOriginal": st.column_config.TextColumn("Base", width="medium"),
+                                "Destino": st.column_config.SelectboxColumn("Escola Destino", options=mapas_auxiliares(conn)['unidades'], width="large")
+                            },
+                            key="editor_alocacao_lote"
+                        )
+
+                        if st.form_submit_button("🚙 Confirmar Alocações"):
+                            mapa_uid = mapas_auxiliares(conn)['id_unidade']
+                            df_sel = df_lote_edit[df_lote_edit['Destino'].notna()]
+                            alocacoes = list(zip(df_sel['ID'], df_sel['Destino'].map(mapa_uid)))
+                            if alocacoes:
+                                acao_alocar_volantes_lote(alocacoes, conn)
+                            else:
+                                st.info("Nenhum destino escolhido.")
         else:
             st.info("Nenhum volante cadastrado na tabela 'ColaboradoresVolantes'.")
 
     with tab_hist:
+        c_jan, c_agr = st.columns(2)
+        with c_jan: janela = st.selectbox("Período:", list(JANELAS_HISTORICO), index=1)
+        with c_agr: agrupamento = st.selectbox("Agrupar por:", list(AGRUPAMENTOS_HISTORICO))
         try:
-            df_hist = conn.query('SELECT * FROM "HistoricoVolantes" ORDER BY "DataRegistro" ASC')
+            df_hist = buscar_historico_volantes(conn, AGRUPAMENTOS_HISTORICO[agrupamento], JANELAS_HISTORICO[janela])
             if not df_hist.empty:
                 st.subheader("Evolução do Uso (%)")
                 fig = px.line(df_hist, x="DataRegistro", y="PercentualUso", markers=True, 
@@ -323,7 +644,7 @@ def modal_lista_volantes(df_volantes, conn, df_unidades_list, df_cargos_list):
                 fig.add_hline(y=70, line_dash="dot", annotation_text="Meta (70%)", annotation_position="bottom right")
                 st.plotly_chart(fig, use_container_width=True)
                 
-                st.caption("Dados Brutos:")
+                st.caption(f"Dados ({agrupamento.lower()}, média do período):")
                 st.dataframe(df_hist.sort_values("DataRegistro", ascending=False), use_container_width=True)
             else:
                 st.info("Ainda não há histórico registrado.")
@@ -359,46 +680,82 @@ def modal_detalhe_escola(escola_nome, row_stats, df_cargos_view, df_pessoas_view
     st.dataframe(df_view, use_container_width=True, hide_index=True)
 
     st.caption("📋 Colaboradores (Fixos)")
-    if not df_pessoas_view.empty:
-        event = st.dataframe(
-            df_pessoas_view[['ID','Funcionario','Cargo']],
-            use_container_width=True, hide_index=True,
-            selection_mode="single-row", on_select="rerun"
-        )
-        if len(event.selection.rows) > 0:
-            idx = event.selection.rows[0]
-            colab = df_pessoas_view.iloc[idx]
-            
-            with st.expander(f"✏️ Editar: {colab['Funcionario']}", expanded=True):
-                with st.form(f"edit_{colab['ID']}"):
-                    lst_esc = df_unidades_list['NomeUnidade'].tolist()
-                    lst_car = df_cargos_list['NomeCargo'].tolist()
-                    
-                    try: i_esc = lst_esc.index(escola_nome)
-                    except: i_esc = 0
-                    try: i_car = lst_car.index(colab['Cargo'])
-                    except: i_car = 0
-                    
-                    n_esc = st.selectbox("Mover para Escola:", lst_esc, index=i_esc)
-                    n_car = st.selectbox("Alterar Cargo:", lst_car, index=i_car)
-                    n_atv = st.checkbox("Manter Ativo?", value=True)
-                    
-                    if st.form_submit_button("💾 Confirmar Alteração"):
-                        try:
-                            uid_new = int(df_unidades_list[df_unidades_list['NomeUnidade'] == n_esc]['UnidadeID'].iloc[0])
-                            cid_new = int(df_cargos_list[df_cargos_list['NomeCargo'] == n_car]['CargoID'].iloc[0])
-                            
-                            with conn.session as s:
-                                s.execute(text('UPDATE "Colaboradores" SET "UnidadeID"=:u, "CargoID"=:c, "Ativo"=:a WHERE "ColaboradorID"=:i'), 
-                                          {'u': uid_new, 'c': cid_new, 'a': n_atv, 'i': int(colab['ID'])})
-                                s.commit()
-                            st.cache_data.clear()
-                            st.toast("Sucesso!", icon="🎉")
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"Erro: {e}")
+    colab = navegar_colaboradores(conn, int(row_stats['UnidadeID']), df_pessoas_view)
+    if colab is not None:
+        mapas = mapas_auxiliares(conn)
+        with st.expander(f"✏️ Editar: {colab['Funcionario']}", expanded=True):
+            with st.form(f"edit_{colab['ID']}"):
+                i_esc = mapas['pos_unidade'].get(escola_nome, 0)
+                i_car = mapas['pos_cargo'].get(colab['Cargo'], 0)
+                
+                n_esc = st.selectbox("Mover para Escola:", mapas['unidades'], index=i_esc)
+                n_car = st.selectbox("Alterar Cargo:", mapas['cargos'], index=i_car)
+                n_atv = st.checkbox("Manter Ativo?", value=True)
+                
+                if st.form_submit_button("💾 Confirmar Alteração"):
+                    try:
+                        uid_new = mapas['id_unidade'][n_esc]
+                        cid_new = mapas['id_cargo'][n_car]
+                        
+                        with conn.session as s:
+                            s.execute(text('UPDATE "Colaboradores" SET "UnidadeID"=:u, "CargoID"=:c, "Ativo"=:a WHERE "ColaboradorID"=:i'), 
+                                      {'u': uid_new, 'c': cid_new, 'a': n_atv, 'i': int(colab['ID'])})
+                            s.commit()
+                        invalidar_dados(unidades=[row_stats['UnidadeID'], uid_new], volantes=True)
+                        st.toast("Sucesso!", icon="🎉")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Erro: {e}")
+
+def navegar_colaboradores(conn, unidade_id, df_filtrado=None):
+    """
+    Tabela paginada de colaboradores da unidade; devolve a linha selecionada (ou None).
+    Sem busca ativa as páginas vêm do banco por keyset; com busca, df_filtrado (já pequeno) é paginado em memória.
+    """
+    tam = TAMANHO_PAGINA_COLABORADORES
+    chave = f"pag_colab_{unidade_id}_{'busca' if df_filtrado is not None else 'banco'}"
+    # Pilha com o cursor de início de cada página visitada: voltar = desempilhar
+    cursores = st.session_state.setdefault(chave, [None])
+
+    if df_filtrado is not None:
+        total = len(df_filtrado)
+        if (len(cursores) - 1) * tam >= max(total, 1):
+            cursores[:] = [None]
+        ini = (len(cursores) - 1) * tam
+        df_pag, tem_proxima = df_filtrado.iloc[ini:ini + tam], total > ini + tam
     else:
+        # Total de todos os cargos, da primeira página (em cache): o 'Real' do quadro só soma cargos do edital
+        df_pag, tem_proxima, total = buscar_pagina_colaboradores(conn, unidade_id, cursores[-1])
+        if total is None:
+            total = buscar_pagina_colaboradores(conn, unidade_id)[2]
+        ini = (len(cursores) - 1) * tam
+
+    if df_pag.empty:
         st.info("Nenhum colaborador fixo nesta unidade.")
+        return None
+
+    pagina = len(cursores) - 1
+    event = st.dataframe(
+        df_pag[['ID','Funcionario','Cargo']],
+        use_container_width=True, hide_index=True,
+        selection_mode="single-row", on_select="rerun",
+        key=f"tab_{chave}_{pagina}"
+    )
+
+    if pagina > 0 or tem_proxima:
+        ultimo = df_pag.iloc[-1]
+        nome = ultimo['Funcionario']
+        proximo_cursor = (None if pd.isna(nome) else nome, int(ultimo['ID']))
+        c_ant, c_info, c_prox = st.columns([1, 2, 1])
+        c_ant.button("◀ Anterior", key=f"ant_{chave}", disabled=pagina == 0,
+                     on_click=cursores.pop, use_container_width=True)
+        c_info.caption(f"Página {pagina + 1} de {max(-(-total // tam), pagina + 1)} · {ini + 1}–{ini + len(df_pag)} de {total}")
+        c_prox.button("Próxima ▶", key=f"prox_{chave}", disabled=not tem_proxima,
+                      on_click=cursores.append, args=(proximo_cursor,), use_container_width=True)
+
+    if len(event.selection.rows) > 0:
+        return df_pag.iloc[event.selection.rows[0]]
+    return None
 
 # ==============================================================================
 # COMPONENTES VISUAIS
@@ -408,6 +765,21 @@ def exibir_sidebar(authenticator, nome_usuario):
         if logo := carregar_logo(): st.image(logo, use_container_width=True)
         st.divider()
         st.write(f"👤 **{nome_usuario}**"); authenticator.logout(location='sidebar')
+        exibir_saude_banco()
+
+def exibir_saude_banco():
+    try:
+        m = metricas_pool(obter_conexao().engine)
+    except Exception as e:
+        print(f"Erro métricas pool: {e}"); return
+    with st.expander("🔌 Banco de Dados"):
+        c1, c2 = st.columns(2)
+        c1.metric("Em uso", f"{m['em_uso']} / {m['capacidade']}")
+        c2.metric("Ociosas", m['ociosas'])
+        c1.metric("Espera média", f"{m['espera_media_ms']:.1f} ms")
+        c2.metric("Espera máx.", f"{m['espera_max_ms']:.0f} ms")
+        st.caption(f"{m['checkouts']} checkouts · {m['esperas']} com espera · {m['timeouts']} timeouts · "
+                   f"{m['conexoes_abertas']} conexões abertas · {m['invalidadas']} descartadas")
 
 def exibir_metricas_topo(df, conn, df_volantes, df_unidades_list, df_cargos_list):
     c1, c2, c3, c4 = st.columns([1, 1, 1, 1.2]) 
@@ -431,7 +803,6 @@ def exibir_metricas_topo(df, conn, df_volantes, df_unidades_list, df_cargos_list
             st.metric("🚙 Volantes", "0")
             
         if st.button("Gerenciar Volantes"):
-            registrar_historico_uso(conn)
             modal_lista_volantes(df_volantes, conn, df_unidades_list, df_cargos_list)
             modal_aberto_aqui = True 
             
@@ -473,11 +844,11 @@ def main():
         exibir_sidebar(authenticator, nome_usuario)
         
         try:
-            conn = st.connection("postgres", type="sql")
+            conn = obter_conexao()
             df_unidades_list, df_cargos_list = buscar_dados_auxiliares(conn)
             
             # Sem passar data, o SQL resolve
-            df_resumo, df_pessoas, df_volantes = buscar_dados_operacionais(conn)
+            df_resumo, df_pessoas, df_volantes, df_escolas, matriz_cargos, indice_pessoas = buscar_dados_operacionais(conn)
             
             st.title("📊 Mesa Operacional")
             
@@ -489,83 +860,38 @@ def main():
             st.subheader("🏫 Gestão de Escolas")
 
             c1, c2, c3, c4, c5 = st.columns([1, 1.5, 1.2, 1, 1])
-            with c1: f_tipo = st.selectbox("🏫 Tipo:", ["Todos"] + sorted(list(df_resumo['Tipo'].unique())))
-            df_escolas_view = df_resumo[df_resumo['Tipo'] == f_tipo] if f_tipo != "Todos" else df_resumo
-            with c2: f_esc = st.selectbox("🔍 Escola:", ["Todas"] + sorted(list(df_escolas_view['Escola'].unique())))
-            with c3: f_sup = st.selectbox("👔 Supervisor:", ["Todos"] + sorted(list(df_resumo['Supervisor'].unique())))
+            with c1: f_tipo = st.selectbox("🏫 Tipo:", ["Todos"] + sorted(list(df_escolas['Tipo'].unique())))
+            df_escolas_view = df_escolas[df_escolas['Tipo'] == f_tipo] if f_tipo != "Todos" else df_escolas
+            with c2: f_esc = st.selectbox("🔍 Escola:", ["Todas"] + sorted(list(df_escolas_view['Escola'])))
+            with c3: f_sup = st.selectbox("👔 Supervisor:", ["Todos"] + sorted(list(df_escolas['Supervisor'].unique())))
             with c4: f_sts = st.selectbox("🚦 Situação:", ["Todas", "🔴 FALTA", "🔵 EXCEDENTE", "🟡 AJUSTE", "🟢 OK"])
             with c5: f_txt = st.text_input("👤 Buscar Pessoa:", "")
 
             with st.expander("🔎 Filtros Avançados por Cargo"):
                 cols = st.columns(5)
                 filtro_comb = {}
-                for i, cargo in enumerate(sorted(df_resumo['Cargo'].unique())):
+                for i, cargo in enumerate(matriz_cargos.columns):
                     with cols[i % 5]:
                         if (sel := st.selectbox(cargo, ["Todos","FALTA","EXCEDENTE","OK"], key=f'fc_{i}')) != "Todos":
                             filtro_comb[cargo] = sel
 
-            mask = pd.Series([True] * len(df_resumo))
-            if f_tipo != "Todos": mask &= (df_resumo['Tipo'] == f_tipo)
-            if f_esc != "Todas": mask &= (df_resumo['Escola'] == f_esc)
-            if f_sup != "Todos": mask &= (df_resumo['Supervisor'] == f_sup)
-            
-            if f_sts != "Todas":
-                agg = df_resumo.groupby('Escola').agg({'Edital': 'sum', 'Real': 'sum', 'Status_Codigo': list}).reset_index()
-                agg['Saldo'] = agg['Real'] - agg['Edital']
-                conds = [
-                    agg['Saldo'] < 0,
-                    agg['Saldo'] > 0,
-                    (agg['Saldo'] == 0) & (agg['Status_Codigo'].apply(lambda x: 'OK' not in x or any(s != 'OK' for s in x)))
-                ]
-                agg['Sts_Calc'] = np.select(conds, ["🔴 FALTA", "🔵 EXCEDENTE", "🟡 AJUSTE"], default="🟢 OK")
-                alvos = []
-                if f_sts == "🔴 FALTA": alvos = ["🔴 FALTA"]
-                elif f_sts == "🔵 EXCEDENTE": alvos = ["🔵 EXCEDENTE"]
-                elif f_sts == "🟡 AJUSTE": alvos = ["🟡 AJUSTE"]
-                elif f_sts == "🟢 OK": alvos = ["🟢 OK"]
-                
-                escolas_validas = agg[agg['Sts_Calc'].isin(alvos)]['Escola']
-                mask &= df_resumo['Escola'].isin(escolas_validas)
+            # Filtros em nível de escola sobre o índice pré-calculado
+            mask = pd.Series(True, index=df_escolas.index)
+            if f_tipo != "Todos": mask &= (df_escolas['Tipo'] == f_tipo)
+            if f_esc != "Todas": mask &= (df_escolas['Escola'] == f_esc)
+            if f_sup != "Todos": mask &= (df_escolas['Supervisor'] == f_sup)
+            if f_sts != "Todas": mask &= (df_escolas['Situacao'] == f_sts)
 
-            if filtro_comb:
-                for c, s in filtro_comb.items():
-                    escolas_v = df_resumo[(df_resumo['Cargo'] == c) & (df_resumo['Status_Codigo'] == s)]['Escola']
-                    mask &= df_resumo['Escola'].isin(escolas_v)
+            if filtro_comb: mask &= filtrar_por_cargos(matriz_cargos, filtro_comb)
 
+            linhas_busca = None
             if f_txt:
-                match = df_pessoas[df_pessoas['Funcionario'].str.contains(f_txt, case=False, na=False) | 
-                                 df_pessoas['ID'].astype(str).str.contains(f_txt, na=False)]['Escola'].unique()
-                mask &= df_resumo['Escola'].isin(match)
+                linhas_busca = buscar_pessoas(indice_pessoas, f_txt)
+                mask &= df_escolas['UnidadeID'].isin(indice_pessoas['unidades'][linhas_busca])
 
-            df_final = df_resumo[mask]
-
-            if not df_final.empty:
-                df_view = df_final.copy()
-                cols_num = ['Edital', 'Real']
-                df_view[cols_num] = df_view[cols_num].apply(pd.to_numeric, errors='coerce').fillna(0).astype(int)
-                
-                df_lista = df_view.groupby('Escola').agg({
-                    'Edital': 'sum', 'Real': 'sum',
-                    'Supervisor': 'first', 'Tipo': 'first',
-                    'UnidadeID': 'first', 'DataConferencia': 'first',
-                    'Status_Codigo': lambda x: list(x)
-                }).reset_index()
-                
-                df_lista['Saldo'] = df_lista['Real'] - df_lista['Edital']
-                
-                def get_icone(row):
-                    s = row['Saldo']
-                    if s < 0: return "🔴" 
-                    if s > 0: return "🔵" 
-                    if 'FALTA' in row['Status_Codigo']: return "🟡" 
-                    return "🟢" 
-
-                df_lista['Status'] = df_lista.apply(get_icone, axis=1)
-                df_lista['Cor'] = np.where(df_lista['Saldo'] < 0, '#e74c3c', np.where(df_lista['Saldo'] > 0, '#3498db', '#27ae60'))
-                df_lista['Sinal'] = np.where(df_lista['Saldo'] > 0, '+', '')
-                df_lista['rank'] = df_lista['Status'].map({"🔴": 0, "🟡": 1, "🔵": 2, "🟢": 3})
-                df_lista = df_lista.sort_values(['rank', 'Escola'])
+            df_lista = df_escolas[mask]
 
+            if not df_lista.empty:
                 st.info(f"**{len(df_lista)} Unidades Encontradas.**")
                 
                 def style_saldo(val):
@@ -589,13 +915,13 @@ def main():
                     idx = event.selection.rows[0]
                     esc_sel = df_lista.iloc[idx]['Escola']
                     
-                    row_stats = df_lista[df_lista['Escola'] == esc_sel].iloc[0]
-                    df_cargos_sel = df_view[df_view['Escola'] == esc_sel]
-                    df_pessoas_sel = df_pessoas[df_pessoas['Escola'] == esc_sel]
-                    
-                    if f_txt:
-                        df_pessoas_sel = df_pessoas_sel[df_pessoas_sel['Funcionario'].str.contains(f_txt, case=False, na=False) | 
-                                                                                        df_pessoas_sel['ID'].astype(str).str.contains(f_txt, na=False)]
+                    row_stats = df_lista.iloc[idx]
+                    df_cargos_sel = df_resumo[df_resumo['Escola'] == esc_sel]
+                    # Sem busca o modal pagina direto do banco; com busca, só os resultados desta unidade
+                    df_pessoas_sel = None
+                    if linhas_busca is not None:
+                        df_pessoas_sel = df_pessoas.iloc[linhas_busca]
+                        df_pessoas_sel = df_pessoas_sel[df_pessoas_sel['UnidadeID'] == row_stats['UnidadeID']]
 
                     modal_detalhe_escola(esc_sel, row_stats, df_cargos_sel, df_pessoas_sel, conn, df_unidades_list, df_cargos_list)
             else:
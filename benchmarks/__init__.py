@@ -0,0 +1 @@
+"""Benchmarks das transformações de dados das páginas (python benchmarks/executar.py)."""
@@ -0,0 +1,301 @@
+"""
+Geradores de dados sintéticos no formato de entrada de cada pipeline.
+
+`fator` multiplica o tamanho da operação atual (BASE): 1 = hoje, 10 e 100 = crescimento.
+Tudo é determinístico pela semente, para que duas execuções meçam exatamente o mesmo trabalho.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.ponto import feriados_fixos
+
+# Tamanho aproximado da operação atual (fator 1)
+BASE = {
+    "unidades": 300,
+    "supervisores": 15,
+    "colaboradores_por_unidade": 10,
+    "volantes": 60,
+    "ocorrencias_sme": 2000,
+    "colaboradores_araraquara": 800,
+}
+
+# Data de referência fixa (quarta-feira), 10h30: metade dos turnos já começou
+DATA_REF = date(2026, 3, 11)
+AGORA_REF = datetime(2026, 3, 11, 10, 30)
+
+TIPOS = np.array(["EMEF", "EMEI", "CEI", "CEU", "EMEBS", "CIEJA"])
+CARGOS = np.array(["AUXILIAR DE LIMPEZA", "ENCARREGADO DE LIMPEZA", "PORTEIRO", "AGENTE DE APOIO",
+                   "LIDER DE LIMPEZA", "JARDINEIRO", "COPEIRA", "RECEPCIONISTA", "VIGIA",
+                   "AUXILIAR ADMINISTRATIVO", "MANOBRISTA", "ZELADOR"])
+NOMES = np.array(["ANA", "MARIA", "JOSÉ", "JOÃO", "FRANCISCA", "ANTÔNIO", "ADRIANA", "CARLOS", "JULIANA",
+                  "PAULO", "MÁRCIA", "LUCAS", "PATRÍCIA", "RAFAEL", "ALINE", "MARCOS", "SANDRA", "BRUNO"])
+SOBRENOMES = np.array(["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA",
+                       "LIMA", "GOMES", "COSTA", "RIBEIRO", "MARTINS", "CARVALHO", "ALMEIDA", "CONCEIÇÃO"])
+TURNOS = [
+    [["06:00", "10:00"], ["11:00", "14:00"]],
+    [["07:00", "11:00"], ["12:00", "16:00"]],
+    [["13:00", "17:00"], ["18:00", "21:00"]],
+    [["08:00", "12:00"], ["13:00", "17:00"]],
+]
+
+def _rng(semente, nome):
+    return np.random.default_rng([semente, sum(map(ord, nome))])
+
+def _nomes(rng, n):
+    return (NOMES[rng.integers(0, len(NOMES), n)].astype(object) + " "
+            + SOBRENOMES[rng.integers(0, len(SOBRENOMES), n)].astype(object) + " "
+            + SOBRENOMES[rng.integers(0, len(SOBRENOMES), n)].astype(object))
+
+def _hhmm(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+def _unidades(rng, fator):
+    n = int(BASE["unidades"] * fator)
+    n_sup = max(1, int(BASE["supervisores"] * fator ** 0.5))
+    ids = np.arange(1, n + 1)
+    tipos = TIPOS[rng.integers(0, len(TIPOS), n)]
+    return pd.DataFrame({
+        "UnidadeID": ids,
+        "Tipo": tipos,
+        "Escola": [f"{t} SINTETICA {i:05d}" for t, i in zip(tipos, ids)],
+        "Supervisor": [f"SUPERVISOR {s:03d}" for s in rng.integers(1, n_sup + 1, n)],
+    })
+
+# ==============================================================================
+# CONAE (snapshot operacional)
+# ==============================================================================
+def gerar_conae(fator, semente=42):
+    """Registros da consulta única do snapshot: resumo (quadro), pessoas e volantes."""
+    rng = _rng(semente, "conae")
+    un = _unidades(rng, fator)
+
+    resumo, pessoas = [], []
+    proximo_id = 100000
+    datas = [f"2026-0{m}-{d:02d}" for m in (1, 2, 3) for d in (5, 15, 25)]
+    for uid, tipo, escola, sup in un.itertuples(index=False):
+        data_conf = datas[uid % len(datas)] if uid % 7 else None
+        for cargo in sorted(rng.choice(CARGOS, size=int(rng.integers(3, 8)), replace=False)):
+            edital = int(rng.integers(1, 6))
+            real = max(0, edital + int(rng.integers(-2, 3)))
+            resumo.append({"Tipo": tipo, "UnidadeID": int(uid), "Escola": escola, "DataConferencia": data_conf,
+                           "Supervisor": sup, "Cargo": cargo, "Edital": edital, "Real": real,
+                           "Diferenca_num": real - edital})
+            for nome in sorted(_nomes(rng, real)):
+                pessoas.append({"UnidadeID": int(uid), "Escola": escola, "Cargo": cargo,
+                                "Funcionario": nome, "ID": proximo_id})
+                proximo_id += 1
+
+    n_vol = int(BASE["volantes"] * fator)
+    bases = rng.integers(0, len(un), n_vol)
+    destinos = np.where(rng.random(n_vol) < 0.6, rng.integers(0, len(un), n_vol), -1)
+    volantes = [{
+        "ID": 900000 + i, "BaseOriginal": un["Escola"].iat[b], "Funcionario": nome,
+        "Cargo": str(CARGOS[0]),
+        "UnidadeDestinoID": int(un["UnidadeID"].iat[d]) if d >= 0 else None,
+        "EscolaDestino": un["Escola"].iat[d] if d >= 0 else None,
+    } for i, (b, d, nome) in enumerate(zip(bases, destinos, _nomes(rng, n_vol)))]
+
+    termos = [pessoas[len(pessoas) // 2]["Funcionario"].split()[1].lower(), "conceicao", "mraia silva",
+              str(pessoas[-1]["ID"])]
+    return {"resumo": resumo, "pessoas": pessoas, "volantes": volantes, "termos": termos,
+            "filtro_cargos": {str(CARGOS[0]): "FALTA"}}
+
+# ==============================================================================
+# MESA OPERACIONAL
+# ==============================================================================
+def gerar_mesa(fator, semente=42):
+    """Payload do getMesaOperacoes (colunas CAMPOS_MESA), unidades/telefones do banco e censo CONAE."""
+    rng = _rng(semente, "mesa")
+    un = _unidades(rng, fator)
+    n = int(len(un) * BASE["colaboradores_por_unidade"])
+
+    unidade = rng.integers(0, len(un), n)
+    turno = rng.integers(0, len(TURNOS), n)
+    tem_escala = rng.random(n) < 0.93
+    presente = rng.random(n) < 0.85
+    agora_min = AGORA_REF.hour * 60 + AGORA_REF.minute
+
+    escalas, batidas = [], []
+    for t, esc, pres, desvio in zip(turno, tem_escala, presente, rng.integers(-10, 16, n)):
+        if not esc:
+            escalas.append([])
+            batidas.append([])
+            continue
+        intervalos = TURNOS[t]
+        escalas.append(intervalos)
+        marc = []
+        if pres:
+            for ini, fim in intervalos:
+                ent = int(ini[:2]) * 60 + int(ini[3:]) + int(desvio)
+                if ent > agora_min:
+                    break
+                sai = int(fim[:2]) * 60 + int(fim[3:])
+                marc.append([_hhmm(ent), _hhmm(sai)] if sai <= agora_min else [_hhmm(ent)])
+        batidas.append(marc)
+
+    ids = np.arange(200000, 200000 + n)
+    nomes = _nomes(rng, n)
+    cargos = CARGOS[rng.integers(0, len(CARGOS), n)]
+    df_api = pd.DataFrame({
+        "NMSITUFUNCH": np.where(rng.random(n) < 0.92, "Atividade Normal", "Férias"),
+        "NRESTRUTGEREN": un["UnidadeID"].to_numpy()[unidade].astype(str),
+        "NMESTRUTGEREN": un["Escola"].to_numpy()[unidade],
+        "NRVINCULOM": ids,
+        "NMVINCULOM": nomes,
+        "NMOCUPACAOH": cargos,
+        "horas_trabalhadas": batidas,
+        "horas_escala": escalas,
+        "OBSERVACAO": np.where(rng.random(n) < 0.05, "Atestado", ""),
+    })
+    df_unidades = un.rename(columns={"Escola": "NomeUnidade"})[["UnidadeID", "Supervisor", "NomeUnidade"]]
+    telefones = {s: f"1199{i:07d}" for i, s in enumerate(sorted(df_unidades["Supervisor"].unique()))}
+
+    # Censo do banco: ~3% fora da Mesa, ~2% em outra escola, ~2% da Mesa sem cadastro
+    sorteio = rng.random(n)
+    no_banco = sorteio >= 0.02
+    outra_escola = sorteio > 0.98 - 0.02
+    uid_banco = np.where(outra_escola, rng.integers(0, len(un), n), unidade)
+    df_banco = pd.DataFrame({
+        "Escola_DB": un["Escola"].to_numpy()[uid_banco],
+        "Supervisor_DB": un["Supervisor"].to_numpy()[uid_banco],
+        "Cargo": cargos, "Funcionario": nomes, "ID": ids,
+        "UnidadeID": un["UnidadeID"].to_numpy()[uid_banco],
+    })[no_banco]
+    n_extra = int(n * 0.03)
+    extra_uid = rng.integers(0, len(un), n_extra)
+    df_banco = pd.concat([df_banco, pd.DataFrame({
+        "Escola_DB": un["Escola"].to_numpy()[extra_uid],
+        "Supervisor_DB": un["Supervisor"].to_numpy()[extra_uid],
+        "Cargo": CARGOS[rng.integers(0, len(CARGOS), n_extra)],
+        "Funcionario": _nomes(rng, n_extra),
+        "ID": np.arange(800000, 800000 + n_extra),
+        "UnidadeID": un["UnidadeID"].to_numpy()[extra_uid],
+    })], ignore_index=True)
+
+    return {"df_api": df_api, "df_unidades": df_unidades, "telefones": telefones, "df_banco": df_banco,
+            "data": DATA_REF, "agora": AGORA_REF}
+
+# ==============================================================================
+# DIAGNÓSTICO DE PONTO
+# ==============================================================================
+def gerar_ponto(fator, semente=42):
+    """Funcionários do Portal Gestor (já com Supervisor), ocorrências HCM do mês e validações do banco."""
+    rng = _rng(semente, "ponto")
+    n = int(BASE["unidades"] * BASE["colaboradores_por_unidade"] * fator)
+    n_sup = max(1, int(BASE["supervisores"] * fator ** 0.5))
+    ids = np.arange(300000, 300000 + n)
+
+    df_func = pd.DataFrame({
+        "NRVINCULOM": ids.astype(str),
+        "NMVINCULOM": _nomes(rng, n),
+        "Supervisor": [f"SUPERVISOR {s:03d}" for s in rng.integers(1, n_sup + 1, n)],
+    })
+
+    # Mês de referência até a véspera de DATA_REF, ~6% dos dias com ocorrência
+    dias = [DATA_REF.replace(day=1) + timedelta(days=i) for i in range(DATA_REF.day)]
+    n_oco = int(n * len(dias) * 0.06)
+    dia = np.array(dias, dtype=object)[rng.integers(0, len(dias), n_oco)]
+    falta = rng.random(n_oco) < 0.35
+    df_oco = pd.DataFrame({
+        "NRVINCULOM": ids[rng.integers(0, n, n_oco)].astype(float),   # HCM devolve número; clean_id normaliza
+        "TIPO_OCORRENCIA": np.where(falta, "FALTA", np.where(rng.random(n_oco) < 0.5, "ATRASO", " atraso ")),
+        "DATA_INICIO": [d.strftime("%d/%m/%Y") for d in dia],
+        "DATA_INICIO_FILTER": [d.isoformat() for d in dia],
+        "DIFF_HOURS": np.where(falta, 8.0, rng.uniform(0.05, 2.5, n_oco).round(2)).astype(str),
+    })
+
+    validados = rng.choice(ids.astype(str), size=n // 10, replace=False)
+    return {
+        "df_func": df_func, "df_oco": df_oco, "hoje": DATA_REF.isoformat(),
+        "validacoes": {i: True for i in validados},
+        "usuarios": {i: "Supervisor Sintético" for i in validados},
+        "snapshots": {i: "1 Faltas | 00:30h" for i in validados},
+        "feriados": lambda anos: {k: v for a in anos for k, v in feriados_fixos(int(a)).items()},
+    }
+
+# ==============================================================================
+# SME (OCORRÊNCIAS DE LIMPEZA)
+# ==============================================================================
+CATEGORIAS_SME = ["Falta de insumos", "Material de limpeza", "Equipe incompleta", "Falta de funcionário",
+                  "RH - comportamento", "Limpeza inadequada", "Outros"]
+
+def gerar_sme(fator, semente=42):
+    """Registros da /ocorrencia/tabela (JSON aninhado, todas as páginas) e o CSV da /ocorrencia/exportar."""
+    rng = _rng(semente, "sme")
+    n = int(BASE["ocorrencias_sme"] * fator)
+    n_un = int(BASE["unidades"] * fator)
+    ids = rng.choice(np.arange(1000, 1000 + n * 5), size=n, replace=False)
+    encerrado = rng.random(n) < 0.6
+    inicio = datetime(2026, 3, 1)
+
+    registros = [{
+        "id": int(i),
+        "data": (inicio + timedelta(minutes=int(m))).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "unidadeEscolar": {"id": int(u), "descricao": f"EMEF SINTETICA {u:05d}", "dre": {"sigla": f"DRE-{u % 13:02d}"}},
+        "tipo": CATEGORIAS_SME[c],
+        "observacaoFinal": None if e else "Em análise",
+        "ocorrenciaRespondida": bool(r),
+        "flagEncerrado": bool(e),
+        "flagGerarDesconto": bool(e and g),
+        "flagEncerramentoAutomatico": bool(not e and a),
+        "prestadorServico": {"razaoSocial": "PRESTADORA SINTETICA LTDA", "cnpj": "00000000000100"},
+    } for i, m, u, c, e, r, g, a in zip(
+        ids, rng.integers(0, 60 * 24 * 30, n), rng.integers(1, n_un + 1, n), rng.integers(0, len(CATEGORIAS_SME), n),
+        encerrado, rng.random(n) < 0.7, rng.random(n) < 0.2, rng.random(n) < 0.05)]
+
+    # CSV cobre ~90% dos ids, com separador de milhar como vem do export
+    no_csv = ids[rng.random(n) < 0.9]
+    linhas = ["id;observacao;acaoCorretiva"]
+    linhas += [f"{i:,}".replace(",", ".") + f";Observação da ocorrência {i};Ação corretiva {i % 17}" for i in no_csv]
+    return {"registros": registros, "csv": "\n".join(linhas) + "\n"}
+
+# ==============================================================================
+# FATURAMENTO CONAE
+# ==============================================================================
+def _moeda(valores):
+    return [f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".") for v in valores]
+
+def gerar_faturamento(fator, semente=42):
+    """Relatório por unidade como vem do CSV: números em texto pt-BR e cabeçalhos com espaços."""
+    rng = _rng(semente, "faturamento")
+    n = int(BASE["unidades"] * fator)
+    total = rng.uniform(20000, 120000, n)
+    imr, rh = total * rng.uniform(0, 0.05, n), total * rng.uniform(0, 0.03, n)
+    return pd.DataFrame({
+        " nomeUnidade": [f"EMEF SINTETICA {i:05d}" for i in range(n)],
+        "totalContrato ": _moeda(np.full(n, total.sum())),
+        "descontoContrato": _moeda(np.full(n, (imr + rh).sum())),
+        "liquidoContrato": _moeda(np.full(n, total.sum() - (imr + rh).sum())),
+        "totalUnidade": _moeda(total),
+        "glosaImrUnidade": _moeda(imr),
+        "glosaRhUnidade": _moeda(rh),
+        "liquidoUnidade": _moeda(total - imr - rh),
+        "percentualImrUnidade": _moeda(rng.uniform(80, 100, n)),
+        "pontuacaoUnidade": _moeda(rng.uniform(0, 10, n)),
+        "nomeFiscal": np.where(rng.random(n) < 0.1, None, [f" FISCAL {i % 40:02d} " for i in range(n)]),
+    })
+
+# ==============================================================================
+# ARARAQUARA
+# ==============================================================================
+ESCALAS_ARARAQUARA = ["12X36 DIURNO", "12X36 NOTURNO", "5X2 8H", "6X1", "DIARISTA", "12X36 DIURNO 7H", "-"]
+
+def gerar_araraquara(fator, semente=42):
+    """AraraquaraColaboradores já normalizado (como buscar_dados_completos devolve) e os dois editais."""
+    rng = _rng(semente, "araraquara")
+    n = int(BASE["colaboradores_araraquara"] * fator)
+    df_real = pd.DataFrame({
+        "ColaboradorID": np.arange(n),
+        "Nome": _nomes(rng, n),
+        "Contrato": np.where(rng.random(n) < 0.55, "SAUDE", "EDUCACAO"),
+        "Cargo": CARGOS[rng.integers(0, 4, n)],
+        "RecebeInsalubridade": rng.choice([0, 20, 40], n),
+        "Escala": np.array(ESCALAS_ARARAQUARA)[rng.integers(0, len(ESCALAS_ARARAQUARA), n)],
+    })
+    tipos = ["DIURNO 12 HORAS", "NOTURNO 12 HORAS", "DIURNO 8 HORAS"]
+    df_meta_saude = pd.DataFrame([{"Tipo": t, "Qtd": int(rng.integers(5, 60) * fator), "Insalubridade": i}
+                                  for t in tipos for i in (0, 20, 40)])
+    df_meta_edu = pd.DataFrame([{"Qtd": int(rng.integers(20, 120) * fator), "Insalubridade": i} for i in (0, 20, 40)])
+    return {"df_real": df_real, "df_meta_edu": df_meta_edu, "df_meta_saude": df_meta_saude}
@@ -0,0 +1,258 @@
+"""
+Benchmark ponta a ponta das transformações de dados das páginas.
+
+Roda, sem Streamlit, HTTP nem banco, as mesmas funções de core/ que as páginas chamam depois da
+busca (snapshot CONAE, Mesa Operacional, Diagnóstico de Ponto, SME, Faturamento e Araraquara),
+sobre dados sintéticos em 1x / 10x / 100x o volume atual. Para cada pipeline e escala mede tempo
+(mínimo e mediana de N repetições) e pico de memória alocada (tracemalloc, numa execução à parte).
+
+    python benchmarks/executar.py                        # escalas 1 e 10, compara com limites.json
+    python benchmarks/executar.py --escalas 1,10,100 --repeticoes 3
+    python benchmarks/executar.py --saida base.json      # guarda os resultados
+    python benchmarks/executar.py --comparar base.json   # regressão contra uma execução anterior
+
+Com DATABASE_URL (ou .streamlit/secrets.toml) mede também a recarga completa do
+buscar_dados_operacionais do CONAE contra o Postgres: consulta única + montagem do snapshot,
+uma vez só (o volume é o do banco, não a escala). Sem banco configurado esse pipeline é pulado.
+
+Sai com código 1 se algum pipeline passar do limite em limites.json (tempo em ms ou memória em MB)
+ou, com --comparar, ficar mais lento que a referência além da tolerância.
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+from sqlalchemy import create_engine, text
+
+from benchmarks import dados_sinteticos as ds
+from core import araraquara, conae, faturamento, mesa, ponto, sme
+from core.db import POOL_CONFIG, criar_engine
+
+ARQ_LIMITES = Path(__file__).with_name("limites.json")
+
+# ==============================================================================
+# PIPELINES (entrada sintética -> mesma sequência de chamadas da página)
+# ==============================================================================
+def _conae(d):
+    df_resumo, df_pessoas, df_vol, df_escolas, matriz, indice = conae.montar_snapshot(d["resumo"], d["pessoas"], d["volantes"])
+    achados = [conae.buscar_pessoas(indice, t) for t in d["termos"]]
+    filtradas = conae.filtrar_por_cargos(matriz, d["filtro_cargos"])
+    return len(df_escolas), sum(len(a) for a in achados), int(filtradas.sum())
+
+def _preparar_mesa_processada(d):
+    d["df_mesa"] = mesa.processar_dados_unificados(d["df_api"], d["df_unidades"], d["telefones"], d["data"], d["agora"])
+    return d
+
+def _mesa_processar(d):
+    return len(mesa.processar_dados_unificados(d["df_api"], d["df_unidades"], d["telefones"], d["data"], d["agora"]))
+
+def _mesa_serie_status(d):
+    return len(mesa.resumir_status_por_unidade(d["df_api"], d["data"], d["agora"]))
+
+def _mesa_resumo_alertas(d):
+    resumo = mesa.resumir_escolas(d["df_mesa"])
+    rotulos = mesa.rotular_diagnostico(resumo)
+    alertas = mesa.montar_alertas(d["df_mesa"], d["agora"])
+    return len(resumo), len(rotulos), len(alertas)
+
+def _mesa_divergencias(d):
+    return len(mesa.calcular_divergencias(d["df_mesa"], d["df_banco"]))
+
+def _ponto(d):
+    df_mestra = ponto.montar_base_mestra(d["df_func"], d["df_oco"], d["hoje"], d["feriados"])
+    df_mestra = ponto.calcular_criticidade(df_mestra, d["validacoes"], d["usuarios"], d["snapshots"])
+    return len(df_mestra), float(df_mestra["ScoreNum"].sum())
+
+def _sme(d):
+    df_json = sme.montar_df_tabela(d["registros"])
+    df_csv = sme.ler_csv_export(d["csv"])
+    return len(sme.mesclar_ocorrencias(df_json, df_csv))
+
+def _faturamento(d):
+    return len(faturamento.processar_dataframe(d))
+
+def _araraquara(d):
+    edu = araraquara.processar_educacao(d["df_real"], d["df_meta_edu"])
+    saude = araraquara.processar_saude(d["df_real"], d["df_meta_saude"])
+    return len(araraquara.gerar_tabela_comparativa(edu)), len(araraquara.gerar_tabela_comparativa(saude))
+
+# nome -> (gerador, preparo fora da medição ou None, função medida)
+PIPELINES = {
+    "conae.snapshot_busca":    (ds.gerar_conae, None, _conae),
+    "mesa.processar":          (ds.gerar_mesa, None, _mesa_processar),
+    "mesa.serie_status":       (ds.gerar_mesa, None, _mesa_serie_status),
+    "mesa.resumo_alertas":     (ds.gerar_mesa, _preparar_mesa_processada, _mesa_resumo_alertas),
+    "mesa.divergencias":       (ds.gerar_mesa, _preparar_mesa_processada, _mesa_divergencias),
+    "ponto.criticidade":       (ds.gerar_ponto, None, _ponto),
+    "sme.mesclar":             (ds.gerar_sme, None, _sme),
+    "faturamento.processar":   (ds.gerar_faturamento, None, _faturamento),
+    "araraquara.comparativo":  (ds.gerar_araraquara, None, _araraquara),
+}
+
+# ==============================================================================
+# BANCO (opcional)
+# ==============================================================================
+def engine_benchmark():
+    """Engine para os pipelines de banco: DATABASE_URL, senão o secrets.toml; None se nenhum está configurado."""
+    url = os.environ.get("DATABASE_URL")
+    if url:
+        return create_engine(url, **POOL_CONFIG)
+    if (RAIZ / ".streamlit" / "secrets.toml").exists():
+        return criar_engine()
+    return None
+
+def _conae_banco(engine):
+    """Recarga completa do buscar_dados_operacionais (CONAE.py): consulta única + montagem do snapshot."""
+    with engine.connect() as c:
+        linha = c.execute(text(conae.sql_snapshot()), {"tabelas": conae.TABELAS_MONITORADAS}).mappings().one()
+    frames = conae.montar_snapshot(linha["resumo"], linha["pessoas"], linha["volantes"])
+    return len(frames[0]), len(frames[1])
+
+# nome -> função medida (recebe a engine; roda uma vez, fora das escalas)
+PIPELINES_BANCO = {
+    "conae.dados_operacionais": _conae_banco,
+}
+
+# ==============================================================================
+# MEDIÇÃO
+# ==============================================================================
+def medir(funcao, entrada, repeticoes, copiar=True):
+    """Cada execução recebe uma cópia da entrada (algumas transformações alteram o frame recebido)."""
+    tempos = []
+    for _ in range(repeticoes):
+        dados = copy.deepcopy(entrada) if copiar else entrada
+        gc.collect()
+        t0 = time.perf_counter()
+        funcao(dados)
+        tempos.append((time.perf_counter() - t0) * 1000)
+
+    # Memória numa execução separada: o tracemalloc deixa a medição de tempo bem mais lenta
+    dados = copy.deepcopy(entrada) if copiar else entrada
+    gc.collect()
+    tracemalloc.start()
+    funcao(dados)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"min_ms": round(min(tempos), 2), "mediana_ms": round(statistics.median(tempos), 2),
+            "pico_mb": round(pico / 2**20, 2)}
+
+def _imprimir(nome, rotulo, r):
+    print(f"{nome:<24} {rotulo:>5}  min {r['min_ms']:>10.1f} ms  mediana {r['mediana_ms']:>10.1f} ms  "
+          f"pico {r['pico_mb']:>8.1f} MB", flush=True)
+
+def executar(nomes, escalas, repeticoes, semente):
+    resultados = {}
+    cache_entradas = {}
+    for escala in escalas:
+        for nome in [n for n in nomes if n in PIPELINES]:
+            gerador, preparo, funcao = PIPELINES[nome]
+            chave = (gerador, preparo, escala)
+            if chave not in cache_entradas:
+                entrada = gerador(escala, semente)
+                cache_entradas[chave] = preparo(entrada) if preparo else entrada
+            r = medir(funcao, cache_entradas[chave], repeticoes)
+            resultados[f"{nome}@{escala}x"] = r
+            _imprimir(nome, f"{escala}x", r)
+        cache_entradas.clear()
+
+    nomes_banco = [n for n in nomes if n in PIPELINES_BANCO]
+    if nomes_banco:
+        try:
+            engine = engine_benchmark()
+        except Exception as e:
+            print(f"{', '.join(nomes_banco)}: banco indisponível, pulado ({e})")
+            return resultados
+        if engine is None:
+            print(f"{', '.join(nomes_banco)}: pulado (sem DATABASE_URL nem .streamlit/secrets.toml)")
+            return resultados
+        try:
+            for nome in nomes_banco:
+                try:
+                    r = medir(PIPELINES_BANCO[nome], engine, repeticoes, copiar=False)
+                except Exception as e:
+                    print(f"{nome}: erro no banco, pulado ({str(e).splitlines()[0]})")
+                    continue
+                resultados[f"{nome}@banco"] = r
+                _imprimir(nome, "banco", r)
+        finally:
+            engine.dispose()
+    return resultados
+
+# ==============================================================================
+# REGRESSÃO
+# ==============================================================================
+def checar_limites(resultados, limites):
+    falhas = []
+    for chave, r in resultados.items():
+        lim = limites.get(chave)
+        if not lim:
+            continue
+        if "ms" in lim and r["mediana_ms"] > lim["ms"]:
+            falhas.append(f"{chave}: mediana {r['mediana_ms']:.1f} ms > limite {lim['ms']} ms")
+        if "mb" in lim and r["pico_mb"] > lim["mb"]:
+            falhas.append(f"{chave}: pico {r['pico_mb']:.1f} MB > limite {lim['mb']} MB")
+    return falhas
+
+def comparar(resultados, referencia, tolerancia):
+    falhas = []
+    for chave, r in resultados.items():
+        ref = referencia.get(chave)
+        if not ref:
+            continue
+        # Mínimo é a medida mais estável entre execuções; piso de 5 ms evita ruído nos pipelines rápidos
+        teto = max(ref["min_ms"] * (1 + tolerancia), ref["min_ms"] + 5)
+        if r["min_ms"] > teto:
+            falhas.append(f"{chave}: {r['min_ms']:.1f} ms vs referência {ref['min_ms']:.1f} ms (+{tolerancia:.0%} tolerado)")
+    return falhas
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark das transformações de dados das páginas (sem HTTP; banco opcional).")
+    p.add_argument("--escalas", default="1,10", help="fatores de volume separados por vírgula (ex.: 1,10,100)")
+    p.add_argument("--repeticoes", type=int, default=5)
+    p.add_argument("--pipelines", default="", help="subconjunto por prefixo, separado por vírgula (ex.: mesa,ponto)")
+    p.add_argument("--semente", type=int, default=42)
+    p.add_argument("--limites", default=str(ARQ_LIMITES), help="JSON {pipeline@escala: {ms, mb}}; vazio desliga")
+    p.add_argument("--saida", help="grava os resultados em JSON")
+    p.add_argument("--comparar", help="JSON de uma execução anterior (--saida) para checar regressão")
+    p.add_argument("--tolerancia", type=float, default=0.5, help="folga relativa no --comparar (0.5 = 50%%)")
+    args = p.parse_args(argv)
+
+    escalas = [int(e) for e in args.escalas.split(",") if e.strip()]
+    prefixos = [x.strip() for x in args.pipelines.split(",") if x.strip()]
+    todos = [*PIPELINES, *PIPELINES_BANCO]
+    nomes = [n for n in todos if not prefixos or any(n.startswith(px) for px in prefixos)]
+    if not nomes:
+        p.error(f"nenhum pipeline com prefixo {prefixos}; disponíveis: {', '.join(todos)}")
+
+    resultados = executar(nomes, escalas, max(1, args.repeticoes), args.semente)
+
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    falhas = []
+    if args.limites:
+        falhas += checar_limites(resultados, json.loads(Path(args.limites).read_text(encoding="utf-8")))
+    if args.comparar:
+        falhas += comparar(resultados, json.loads(Path(args.comparar).read_text(encoding="utf-8")), args.tolerancia)
+
+    if falhas:
+        print("\nREGRESSÃO:")
+        for f in falhas:
+            print(f"  - {f}")
+        return 1
+    print("\nOK: dentro dos limites.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Quadro edital x real dos contratos de Araraquara (Educação e Saúde).
+"""
+import pandas as pd
+
+def processar_educacao(df_real, df_meta):
+    meta_agg = df_meta.groupby('Insalubridade')['Qtd'].sum().reset_index()
+    meta_agg['Categoria'] = meta_agg['Insalubridade'].apply(lambda x: f"Insalubridade {int(x)}%")
+    meta_agg['Tipo_Dado'] = 'Edital'
+    meta_agg['Cor'] = '#808080'
+
+    real_filter = df_real[df_real['Contrato'] == 'EDUCACAO'].copy()
+    real_agg = real_filter.groupby('RecebeInsalubridade').size().reset_index(name='Qtd')
+    real_agg['Categoria'] = real_agg['RecebeInsalubridade'].apply(lambda x: f"Insalubridade {int(x)}%")
+    real_agg['Tipo_Dado'] = 'Real'
+    real_agg['Cor'] = '#00bfff'
+
+    return pd.concat([meta_agg[['Categoria', 'Tipo_Dado', 'Qtd', 'Cor']], real_agg[['Categoria', 'Tipo_Dado', 'Qtd', 'Cor']]])
+
+def processar_saude(df_real, df_meta):
+    real_filter = df_real[df_real['Contrato'] == 'SAUDE'].copy()
+    def normalizar_escala_saude(row):
+        esc = row['Escala']
+        if 'NOTURNO' in esc: return 'NOTURNO 12 HORAS'
+        elif '12X36' in esc and 'DIURNO' in esc: return 'DIURNO 12 HORAS'
+        elif any(x in esc for x in ['5X2', '6X1', '8H', 'DIARISTA']): return 'DIURNO 8 HORAS'
+        return 'OUTROS'
+    real_filter['Tipo_Normalizado'] = real_filter.apply(normalizar_escala_saude, axis=1)
+
+    real_agg = real_filter.groupby(['Tipo_Normalizado', 'RecebeInsalubridade']).size().reset_index(name='Qtd')
+    real_agg['Chave'] = real_agg.apply(lambda x: f"{x['Tipo_Normalizado']} ({int(x['RecebeInsalubridade'])}%)", axis=1)
+    real_agg['Tipo_Dado'] = 'Real'
+    real_agg['Cor'] = '#00bfff'
+
+    meta_agg = df_meta.groupby(['Tipo', 'Insalubridade'])['Qtd'].sum().reset_index()
+    meta_agg['Chave'] = meta_agg.apply(lambda x: f"{x['Tipo']} ({int(x['Insalubridade'])}%)", axis=1)
+    meta_agg['Tipo_Dado'] = 'Edital'
+    meta_agg['Cor'] = '#808080'
+
+    return pd.concat([meta_agg[['Chave', 'Tipo_Dado', 'Qtd', 'Cor']], real_agg[['Chave', 'Tipo_Dado', 'Qtd', 'Cor']]]).rename(columns={'Chave': 'Categoria'})
+
+def gerar_tabela_comparativa(df_chart):
+    if df_chart.empty: return pd.DataFrame()
+    df_pivot = df_chart.pivot_table(index='Categoria', columns='Tipo_Dado', values='Qtd', aggfunc='sum').fillna(0)
+    if 'Edital' not in df_pivot.columns: df_pivot['Edital'] = 0
+    if 'Real' not in df_pivot.columns: df_pivot['Real'] = 0
+    df_pivot = df_pivot.reset_index()
+    df_pivot['Edital'] = df_pivot['Edital'].astype(int); df_pivot['Real'] = df_pivot['Real'].astype(int)
+    df_pivot['Diferença'] = df_pivot['Real'] - df_pivot['Edital']
+    df_pivot['Diff_Display'] = df_pivot['Diferença'].apply(lambda x: f"+{x}" if x > 0 else str(x))
+    return df_pivot[['Categoria', 'Edital', 'Real', 'Diff_Display']]
@@ -0,0 +1,249 @@
+"""
+Transformações do snapshot operacional da CONAE (quadro edital x real, pessoas e volantes).
+"""
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Colunas devolvidas pela consulta única do snapshot (sql_snapshot)
+COLUNAS_RESUMO = ["Tipo", "UnidadeID", "Escola", "DataConferencia", "Supervisor", "Cargo", "Edital", "Real", "Diferenca_num"]
+COLUNAS_PESSOAS = ["UnidadeID", "Escola", "Cargo", "Funcionario", "ID"]
+COLUNAS_VOLANTES = ["ID", "BaseOriginal", "Funcionario", "Cargo", "UnidadeDestinoID", "EscolaDestino"]
+
+# Snippet SQL seguro para garantir a data de Brasília diretamente no banco
+# CAST(... AS DATE) evita o erro de sintaxe do "::" no Python/SQLAlchemy
+SQL_DATA_HOJE = "CAST(timezone('America/Sao_Paulo', now()) AS DATE)"
+TABELAS_MONITORADAS = ["QuadroEdital", "Unidades", "Colaboradores", "ColaboradoresVolantes", "AlocacaoVolantes", "ContagemColaboradores"]
+
+# ==============================================================================
+# CONSULTA ÚNICA (UMA IDA AO BANCO)
+# ==============================================================================
+# Quadro, colaboradores, volantes do dia e marcas d'água num único comando:
+# o Postgres devolve cada conjunto como JSON e o Python só desempacota.
+# O "Real" vem da tabela "ContagemColaboradores", mantida por triggers.
+def sql_snapshot(filtrar_unidades=False, incluir_quadro=True, incluir_volantes=True):
+    filtro = 'AND col."UnidadeID" = ANY(:uids)' if filtrar_unidades else ''
+    filtro_quadro = 'WHERE q."UnidadeID" = ANY(:uids)' if filtrar_unidades else ''
+    filtro_contagem = 'WHERE "UnidadeID" = ANY(:uids)' if filtrar_unidades else ''
+
+    sel_quadro = """
+        (SELECT COALESCE(json_agg(r ORDER BY r."Escola", r."Cargo"), '[]') FROM Resumo r) AS resumo,
+        (SELECT COALESCE(json_agg(p ORDER BY p."Escola", p."Cargo", p."Funcionario"), '[]') FROM Pessoas p) AS pessoas""" \
+        if incluir_quadro else "NULL AS resumo, NULL AS pessoas"
+    sel_volantes = """(SELECT COALESCE(json_agg(vs), '[]') FROM Volantes vs) AS volantes""" \
+        if incluir_volantes else "NULL AS volantes"
+
+    return f"""
+    WITH Ativos AS MATERIALIZED (
+        SELECT col."ColaboradorID", col."UnidadeID", col."CargoID", col."Nome"
+        FROM "Colaboradores" col
+        LEFT JOIN "ColaboradoresVolantes" v ON col."ColaboradorID" = v."ColaboradorID"
+        WHERE col."Ativo" = TRUE 
+          AND v."ColaboradorID" IS NULL
+          {filtro}
+    ),
+    ContagemReal AS (
+        -- Mantida por triggers (sql/001_contagem_colaboradores.sql)
+        SELECT "UnidadeID", "CargoID", "QtdReal"
+        FROM "ContagemColaboradores"
+        {filtro_contagem}
+    ),
+    Resumo AS (
+        SELECT 
+            t."NomeTipo" AS "Tipo", 
+            u."UnidadeID", 
+            u."NomeUnidade" AS "Escola", 
+            u."DataConferencia",
+            s."NomeSupervisor" AS "Supervisor", 
+            c."NomeCargo" AS "Cargo", 
+            q."Quantidade" AS "Edital",
+            COALESCE(cr."QtdReal", 0) AS "Real",
+            (COALESCE(cr."QtdReal", 0) - q."Quantidade") AS "Diferenca_num"
+        FROM "QuadroEdital" q
+        JOIN "Unidades" u ON q."UnidadeID" = u."UnidadeID"
+        JOIN "Cargos" c ON q."CargoID" = c."CargoID"
+        JOIN "TiposUnidades" t ON u."TipoID" = t."TipoID"
+        JOIN "Supervisores" s ON u."SupervisorID" = s."SupervisorID"
+        LEFT JOIN ContagemReal cr ON q."UnidadeID" = cr."UnidadeID" AND q."CargoID" = cr."CargoID"
+        {filtro_quadro}
+    ),
+    Pessoas AS (
+        SELECT u."UnidadeID", u."NomeUnidade" AS "Escola", c."NomeCargo" AS "Cargo", a."Nome" AS "Funcionario", a."ColaboradorID" AS "ID"
+        FROM Ativos a
+        JOIN "Unidades" u ON a."UnidadeID" = u."UnidadeID"
+        JOIN "Cargos" c ON a."CargoID" = c."CargoID"
+    ),
+    Volantes AS (
+        SELECT 
+            cv."ColaboradorID" AS "ID", 
+            ub."NomeUnidade" AS "BaseOriginal",
+            col."Nome" AS "Funcionario",
+            c."NomeCargo" AS "Cargo",
+            av."UnidadeDestinoID",
+            ud."NomeUnidade" AS "EscolaDestino"
+        FROM "ColaboradoresVolantes" cv
+        JOIN "Unidades" ub ON cv."UnidadeBaseID" = ub."UnidadeID"
+        JOIN "Colaboradores" col ON cv."ColaboradorID" = col."ColaboradorID"
+        JOIN "Cargos" c ON col."CargoID" = c."CargoID"
+        LEFT JOIN ("AlocacaoVolantes" av JOIN "Unidades" ud ON av."UnidadeDestinoID" = ud."UnidadeID")
+               ON av."ColaboradorID" = cv."ColaboradorID" AND av."DataAlocacao" = {SQL_DATA_HOJE}
+        WHERE col."Ativo" = TRUE
+    )
+    SELECT 
+        {sel_quadro},
+        {sel_volantes},
+        (SELECT json_object_agg(relname, n_tup_ins + n_tup_upd + n_tup_del) 
+           FROM pg_stat_user_tables WHERE relname = ANY(:tabelas)) AS marcas
+    """
+
+# ==============================================================================
+# QUADRO (EDITAL X REAL)
+# ==============================================================================
+def derivar_colunas_resumo(df_resumo):
+    condicoes = [df_resumo['Diferenca_num'] < 0, df_resumo['Diferenca_num'] > 0]
+    df_resumo['Status_Codigo'] = np.select(condicoes, ['FALTA', 'EXCEDENTE'], default='OK')
+    df_resumo['Status_Display'] = np.select(condicoes, ['🔴 FALTA', '🔵 EXCEDENTE'], default='🟢 OK')
+
+    df_resumo['Diferenca_Display'] = df_resumo['Diferenca_num'].apply(lambda x: f"+{x}" if x > 0 else str(int(x)))
+    df_resumo['DataConferencia'] = pd.to_datetime(df_resumo['DataConferencia'])
+    cols_num = ['Edital', 'Real']
+    df_resumo[cols_num] = df_resumo[cols_num].apply(pd.to_numeric, errors='coerce').fillna(0).astype(int)
+    return df_resumo
+
+# Bits do conjunto de status presentes nos cargos de cada escola
+BIT_STATUS = {'FALTA': 1, 'EXCEDENTE': 2, 'OK': 4}
+RANK_ICONE = {"🔴": 0, "🟡": 1, "🔵": 2, "🟢": 3}
+
+def indexar_escolas(df_resumo):
+    """
+    Índice por escola (uma linha por Escola), montado uma vez por carga do snapshot.
+    Os filtros da tela viram máscaras booleanas sobre ele, sem novo groupby por rerun.
+    """
+    if df_resumo.empty:
+        return pd.DataFrame(columns=['Escola', 'Tipo', 'Supervisor', 'UnidadeID', 'DataConferencia', 'Edital', 'Real',
+                                     'Saldo', 'Status_Mask', 'Status', 'Situacao', 'Cor', 'Sinal', 'rank'])
+
+    df_idx = df_resumo.groupby('Escola', sort=True).agg(
+        Tipo=('Tipo', 'first'), Supervisor=('Supervisor', 'first'),
+        UnidadeID=('UnidadeID', 'first'), DataConferencia=('DataConferencia', 'first'),
+        Edital=('Edital', 'sum'), Real=('Real', 'sum')
+    )
+    bits = df_resumo['Status_Codigo'].map(BIT_STATUS).fillna(0).astype(int)
+    presenca = pd.crosstab(df_resumo['Escola'], bits) > 0
+    df_idx['Status_Mask'] = (presenca * presenca.columns.to_numpy()).sum(axis=1)
+    df_idx = df_idx.reset_index()
+
+    df_idx['Saldo'] = df_idx['Real'] - df_idx['Edital']
+    # Saldo zero com algum cargo fora do OK implica cargo em FALTA compensado por EXCEDENTE
+    tem_falta = (df_idx['Status_Mask'] & BIT_STATUS['FALTA']) > 0
+    conds = [df_idx['Saldo'] < 0, df_idx['Saldo'] > 0, tem_falta]
+    df_idx['Status'] = np.select(conds, ["🔴", "🔵", "🟡"], default="🟢")
+    df_idx['Situacao'] = np.select(conds, ["🔴 FALTA", "🔵 EXCEDENTE", "🟡 AJUSTE"], default="🟢 OK")
+    df_idx['Cor'] = np.where(df_idx['Saldo'] < 0, '#e74c3c', np.where(df_idx['Saldo'] > 0, '#3498db', '#27ae60'))
+    df_idx['Sinal'] = np.where(df_idx['Saldo'] > 0, '+', '')
+    df_idx['rank'] = df_idx['Status'].map(RANK_ICONE)
+    return df_idx.sort_values(['rank', 'Escola'], ignore_index=True)
+
+# Código do status de cada cargo na matriz escola x cargo (0 = cargo fora do quadro da escola)
+CODIGO_STATUS = {'FALTA': 1, 'EXCEDENTE': 2, 'OK': 3}
+
+def matriz_status_cargos(df_resumo, df_escolas):
+    """Matriz escola x cargo com códigos int8, alinhada linha a linha com o índice de escolas."""
+    if df_resumo.empty:
+        return pd.DataFrame(index=df_escolas.index, dtype='int8')
+    codigos = df_resumo['Status_Codigo'].map(CODIGO_STATUS).fillna(0).astype('int8')
+    matriz = codigos.groupby([df_resumo['Escola'], df_resumo['Cargo']]).max().unstack(fill_value=0)
+    matriz = matriz.reindex(df_escolas['Escola']).fillna(0).astype('int8')
+    matriz.index = df_escolas.index
+    return matriz.reindex(columns=sorted(matriz.columns))
+
+def filtrar_por_cargos(matriz, filtro_comb):
+    """Escolas que atendem a todas as condições {cargo: status} numa única comparação vetorizada."""
+    cargos = list(filtro_comb)
+    alvo = np.array([CODIGO_STATUS[filtro_comb[c]] for c in cargos], dtype='int8')
+    return pd.Series((matriz[cargos].to_numpy() == alvo).all(axis=1), index=matriz.index)
+
+# ==============================================================================
+# ÍNDICE DE BUSCA DE PESSOAS (TRIGRAMAS, SEM ACENTO)
+# ==============================================================================
+SIMILARIDADE_MINIMA = 0.5   # fração dos trigramas do termo que precisa aparecer no nome (busca aproximada)
+
+def normalizar_texto(valor):
+    """Minúsculo, sem acentos e com espaços colapsados: 'JOSÉ  da Conceição' -> 'jose da conceicao'."""
+    texto = unicodedata.normalize('NFKD', str(valor))
+    texto = "".join(ch for ch in texto if not unicodedata.combining(ch))
+    return " ".join(texto.casefold().split())
+
+def _trigramas(texto):
+    texto = f" {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def indexar_pessoas(df_pessoas):
+    """Índice invertido trigrama -> linhas de df_pessoas, sobre nome normalizado e matrícula."""
+    textos = [f"{normalizar_texto(n)}\x1f{i}" for n, i in zip(df_pessoas['Funcionario'].fillna(''), df_pessoas['ID'])]
+    trigramas = {}
+    for pos, texto in enumerate(textos):
+        for tri in _trigramas(texto):
+            trigramas.setdefault(tri, set()).add(pos)
+    return {
+        'textos': textos,
+        'trigramas': trigramas,
+        'unidades': df_pessoas['UnidadeID'].to_numpy()
+    }
+
+def buscar_pessoas(indice, termo):
+    """
+    Retorna as posições (linhas de df_pessoas) que contêm o termo, ignorando caixa e acentos.
+    Sem resultado exato, cai para busca aproximada por trigramas (nomes digitados com erro).
+    """
+    termo = normalizar_texto(termo)
+    if not termo:
+        return np.arange(len(indice['textos']))
+
+    textos = indice['textos']
+    # Termos curtos não formam trigramas internos suficientes: varredura simples
+    if len(termo) < 3:
+        return np.array([p for p, t in enumerate(textos) if termo in t], dtype=int)
+
+    tris = [indice['trigramas'].get(termo[i:i + 3], set()) for i in range(len(termo) - 2)]
+    candidatos = set.intersection(*sorted(tris, key=len))
+    exatos = [p for p in candidatos if termo in textos[p]]
+    if exatos or termo.isdigit():
+        return np.array(sorted(exatos), dtype=int)
+
+    # Busca aproximada: conta quantos trigramas do termo cada linha compartilha
+    tris_termo = _trigramas(termo)
+    contagem = Counter()
+    for tri in tris_termo:
+        contagem.update(indice['trigramas'].get(tri, ()))
+    minimo = SIMILARIDADE_MINIMA * len(tris_termo)
+    return np.array(sorted(p for p, n in contagem.items() if n >= minimo), dtype=int)
+
+# ==============================================================================
+# VOLANTES E MONTAGEM DO SNAPSHOT
+# ==============================================================================
+def derivar_colunas_volantes(df_volantes_status):
+    if df_volantes_status.empty:
+        return pd.DataFrame()
+    df_volantes_status['Status_Texto'] = np.where(df_volantes_status['UnidadeDestinoID'].notnull(),
+                                                  "Cobrindo: " + df_volantes_status['EscolaDestino'].fillna(''),
+                                                  "Disponível")
+    df_volantes_status['Status_Icon'] = np.where(df_volantes_status['UnidadeDestinoID'].notnull(), "🔴", "🟢")
+    return df_volantes_status
+
+def indexar_snapshot(df_resumo, df_pessoas):
+    """Estruturas derivadas do snapshot: (índice de escolas, matriz escola x cargo, índice de busca de pessoas)."""
+    df_escolas = indexar_escolas(df_resumo)
+    return df_escolas, matriz_status_cargos(df_resumo, df_escolas), indexar_pessoas(df_pessoas)
+
+def montar_snapshot(resumo, pessoas, volantes):
+    """
+    Registros crus da consulta única (listas de dicts) -> tupla de frames que CONAE.py mantém em memória:
+    (df_resumo, df_pessoas, df_volantes_status, df_escolas, matriz_cargos, indice_pessoas).
+    """
+    df_resumo = derivar_colunas_resumo(pd.DataFrame(resumo, columns=COLUNAS_RESUMO))
+    df_pessoas = pd.DataFrame(pessoas, columns=COLUNAS_PESSOAS)
+    df_volantes_status = derivar_colunas_volantes(pd.DataFrame(volantes, columns=COLUNAS_VOLANTES))
+    return (df_resumo, df_pessoas, df_volantes_status) + indexar_snapshot(df_resumo, df_pessoas)
@@ -0,0 +1,165 @@
+"""
+Acesso compartilhado ao Postgres.
+
+Todas as páginas pegam a conexão por obter_conexao(): um único st.connection com pool
+dimensionado (pre-ping, reciclagem, statement_timeout) e métricas de uso/espera, e o
+bootstrap de schema (tabelas auxiliares) roda uma vez por processo em vez de a cada chamada.
+
+criar_engine() monta a mesma engine fora do Streamlit (scripts de manutenção/cron).
+"""
+import threading
+import time
+import tomllib
+from pathlib import Path
+
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.engine import URL
+from sqlalchemy.pool import QueuePool
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+# ==============================================================================
+# CONFIGURAÇÃO DO POOL
+# ==============================================================================
+TIMEOUT_CONSULTA_MS = 30000   # statement_timeout por conexão
+
+# ==============================================================================
+# MÉTRICAS DO POOL
+# ==============================================================================
+_metricas_lock = threading.Lock()
+_metricas = {
+    "checkouts": 0,         # conexões entregues pelo pool
+    "esperas": 0,           # checkouts que levaram mais de 10 ms (pool cheio / conexão nova)
+    "espera_total": 0.0,    # segundos somados de espera em checkout
+    "espera_max": 0.0,
+    "timeouts": 0,          # checkouts que estouraram pool_timeout
+    "conexoes_abertas": 0,  # conexões físicas criadas desde o início
+    "invalidadas": 0,       # conexões descartadas (pre-ping falhou, erro de rede...)
+}
+
+class PoolInstrumentado(QueuePool):
+    """QueuePool que mede o tempo de espera de cada checkout."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except exc.TimeoutError:
+            with _metricas_lock:
+                _metricas["timeouts"] += 1
+            raise
+        espera = time.perf_counter() - inicio
+        with _metricas_lock:
+            _metricas["checkouts"] += 1
+            _metricas["espera_total"] += espera
+            _metricas["espera_max"] = max(_metricas["espera_max"], espera)
+            if espera > 0.01:
+                _metricas["esperas"] += 1
+        return conexao
+
+    def _create_connection(self):
+        conexao = super()._create_connection()
+        with _metricas_lock:
+            _metricas["conexoes_abertas"] += 1
+        return conexao
+
+    def _invalidate(self, connection, exception=None, _checkin=True):
+        with _metricas_lock:
+            _metricas["invalidadas"] += 1
+        return super()._invalidate(connection, exception, _checkin)
+
+POOL_CONFIG = {
+    "poolclass": PoolInstrumentado,
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 15,
+    "pool_recycle": 1800,   # evita conexões derrubadas pelo servidor/proxy por inatividade
+    "pool_pre_ping": True,
+    "connect_args": {"options": f"-c statement_timeout={TIMEOUT_CONSULTA_MS}"},
+}
+
+# ==============================================================================
+# BOOTSTRAP DE SCHEMA (uma vez por processo)
+# ==============================================================================
+DDL_BOOTSTRAP = [
+    """
+    CREATE TABLE IF NOT EXISTS public."HCMTokens" (
+        id VARCHAR(50) PRIMARY KEY,
+        access_token TEXT,
+        user_uid TEXT,
+        updated_at TIMESTAMP
+    );
+    """,
+    # Série intradiária da Mesa Operacional: contagem por unidade x status a cada coleta gravada
+    # (Status: 1 Presente, 2 Falta, 3 A Iniciar, 4 S/ Escala — ver CODIGO_STATUS em MESA_OPERACIONAL)
+    """
+    CREATE TABLE IF NOT EXISTS public."MesaSerieStatus" (
+        "NrEstrutura" BIGINT NOT NULL,
+        "DataRef" DATE NOT NULL,
+        "ColetadoEm" TIMESTAMP NOT NULL,
+        "UnidadeID" INTEGER NOT NULL,
+        "Status" SMALLINT NOT NULL,
+        "Qtd" SMALLINT NOT NULL,
+        PRIMARY KEY ("NrEstrutura", "DataRef", "ColetadoEm", "UnidadeID", "Status")
+    );
+    """,
+]
+
+_bootstrap_lock = threading.Lock()
+_bootstrap_feito = False
+
+def garantir_schema(engine):
+    """Executa o DDL_BOOTSTRAP na primeira chamada do processo; as seguintes não tocam no banco."""
+    global _bootstrap_feito
+    if _bootstrap_feito:
+        return
+    with _bootstrap_lock:
+        if _bootstrap_feito:
+            return
+        try:
+            with engine.begin() as c:
+                for ddl in DDL_BOOTSTRAP:
+                    c.execute(text(ddl))
+            _bootstrap_feito = True
+        except Exception as e:
+            # Sem permissão de DDL ou banco fora do ar: tenta de novo na próxima chamada
+            print(f"Erro no bootstrap do schema: {e}")
+
+# ==============================================================================
+# CONEXÕES
+# ==============================================================================
+def obter_conexao():
+    """st.connection compartilhado por todas as páginas (mesmos kwargs = mesmo recurso em cache)."""
+    import streamlit as st
+    conn = st.connection("postgres", type="sql", **POOL_CONFIG)
+    garantir_schema(conn.engine)
+    return conn
+
+def criar_engine(caminho_secrets=RAIZ / ".streamlit" / "secrets.toml"):
+    """Mesma configuração do obter_conexao(), lida direto do secrets.toml (uso fora do Streamlit)."""
+    with open(caminho_secrets, "rb") as f:
+        cfg = tomllib.load(f)["connections"]["postgres"]
+    kwargs = {**cfg.get("create_engine_kwargs", {}), **POOL_CONFIG}
+    if "url" in cfg:
+        return create_engine(cfg["url"], **kwargs)
+    url = URL.create(
+        drivername=f"{cfg.get('dialect', 'postgresql')}+{cfg['driver']}" if cfg.get("driver") else cfg.get("dialect", "postgresql"),
+        username=cfg.get("username"), password=cfg.get("password"),
+        host=cfg.get("host"), port=cfg.get("port"), database=cfg.get("database")
+    )
+    return create_engine(url, **kwargs)
+
+def metricas_pool(engine):
+    """Retrato do pool: ocupação atual + contadores acumulados de checkout/espera."""
+    pool = engine.pool
+    with _metricas_lock:
+        m = dict(_metricas)
+    m["tamanho"] = pool.size() if hasattr(pool, "size") else 0
+    m["em_uso"] = pool.checkedout() if hasattr(pool, "checkedout") else 0
+    m["ociosas"] = pool.checkedin() if hasattr(pool, "checkedin") else 0
+    m["overflow"] = max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0
+    m["capacidade"] = m["tamanho"] + max(getattr(pool, "_max_overflow", 0), 0)
+    m["utilizacao"] = m["em_uso"] / m["capacidade"] if m["capacidade"] else 0.0
+    m["espera_media_ms"] = (m["espera_total"] / m["checkouts"] * 1000) if m["checkouts"] else 0.0
+    m["espera_max_ms"] = m["espera_max"] * 1000
+    return m
@@ -0,0 +1,49 @@
+"""
+Endereços base das APIs Teknisa (Portal Gestor e HCM).
+
+As páginas montam as URLs por url_portal()/url_hcm()/URL_HCM_LOGIN em vez de fixar o host,
+para poder apontar o dashboard para o servidor local de testes (scripts/servidor_teknisa_local.py).
+
+Ordem de precedência, lida uma vez na importação:
+  1. variáveis de ambiente TEKNISA_PORTAL_GESTOR_URL / TEKNISA_HCM_URL
+  2. seção [endpoints] do .streamlit/secrets.toml (portal_gestor_url / hcm_url)
+  3. produção
+
+    TEKNISA_PORTAL_GESTOR_URL=http://localhost:8765/portalgestor \\
+    TEKNISA_HCM_URL=http://localhost:8765/hcm streamlit run CONAE.py
+"""
+import os
+import tomllib
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+PORTAL_GESTOR_PRODUCAO = "https://portalgestor.teknisa.com"
+HCM_PRODUCAO = "https://hcm.teknisa.com"
+
+def _ler_secao_endpoints():
+    try:
+        with open(RAIZ / ".streamlit" / "secrets.toml", "rb") as f:
+            return tomllib.load(f).get("endpoints", {}) or {}
+    except (OSError, tomllib.TOMLDecodeError):
+        return {}
+
+def _resolver(variavel, chave, padrao, secao):
+    valor = os.environ.get(variavel) or secao.get(chave) or padrao
+    return str(valor).rstrip("/")
+
+_secao = _ler_secao_endpoints()
+URL_PORTAL_GESTOR = _resolver("TEKNISA_PORTAL_GESTOR_URL", "portal_gestor_url", PORTAL_GESTOR_PRODUCAO, _secao)
+URL_HCM = _resolver("TEKNISA_HCM_URL", "hcm_url", HCM_PRODUCAO, _secao)
+
+BASE_PORTAL_GESTOR = f"{URL_PORTAL_GESTOR}/backend/index.php"
+BASE_HCM = f"{URL_HCM}/backend/index.php"
+URL_HCM_LOGIN = f"{URL_HCM}/backend_login/index.php/login"
+
+def url_portal(endpoint):
+    """URL de um endpoint do Portal Gestor (ex.: url_portal("getMesaOperacoes"))."""
+    return f"{BASE_PORTAL_GESTOR}/{endpoint}"
+
+def url_hcm(endpoint):
+    """URL de um endpoint do backend HCM (ex.: url_hcm("getPessoa"))."""
+    return f"{BASE_HCM}/{endpoint}"
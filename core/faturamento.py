@@ -0,0 +1,33 @@
+"""
+Tratamento do relatório de faturamento por unidade (portal de limpeza da SME).
+"""
+import io
+
+import pandas as pd
+
+COLUNAS_NUMERICAS = [
+    'totalContrato', 'descontoContrato', 'liquidoContrato',
+    'totalUnidade', 'glosaImrUnidade', 'glosaRhUnidade',
+    'liquidoUnidade', 'percentualImrUnidade', 'pontuacaoUnidade'
+]
+
+def processar_dataframe(df):
+    if df is None or df.empty: return None
+    df.columns = df.columns.str.strip()
+
+    for col in COLUNAS_NUMERICAS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    if 'glosaImrUnidade' in df.columns and 'glosaRhUnidade' in df.columns:
+        df['Total Glosas'] = df['glosaImrUnidade'] + df['glosaRhUnidade']
+
+    if 'nomeFiscal' in df.columns:
+        df['nomeFiscal'] = df['nomeFiscal'].fillna('').astype(str).str.strip()
+
+    return df
+
+def ler_relatorio(texto):
+    """CSV (';') do relatório do contrato -> DataFrame tratado (None se vier vazio)."""
+    return processar_dataframe(pd.read_csv(io.StringIO(texto), sep=';'))
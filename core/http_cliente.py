@@ -0,0 +1,273 @@
+"""
+Chamadas HTTP de saída instrumentadas (Teknisa Portal Gestor / HCM, portal da SME, BrasilAPI, Lottie).
+
+Todas as páginas e módulos de core/ usam get/post/SessaoInstrumentada daqui no lugar de requests.*:
+cada requisição registra, por (serviço, método, endpoint), latência (histograma + amostras recentes
+para percentis), tamanho da resposta, status, retentativas, timeouts e erros de rede, mesmo quando
+quem chamou engole a exceção. As métricas são do processo (todas as sessões e a thread do coletor
+da Mesa) e aparecem na página MONITOR_HTTP, exportáveis em texto Prometheus ou CSV.
+"""
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+
+from core.endpoints import URL_HCM, URL_PORTAL_GESTOR
+
+TIMEOUT_PADRAO = 30   # s, para chamadas que não informam timeout (antes esperavam para sempre)
+
+# Limites do histograma de latência (s), no formato de buckets cumulativos do Prometheus
+LIMITES_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+AMOSTRAS_RECENTES = 512   # por endpoint, para p50/p95/p99 na tela
+
+# ==============================================================================
+# ROTULAGEM (serviço + endpoint sem ids)
+# ==============================================================================
+_SERVICOS_HOST = (
+    ("limpeza.sme.prefeitura.sp.gov.br", "SME"),
+    ("brasilapi.com.br", "BrasilAPI"),
+    ("lottiefiles.com", "Lottie"),
+    ("lottie.host", "Lottie"),
+)
+_RE_SEGMENTO_ID = re.compile(r"/(\d+|[0-9a-f]{8}-[0-9a-f-]{27})(?=/|$)", re.IGNORECASE)
+
+def rotular(url):
+    """URL -> (serviço, endpoint). Ids numéricos/uuid no caminho viram {id} para não explodir a cardinalidade."""
+    if url.startswith(URL_PORTAL_GESTOR):
+        servico = "Portal Gestor"
+    elif url.startswith(URL_HCM):
+        servico = "HCM"
+    else:
+        host = urlsplit(url).hostname or ""
+        servico = next((nome for sufixo, nome in _SERVICOS_HOST if host.endswith(sufixo)), host or "?")
+    caminho = urlsplit(url).path or "/"
+    return servico, _RE_SEGMENTO_ID.sub("/{id}", caminho)
+
+# ==============================================================================
+# MÉTRICAS (por processo)
+# ==============================================================================
+_metricas_lock = threading.Lock()
+_metricas = {}        # (servico, metodo, endpoint) -> dict abaixo
+_iniciado_em = time.time()
+
+def _novo_registro():
+    return {
+        "chamadas": 0,
+        "status": Counter(),          # código HTTP -> qtd
+        "timeouts": 0,
+        "erros_rede": 0,              # conexão recusada, DNS, SSL, leitura interrompida
+        "retentativas": 0,            # do urllib3 (HTTPAdapter max_retries) + repetidas pela própria página
+        "bytes_total": 0,
+        "bytes_max": 0,
+        "latencia_total": 0.0,
+        "latencia_max": 0.0,
+        "buckets": [0] * (len(LIMITES_LATENCIA) + 1),
+        "recentes": deque(maxlen=AMOSTRAS_RECENTES),
+        "timeout_config": None,       # último timeout informado (s)
+        "ultima_em": None,
+    }
+
+def _registro(chave):
+    reg = _metricas.get(chave)
+    if reg is None:
+        reg = _metricas[chave] = _novo_registro()
+    return reg
+
+def _registrar(chave, latencia, status=None, bytes_resposta=0, timeout=None, retentativas=0, falha=None):
+    with _metricas_lock:
+        reg = _registro(chave)
+        reg["chamadas"] += 1
+        reg["latencia_total"] += latencia
+        reg["latencia_max"] = max(reg["latencia_max"], latencia)
+        reg["buckets"][next((i for i, lim in enumerate(LIMITES_LATENCIA) if latencia <= lim), len(LIMITES_LATENCIA))] += 1
+        reg["recentes"].append(latencia)
+        reg["retentativas"] += retentativas
+        reg["ultima_em"] = time.time()
+        if timeout is not None:
+            reg["timeout_config"] = timeout
+        if status is not None:
+            reg["status"][status] += 1
+        if bytes_resposta:
+            reg["bytes_total"] += bytes_resposta
+            reg["bytes_max"] = max(reg["bytes_max"], bytes_resposta)
+        if falha == "timeout":
+            reg["timeouts"] += 1
+        elif falha == "rede":
+            reg["erros_rede"] += 1
+
+def _somar_bytes(chave, n):
+    if not n:
+        return
+    with _metricas_lock:
+        reg = _registro(chave)
+        reg["bytes_total"] += n
+        reg["bytes_max"] = max(reg["bytes_max"], n)
+
+def _segundos(timeout):
+    """timeout do requests (número ou tupla conexão/leitura) -> total em s."""
+    if isinstance(timeout, tuple):
+        return sum(t for t in timeout if t)
+    return timeout
+
+# ==============================================================================
+# SESSÃO INSTRUMENTADA
+# ==============================================================================
+class SessaoInstrumentada(requests.Session):
+    """requests.Session que mede cada envio (inclusive as feitas por HTTPAdapter com retry)."""
+
+    def request(self, method, url, *args, retentativa=False, **kwargs):
+        """retentativa=True marca a chamada como repetição (ex.: de novo após renovar o token)."""
+        if retentativa:
+            servico, endpoint = rotular(url)
+            with _metricas_lock:
+                _registro((servico, method.upper(), endpoint))["retentativas"] += 1
+        return super().request(method, url, *args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = TIMEOUT_PADRAO
+        servico, endpoint = rotular(request.url)
+        chave = (servico, request.method, endpoint)
+        timeout = _segundos(kwargs["timeout"])
+        inicio = time.perf_counter()
+        try:
+            r = super().send(request, **kwargs)
+        except requests.Timeout:
+            _registrar(chave, time.perf_counter() - inicio, timeout=timeout, falha="timeout")
+            raise
+        except requests.RequestException:
+            _registrar(chave, time.perf_counter() - inicio, timeout=timeout, falha="rede")
+            raise
+
+        latencia = time.perf_counter() - inicio
+        historico = getattr(getattr(r.raw, "retries", None), "history", None) or ()
+        if kwargs.get("stream"):
+            # Corpo ainda não lido: latência até os headers; bytes somados quando a resposta fecha
+            _registrar(chave, latencia, status=r.status_code, timeout=timeout, retentativas=len(historico))
+            fechar = r.close
+            def close():
+                if not getattr(r, "_bytes_contados", False):
+                    r._bytes_contados = True
+                    _somar_bytes(chave, getattr(r.raw, "tell", lambda: 0)())
+                fechar()
+            r.close = close
+        else:
+            _registrar(chave, latencia, status=r.status_code, bytes_resposta=len(r.content),
+                       timeout=timeout, retentativas=len(historico))
+        return r
+
+def request(method, url, **kwargs):
+    """Mesma semântica de requests.request (sessão descartável por chamada), instrumentada."""
+    with SessaoInstrumentada() as s:
+        return s.request(method, url, **kwargs)
+
+def get(url, params=None, **kwargs):
+    return request("GET", url, params=params, **kwargs)
+
+def post(url, data=None, json=None, **kwargs):
+    return request("POST", url, data=data, json=json, **kwargs)
+
+# ==============================================================================
+# LEITURA / EXPORTAÇÃO
+# ==============================================================================
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def _copia():
+    with _metricas_lock:
+        return {k: {**v, "status": Counter(v["status"]), "buckets": list(v["buckets"]), "recentes": list(v["recentes"])}
+                for k, v in _metricas.items()}
+
+def tabela_metricas():
+    """Uma linha por (Serviço, Método, Endpoint), mais lentos primeiro (p95)."""
+    linhas = []
+    for (servico, metodo, endpoint), m in _copia().items():
+        n = m["chamadas"]
+        falhas_http = sum(q for s, q in m["status"].items() if s >= 400)
+        linhas.append({
+            "Serviço": servico, "Método": metodo, "Endpoint": endpoint,
+            "Chamadas": n,
+            "p50_ms": _percentil(m["recentes"], 50) * 1000,
+            "p95_ms": _percentil(m["recentes"], 95) * 1000,
+            "p99_ms": _percentil(m["recentes"], 99) * 1000,
+            "Media_ms": m["latencia_total"] / n * 1000 if n else 0.0,
+            "Max_ms": m["latencia_max"] * 1000,
+            "Timeout_s": m["timeout_config"],
+            "Timeouts": m["timeouts"],
+            "Erros_Rede": m["erros_rede"],
+            "HTTP_4xx_5xx": falhas_http,
+            "Retentativas": m["retentativas"],
+            "Status": ", ".join(f"{s}: {q}" for s, q in sorted(m["status"].items())),
+            "KB_Medio": m["bytes_total"] / n / 1024 if n else 0.0,
+            "KB_Max": m["bytes_max"] / 1024,
+            "Ultima": datetime.fromtimestamp(m["ultima_em"]) if m["ultima_em"] else pd.NaT,
+        })
+    df = pd.DataFrame(linhas)
+    return df.sort_values("p95_ms", ascending=False, ignore_index=True) if not df.empty else df
+
+def histograma(servico, metodo, endpoint):
+    """Buckets não cumulativos do endpoint: DataFrame Faixa/Qtd para o gráfico."""
+    m = _copia().get((servico, metodo, endpoint))
+    if not m:
+        return pd.DataFrame(columns=["Faixa", "Qtd"])
+    rotulos = [f"≤ {lim:g} s" for lim in LIMITES_LATENCIA] + [f"> {LIMITES_LATENCIA[-1]:g} s"]
+    return pd.DataFrame({"Faixa": rotulos, "Qtd": m["buckets"]})
+
+def exportar_csv():
+    return tabela_metricas().to_csv(index=False)
+
+def _rotulos_prom(**rotulos):
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in rotulos.items()) + "}"
+
+def exportar_prometheus():
+    """Formato de exposição de texto do Prometheus (counters + histograma de latência por endpoint)."""
+    dados = _copia()
+    saida = []
+
+    def serie(nome, tipo, ajuda, amostras):
+        saida.append(f"# HELP {nome} {ajuda}")
+        saida.append(f"# TYPE {nome} {tipo}")
+        saida.extend(f"{nome}{_rotulos_prom(**r)} {v}" for r, v in amostras)
+
+    base = {k: {"servico": k[0], "metodo": k[1], "endpoint": k[2]} for k in dados}
+    serie("http_cliente_requisicoes_total", "counter", "Requisições concluídas por status HTTP.",
+          [({**base[k], "status": s}, q) for k, m in dados.items() for s, q in sorted(m["status"].items())])
+    serie("http_cliente_timeouts_total", "counter", "Requisições que estouraram o timeout.",
+          [(base[k], m["timeouts"]) for k, m in dados.items()])
+    serie("http_cliente_erros_rede_total", "counter", "Falhas de conexão/DNS/SSL.",
+          [(base[k], m["erros_rede"]) for k, m in dados.items()])
+    serie("http_cliente_retentativas_total", "counter", "Retentativas (urllib3 e repetições da aplicação).",
+          [(base[k], m["retentativas"]) for k, m in dados.items()])
+    serie("http_cliente_resposta_bytes_total", "counter", "Bytes recebidos no corpo das respostas.",
+          [(base[k], m["bytes_total"]) for k, m in dados.items()])
+
+    saida.append("# HELP http_cliente_latencia_segundos Latência até a resposta (headers, em stream).")
+    saida.append("# TYPE http_cliente_latencia_segundos histogram")
+    for k, m in dados.items():
+        acumulado = 0
+        for lim, q in zip(LIMITES_LATENCIA, m["buckets"]):
+            acumulado += q
+            saida.append(f"http_cliente_latencia_segundos_bucket{_rotulos_prom(**base[k], le=f'{lim:g}')} {acumulado}")
+        saida.append(f"http_cliente_latencia_segundos_bucket{_rotulos_prom(**base[k], le='+Inf')} {m['chamadas']}")
+        saida.append(f"http_cliente_latencia_segundos_sum{_rotulos_prom(**base[k])} {m['latencia_total']:.6f}")
+        saida.append(f"http_cliente_latencia_segundos_count{_rotulos_prom(**base[k])} {m['chamadas']}")
+    return "\n".join(saida) + "\n"
+
+def zerar_metricas():
+    global _iniciado_em
+    with _metricas_lock:
+        _metricas.clear()
+        _iniciado_em = time.time()
+
+def coletando_desde():
+    return _iniciado_em
@@ -0,0 +1,147 @@
+"""
+Leitura incremental de respostas JSON grandes (Teknisa / HCM).
+
+Em vez de r.json() -> lista de dicts -> DataFrame (três cópias do payload em memória), o corpo é
+lido em blocos (requests stream=True + iter_content), a lista de registros é decodificada um objeto
+por vez assim que chega, e só os campos pedidos vão para buffers colunares. O pico de memória fica
+em ~um bloco + as colunas úteis, e o processamento começa antes do download terminar.
+"""
+import codecs
+import hashlib
+import json
+
+import pandas as pd
+
+TAMANHO_BLOCO = 1 << 16
+_ESPACOS = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+class _Fluxo:
+    """Buffer de texto sobre um iterador de blocos de bytes; descarta o que já foi consumido."""
+
+    def __init__(self, blocos):
+        self.blocos = iter(blocos)
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.sha1 = hashlib.sha1()
+        self.buf = ""
+        self.pos = 0
+        self.fim = False
+        self.bytes_lidos = 0
+
+    def ler(self):
+        """Anexa o próximo bloco ao buffer. False quando o stream acabou."""
+        if self.fim:
+            return False
+        for bloco in self.blocos:
+            if bloco:
+                self.sha1.update(bloco)
+                self.bytes_lidos += len(bloco)
+                self.buf = self.buf[self.pos:] + self.utf8.decode(bloco)
+                self.pos = 0
+                return True
+        self.buf = self.buf[self.pos:] + self.utf8.decode(b"", final=True)
+        self.pos = 0
+        self.fim = True
+        return False
+
+    def proximo(self):
+        """Próximo caractere significativo (sem consumir); '' no fim do stream."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _ESPACOS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.ler():
+                return ""
+
+    def esperar(self, c):
+        if self.proximo() != c:
+            raise ValueError(f"JSON inesperado na posição {self.bytes_lidos}: esperado {c!r}")
+        self.pos += 1
+
+    def valor(self):
+        """Decodifica um valor JSON completo, lendo mais blocos enquanto ele estiver cortado."""
+        self.proximo()
+        while True:
+            try:
+                obj, fim = _decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self.ler():
+                    raise
+                continue
+            # Número/literal encostado no fim do buffer pode continuar no próximo bloco
+            if fim == len(self.buf) and not isinstance(obj, (dict, list, str)) and self.ler():
+                continue
+            self.pos = fim
+            return obj
+
+def _ir_para_lista(fluxo, caminho):
+    """
+    Desce pelas chaves de `caminho` pulando os valores irmãos; True se parou no '[' da lista.
+    Corpo que não é um objeto JSON (página HTML de manutenção/sessão expirada) levanta ValueError, como r.json().
+    """
+    if fluxo.proximo() != "{":
+        inicio = fluxo.buf[fluxo.pos:fluxo.pos + 40]
+        raise ValueError(f"Resposta não é um objeto JSON: {inicio!r}")
+    for chave in caminho:
+        if fluxo.proximo() != "{":
+            return False
+        fluxo.pos += 1
+        while True:
+            c = fluxo.proximo()
+            if c in ("}", ""):
+                return False
+            if c == ",":
+                fluxo.pos += 1
+                continue
+            k = fluxo.valor()
+            fluxo.esperar(":")
+            if k == chave:
+                break
+            fluxo.valor()
+    if fluxo.proximo() != "[":
+        return False
+    fluxo.pos += 1
+    return True
+
+def ler_lista_json(blocos, caminho, campos):
+    """
+    Lê a lista em `caminho` (ex.: ("dataset", "data")) de um stream de bytes JSON.
+    Retorna (DataFrame só com `campos` que apareceram em algum registro, sha1 do corpo inteiro).
+    Caminho ausente -> DataFrame vazio; corpo que não é objeto JSON -> ValueError.
+    Itens da lista que não são objetos (null, números) são ignorados.
+    """
+    fluxo = _Fluxo(blocos)
+    colunas = {c: [] for c in campos}
+    vistos = set()
+
+    if _ir_para_lista(fluxo, caminho):
+        while True:
+            c = fluxo.proximo()
+            if c == "]":
+                fluxo.pos += 1
+                break
+            if c == ",":
+                fluxo.pos += 1
+                continue
+            if c == "":
+                raise ValueError("JSON truncado: lista sem ']'")
+            registro = fluxo.valor()
+            if not isinstance(registro, dict):
+                continue
+            vistos.update(registro)
+            get = registro.get
+            for campo, buffer in colunas.items():
+                buffer.append(get(campo))
+
+    # Consome o resto só para a assinatura cobrir o corpo inteiro
+    fluxo.pos = len(fluxo.buf)
+    while fluxo.ler():
+        fluxo.pos = len(fluxo.buf)
+
+    df = pd.DataFrame({c: v for c, v in colunas.items() if c in vistos})
+    return df, fluxo.sha1.hexdigest()
+
+def ler_resposta_json(resposta, caminho, campos, tamanho_bloco=TAMANHO_BLOCO):
+    """Atalho para uma resposta requests aberta com stream=True."""
+    return ler_lista_json(resposta.iter_content(chunk_size=tamanho_bloco), caminho, campos)
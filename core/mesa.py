@@ -0,0 +1,345 @@
+"""
+Regras da Mesa Operacional sobre o payload do getMesaOperacoes.
+"""
+import urllib.parse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# STATUS INDIVIDUAL
+# ==============================================================================
+STATUS_PRESENTE = '🟢 Presente'
+STATUS_FALTA = '🔴 Falta'
+STATUS_A_INICIAR = '⏳ A Iniciar'
+STATUS_SEM_ESCALA = '🟡 S/ Escala'
+
+_RE_HORA = r'^\s*(\d{1,2})\s*:\s*(\d{1,2})\s*$'
+
+def _explodir_intervalos(serie, n_linhas):
+    """
+    Achata uma coluna de listas [["HH:MM", "HH:MM"], ...] (escala ou batidas) em arrays por linha:
+      qtd        -> nº de itens da lista (0 se vazia/ausente)
+      inicio_min -> minuto do dia do 1º horário (-1 se ausente ou inválido)
+      texto      -> "ini-fim | ini-fim" para exibição ("-" se vazia/ausente)
+    """
+    if serie is None:
+        return {'qtd': np.zeros(n_linhas, dtype=np.int32),
+                'inicio_min': np.full(n_linhas, -1, dtype=np.int32),
+                'texto': np.full(n_linhas, "-", dtype=object)}
+
+    valores = serie.to_numpy(dtype=object)
+    qtd = np.fromiter((len(v) if isinstance(v, list) else 0 for v in valores), dtype=np.int32, count=n_linhas)
+    com_itens = np.flatnonzero(qtd)
+
+    # Uma passada sobre todos os itens: linha de origem + item
+    linhas = np.repeat(com_itens, qtd[com_itens])
+    itens = [x for v in valores[com_itens] for x in v]
+
+    # Início = 1º campo do 1º item de cada linha, convertido para minuto do dia
+    primeiros = [v[0][0] if isinstance(v[0], (list, tuple)) and len(v[0]) > 0 else None for v in valores[com_itens]]
+    inicio_min = np.full(n_linhas, -1, dtype=np.int32)
+    inicio_min[com_itens] = _minutos_do_dia(primeiros)
+    # Texto: só pares [ini, fim]; lista com itens mas sem pares válidos vira ""
+    texto = np.where(qtd > 0, "", "-").astype(object)
+    eh_par = np.fromiter((isinstance(x, (list, tuple)) and len(x) == 2 for x in itens), dtype=bool, count=len(itens))
+    if eh_par.any():
+        linhas_par = linhas[eh_par]
+        pares = np.array([f"{x[0]}-{x[1]}" for x, ok in zip(itens, eh_par) if ok], dtype=object)
+        # Concatena os pares de cada linha: separador antes de todo par que não é o 1º da linha
+        primeiro = np.r_[True, linhas_par[1:] != linhas_par[:-1]]
+        pares = np.where(primeiro, pares, " | " + pares)
+        inicios = np.flatnonzero(primeiro)
+        texto[linhas_par[inicios]] = np.add.reduceat(pares, inicios)
+    return {'qtd': qtd, 'inicio_min': inicio_min, 'texto': texto}
+
+def _minutos_do_dia(horas):
+    """Lista de "HH:MM" -> array de minutos do dia (-1 se ilegível). Formato fixo lido direto dos códigos dos caracteres."""
+    n = len(horas)
+    if n == 0:
+        return np.empty(0, dtype=np.int32)
+    textos = np.array([h if isinstance(h, str) else "" for h in horas], dtype="U5")
+    fixo = np.fromiter((isinstance(h, str) and len(h) == 5 for h in horas), dtype=bool, count=n)
+    cod = textos.view(np.uint32).reshape(n, 5).astype(np.int32) - ord("0")
+    digitos = cod[:, [0, 1, 3, 4]]
+    fixo &= (cod[:, 2] == ord(":") - ord("0")) & ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+    h = digitos[:, 0] * 10 + digitos[:, 1]
+    m = digitos[:, 2] * 10 + digitos[:, 3]
+    minutos = np.where(fixo & (h < 24) & (m < 60), h * 60 + m, -1).astype(np.int32)
+
+    # Formatos fora do padrão ("8:00", " 08:00 "): regex só nessas linhas
+    outros = np.flatnonzero(~fixo & np.fromiter((isinstance(x, str) for x in horas), dtype=bool, count=n))
+    if len(outros):
+        hm = pd.Series([horas[i] for i in outros], dtype=object).str.extract(_RE_HORA).apply(pd.to_numeric, errors='coerce')
+        ok = ((hm[0] < 24) & (hm[1] < 60)).to_numpy()
+        minutos[outros] = np.where(ok, hm[0].fillna(0) * 60 + hm[1].fillna(0), -1)
+    return minutos
+
+def calcular_status(qtd_batidas, qtd_escala, inicio_min, data_analise, hoje, agora_min):
+    """
+    Status individual a partir dos arrays achatados:
+      batida registrada                                   -> Presente
+      escala em dia passado                               -> Falta
+      escala hoje, já passou do início (ou início ilegível) -> Falta
+      escala hoje antes do início / dia futuro             -> A Iniciar
+      sem escala                                          -> S/ Escala
+    """
+    tem_escala = qtd_escala > 0
+    if data_analise < hoje:
+        atrasado = np.ones(len(qtd_escala), dtype=bool)
+    elif data_analise == hoje:
+        atrasado = (inicio_min < 0) | (agora_min >= inicio_min)
+    else:
+        atrasado = np.zeros(len(qtd_escala), dtype=bool)
+
+    return np.select(
+        [qtd_batidas > 0, tem_escala & atrasado, tem_escala],
+        [STATUS_PRESENTE, STATUS_FALTA, STATUS_A_INICIAR],
+        default=STATUS_SEM_ESCALA
+    ).astype(object)
+
+def classificar_registros(df, data_analise, agora, col_escala='horas_escala', col_batidas='horas_trabalhadas'):
+    """Achata escala/batidas de df e calcula o status de cada linha (mesma regra para a tela e para a série)."""
+    n = len(df)
+    escala = _explodir_intervalos(df[col_escala] if col_escala in df.columns else None, n)
+    batidas = _explodir_intervalos(df[col_batidas] if col_batidas in df.columns else None, n)
+    status = calcular_status(
+        batidas['qtd'], escala['qtd'], escala['inicio_min'],
+        data_analise, agora.date(), agora.hour * 60 + agora.minute
+    )
+    return {'status': status, 'escala': escala, 'batidas': batidas}
+
+# Códigos gravados na série (MesaSerieStatus."Status")
+CODIGO_STATUS = {STATUS_PRESENTE: 1, STATUS_FALTA: 2, STATUS_A_INICIAR: 3, STATUS_SEM_ESCALA: 4}
+
+def resumir_status_por_unidade(df_api, data_analise, agora):
+    """Payload cru da API -> contagem por (UnidadeID, código de status), no formato da tabela MesaSerieStatus."""
+    if df_api is None or df_api.empty:
+        return pd.DataFrame(columns=['UnidadeID', 'Status', 'Qtd'])
+    if 'NMSITUFUNCH' in df_api.columns:
+        df_api = df_api[df_api['NMSITUFUNCH'] == 'Atividade Normal']
+    uids = pd.to_numeric(df_api['NRESTRUTGEREN'], errors='coerce').fillna(0).astype(int).to_numpy()
+    codigos = pd.Series(classificar_registros(df_api, data_analise, agora)['status']).map(CODIGO_STATUS).to_numpy()
+    return (pd.DataFrame({'UnidadeID': uids, 'Status': codigos})
+            .groupby(['UnidadeID', 'Status']).size().reset_index(name='Qtd'))
+
+def processar_dados_unificados(df_api, df_unidades, map_telefones, data_analise, agora=None):
+    if df_api.empty: return df_api
+
+    # Cópia sempre: df_api é o snapshot compartilhado entre sessões
+    if 'NMSITUFUNCH' in df_api.columns:
+        df_api = df_api[df_api['NMSITUFUNCH'] == 'Atividade Normal'].copy()
+    else:
+        df_api = df_api.copy()
+
+    if df_api.empty: return df_api
+
+    # Ajuste IDs e Tipos
+    df_api['UnidadeID'] = pd.to_numeric(df_api['NRESTRUTGEREN'], errors='coerce').fillna(0).astype(int)
+
+    # Merge com Unidades
+    df_merged = pd.merge(df_api, df_unidades, on="UnidadeID", how="left")
+
+    # Fallback de nome de escola se a API não trouxe ou para garantir o nome interno
+    if 'NomeUnidade' in df_merged.columns:
+        df_merged['Escola_Interna'] = df_merged['NomeUnidade']
+
+    df_merged['Supervisor'] = df_merged['Supervisor'].fillna("Não Identificado")
+    df_merged['Supervisor_Key'] = df_merged['Supervisor'].str.strip().str.upper()
+    df_merged['Celular'] = df_merged['Supervisor_Key'].map(map_telefones)
+
+    df_merged = df_merged.rename(columns={
+        'NMESTRUTGEREN': 'Escola_API',
+        'NMVINCULOM': 'Funcionario',
+        'NRVINCULOM': 'ID',
+        'NMOCUPACAOH': 'Cargo',
+        'horas_trabalhadas': 'Batidas',
+        'horas_escala': 'Escala',
+        'OBSERVACAO': 'Obs'
+    })
+
+    df_merged['ID'] = pd.to_numeric(df_merged['ID'], errors='coerce').fillna(0).astype(int)
+    df_merged['Escola'] = df_merged['Escola_API'] # Usa o nome da API por padrão na visualização
+
+    # Horários e Status (vetorizado: as listas aninhadas são achatadas uma única vez)
+    classif = classificar_registros(df_merged, data_analise, agora or datetime.now(), col_escala='Escala', col_batidas='Batidas')
+    df_merged['Status_Individual'] = classif['status']
+    df_merged['Escala_Formatada'] = classif['escala']['texto']
+    df_merged['Ponto_Real'] = classif['batidas']['texto']
+    df_merged['Inicio_Escala_Min'] = classif['escala']['inicio_min']
+    df_merged['Qtd_Batidas'] = classif['batidas']['qtd']
+
+    return df_merged
+
+# Diagnóstico por escola (código inteiro; texto só na exibição)
+DIAG_PROBLEMA, DIAG_AGUARDANDO, DIAG_VERIFICAR, DIAG_COMPLETA, DIAG_PARCIAL, DIAG_PERCENTUAL = range(6)
+ROTULO_DIAGNOSTICO = {
+    DIAG_PROBLEMA: "⚠️ POSSÍVEL PROBLEMA SMARTPHONE",
+    DIAG_AGUARDANDO: "🕒 AGUARDANDO INÍCIO",
+    DIAG_VERIFICAR: "⚠️ VERIFICAR",
+    DIAG_COMPLETA: "🌟 ESCOLA COMPLETA",
+    DIAG_PARCIAL: "✅ PARCIAL (Aguardando Tarde/Noite)",
+}
+# Ordem na tabela: problema primeiro, completas por último
+ORDEM_DIAGNOSTICO = np.array([0, 2, 1, 3, 1, 1])
+ORDEM_STATUS = [STATUS_PRESENTE, STATUS_FALTA, STATUS_A_INICIAR, STATUS_SEM_ESCALA]
+
+def resumir_escolas(df):
+    """
+    Uma linha por (Escola, Supervisor): Efetivo, Presentes, Faltas, A_Entrar (contagem do status categórico),
+    Diag_Codigo (np.select), sort_group e perc_presenca.
+    """
+    status = pd.Categorical(df['Status_Individual'], categories=ORDEM_STATUS)
+    cont = (pd.DataFrame({'Escola': df['Escola'].to_numpy(), 'Supervisor': df['Supervisor'].to_numpy(), 'Status': status})
+            .groupby(['Escola', 'Supervisor', 'Status'], observed=False, sort=True).size()
+            .unstack('Status'))
+    resumo = pd.DataFrame({
+        'Efetivo': cont.sum(axis=1),
+        'Presentes': cont[STATUS_PRESENTE],
+        'Faltas': cont[STATUS_FALTA],
+        'A_Entrar': cont[STATUS_A_INICIAR],
+    })
+    resumo = resumo[resumo['Efetivo'] > 0].reset_index()
+
+    p, f, a = (resumo[c].to_numpy() for c in ('Presentes', 'Faltas', 'A_Entrar'))
+    resumo['Diag_Codigo'] = np.select(
+        [(p == 0) & (f > 0), (p == 0) & (a > 0), p == 0, (f == 0) & (a == 0), f == 0],
+        [DIAG_PROBLEMA, DIAG_AGUARDANDO, DIAG_VERIFICAR, DIAG_COMPLETA, DIAG_PARCIAL],
+        default=DIAG_PERCENTUAL
+    )
+    resumo['sort_group'] = ORDEM_DIAGNOSTICO[resumo['Diag_Codigo'].to_numpy()]
+    resumo['perc_presenca'] = p / np.maximum(resumo['Efetivo'].to_numpy(), 1)
+    return resumo
+
+def rotular_diagnostico(resumo):
+    rotulos = resumo['Diag_Codigo'].map(ROTULO_DIAGNOSTICO)
+    pct = resumo['Diag_Codigo'] == DIAG_PERCENTUAL
+    if pct.any():
+        perc = resumo.loc[pct, 'Presentes'] / (resumo.loc[pct, 'Presentes'] + resumo.loc[pct, 'Faltas']) * 100
+        rotulos[pct] = perc.map("{:.0f}% Presentes (Turno Atual)".format)
+    return rotulos
+
+# FUNCIONALIDADE WHATSAPP (HELPER)
+def gerar_link_whatsapp(telefone, mensagem):
+    texto_encoded = urllib.parse.quote_plus(mensagem)
+    fone_limpo = "".join(filter(str.isdigit, str(telefone))) if telefone else ""
+    return f"https://api.whatsapp.com/send?phone=55{fone_limpo}&text={texto_encoded}"
+
+def montar_alertas(df_completo, hora_ref):
+    """
+    Payload de alerta por supervisor com falta, numa passada só:
+    groupby (Supervisor, Escola) -> faltas, presentes e nomes faltantes; escola sem nenhuma presença
+    = possível problema no smartphone (vem primeiro na mensagem).
+    """
+    if df_completo is None or df_completo.empty:
+        return []
+
+    falta = (df_completo['Status_Individual'] == STATUS_FALTA).to_numpy()
+    presente = (df_completo['Status_Individual'] == STATUS_PRESENTE).to_numpy()
+    chaves = ['Supervisor', 'Escola']
+
+    por_escola = (df_completo[chaves].assign(Faltas=falta, Presentes=presente)
+                  .groupby(chaves, sort=True).sum())
+    por_escola = por_escola[por_escola['Faltas'] > 0]
+    if por_escola.empty:
+        return []
+    nomes = df_completo.loc[falta].groupby(chaves, sort=False)['Funcionario'].agg(", ".join)
+    por_escola = por_escola.join(nomes.rename('Nomes')).reset_index()
+    por_escola['Problema_App'] = por_escola['Presentes'] == 0
+    # Dentro do supervisor: escolas com problema primeiro, mantendo a ordem alfabética
+    por_escola = por_escola.sort_values(['Supervisor', 'Problema_App'], ascending=[True, False], kind='stable')
+
+    celulares = {}
+    if 'Celular' in df_completo.columns:
+        celulares = df_completo.loc[falta].groupby('Supervisor', sort=False)['Celular'].first().to_dict()
+
+    alertas = []
+    for supervisor, grupo in por_escola.groupby('Supervisor', sort=True):
+        total_faltas = int(grupo['Faltas'].sum())
+        total_escolas_problema = int(grupo['Problema_App'].sum())
+
+        msg_lines = [f"Ola *{supervisor}*, resumo de ausencias ({hora_ref.strftime('%H:%M')}):"]
+        msg_lines.append("")
+        msg_lines.append(f"\U0001F4CA *Total Faltas:* {total_faltas}")
+        if total_escolas_problema > 0:
+            msg_lines.append(f"\u26A0\uFE0F *Escolas c/ Problema App:* {total_escolas_problema}")
+        msg_lines.append("")
+        for escola, nomes_str, problema in grupo[['Escola', 'Nomes', 'Problema_App']].itertuples(index=False):
+            if problema:
+                cabecalho = f"\U0001F6A8 *{escola}* (\u26A0\uFE0F POSSIVEL PROBLEMA SMARTPHONE)"
+            else:
+                cabecalho = f"\U0001F3EB *{escola}*"
+            msg_lines.append(f"{cabecalho}")
+            msg_lines.append(f"\U0001F6AB {nomes_str}")
+            msg_lines.append("")
+        msg_final = "\n".join(msg_lines).strip()
+
+        telefone = celulares.get(supervisor)
+        tem_telefone = pd.notna(telefone) and str(telefone).strip() != "" and str(telefone).strip().lower() != "none"
+        alertas.append({
+            'supervisor': supervisor,
+            'total_faltas': total_faltas,
+            'escolas_problema': total_escolas_problema,
+            'mensagem': msg_final,
+            'link': gerar_link_whatsapp(telefone, msg_final) if tem_telefone else None,
+        })
+    return alertas
+
+# ==============================================================================
+# DIAGNÓSTICO GLOBAL (MESA X BANCO)
+# ==============================================================================
+# Classes de divergência (código inteiro; rótulo só na exibição)
+DIV_FORA_MESA = 1      # ativo no banco, ausente da Mesa
+DIV_SEM_CADASTRO = 2   # na Mesa, sem cadastro ativo no banco
+DIV_ESCOLA = 3         # nos dois, mas em UnidadeID diferente
+ROTULO_DIVERGENCIA = {
+    DIV_FORA_MESA: "⚠️ No Banco, Fora da Mesa",
+    DIV_SEM_CADASTRO: "🚫 Na Mesa, Sem Cadastro Ativo",
+    DIV_ESCOLA: "🔀 Escola Divergente",
+}
+
+def calcular_divergencias(df_mesa, df_banco):
+    """
+    Mesa x Banco numa única junção externa por matrícula (merge indicator=True).
+    Uma linha por divergência: Classe, Escola, Supervisor, Matricula, Funcionario, Cargo,
+    UnidadeID_Banco, UnidadeID_Mesa, Escola_Mesa, Ausente_Escola_Banco. Na classe 3 Escola/Supervisor
+    são os do banco.
+
+    A classe 3 é por (matrícula, unidade da Mesa): quem está escalado na escola do banco e também
+    em outra aparece só na outra. Ausente_Escola_Banco marca quem não está na Mesa na própria escola
+    do banco (classe 1, ou classe 3 sem nenhuma escala na lotação); a mesma matrícula pode repetir
+    em várias linhas de classe 3, então o lado "fora da Mesa" de uma escola deduplica por matrícula.
+    """
+    mesa = (df_mesa.loc[df_mesa['ID'] > 0, ['ID', 'UnidadeID', 'Escola', 'Supervisor', 'Funcionario', 'Cargo']]
+            .drop_duplicates(['ID', 'UnidadeID']))
+    banco = (df_banco.loc[df_banco['ID'] > 0, ['ID', 'UnidadeID', 'Escola_DB', 'Supervisor_DB', 'Funcionario', 'Cargo']]
+             .drop_duplicates('ID'))
+
+    j = banco.merge(mesa, on='ID', how='outer', suffixes=('_Banco', '_Mesa'), indicator=True)
+    lado = j['_merge'].to_numpy()
+    nos_dois = lado == 'both'
+    mesma_escola = nos_dois & (j['UnidadeID_Banco'] == j['UnidadeID_Mesa']).to_numpy()
+    # Matrícula escalada na própria escola do banco em alguma linha da Mesa
+    na_lotacao = pd.Series(mesma_escola).groupby(j['ID'].to_numpy()).transform('any').to_numpy()
+
+    classe = np.select(
+        [lado == 'left_only', lado == 'right_only', nos_dois & ~mesma_escola],
+        [DIV_FORA_MESA, DIV_SEM_CADASTRO, DIV_ESCOLA], default=0
+    )
+    sel = classe > 0
+    j, classe, na_lotacao = j[sel], classe[sel], na_lotacao[sel]
+    da_mesa = classe == DIV_SEM_CADASTRO
+
+    return pd.DataFrame({
+        'Classe': classe,
+        'Escola': np.where(da_mesa, j['Escola'], j['Escola_DB']),
+        'Supervisor': np.where(da_mesa, j['Supervisor'], j['Supervisor_DB']),
+        'Matricula': j['ID'].astype(int).to_numpy(),
+        'Funcionario': np.where(da_mesa, j['Funcionario_Mesa'], j['Funcionario_Banco']),
+        'Cargo': np.where(da_mesa, j['Cargo_Mesa'], j['Cargo_Banco']),
+        'UnidadeID_Banco': j['UnidadeID_Banco'].astype('Int64').to_numpy(),
+        'UnidadeID_Mesa': j['UnidadeID_Mesa'].astype('Int64').to_numpy(),
+        'Escola_Mesa': j['Escola'].to_numpy(),
+        'Ausente_Escola_Banco': ~da_mesa & ~na_lotacao,
+    })
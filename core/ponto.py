@@ -0,0 +1,104 @@
+"""
+Criticidade de ponto (DIAGNOSTICO_PONTO): ocorrências HCM -> base mestra por colaborador.
+"""
+import pandas as pd
+
+# Pesos da criticidade (sem teto)
+PESO_FALTA = 1
+PESO_HORA_ATRASO = 0.125
+
+def clean_id(val):
+    try:
+        if pd.isna(val): return "0"
+        return str(int(float(val)))
+    except:
+        return str(val).strip()
+
+def decimal_para_hora(val):
+    try:
+        if pd.isna(val) or val == 0: return "00:00"
+        horas = int(val)
+        minutos = int((val - horas) * 60)
+        return f"{horas:02d}:{minutos:02d}"
+    except: return "00:00"
+
+def feriados_fixos(ano):
+    """Feriados nacionais de data fixa ("YYYY-MM-DD" -> nome); fallback quando a BrasilAPI não responde."""
+    return {
+        f"{ano}-01-01": "Confraternização Universal",
+        f"{ano}-04-21": "Tiradentes",
+        f"{ano}-05-01": "Dia do Trabalho",
+        f"{ano}-09-07": "Independência do Brasil",
+        f"{ano}-10-12": "Nossa Senhora Aparecida",
+        f"{ano}-11-02": "Finados",
+        f"{ano}-11-15": "Proclamação da República",
+        f"{ano}-11-20": "Dia da Consciência Negra",
+        f"{ano}-12-25": "Natal"
+    }
+
+def montar_base_mestra(df_func, df_oco, hoje, obter_feriados):
+    """
+    Uma linha por colaborador de df_func (NRVINCULOM já limpo, NMVINCULOM, Supervisor) com
+    Qtd_Faltas (dias úteis, fora feriados, sem repetir data), Total_Horas_Atraso e Datas.
+    hoje: "YYYY-MM-DD" (ocorrências do dia corrente ficam de fora);
+    obter_feriados(anos) -> coleção de datas "YYYY-MM-DD".
+    """
+    df_mestra = df_func[['NRVINCULOM', 'NMVINCULOM', 'Supervisor']].rename(columns={'NMVINCULOM':'Funcionario'}).copy()
+
+    if not df_oco.empty:
+        df_oco = df_oco.copy()
+        df_oco['DIFF_HOURS'] = pd.to_numeric(df_oco['DIFF_HOURS'], errors='coerce').fillna(0)
+        df_oco['NRVINCULOM'] = df_oco['NRVINCULOM'].apply(clean_id)
+        df_oco['DATA_INICIO_FILTER'] = df_oco['DATA_INICIO_FILTER'].astype(str)
+        df_oco['TIPO_OCORRENCIA'] = df_oco['TIPO_OCORRENCIA'].str.strip().str.upper()
+
+        # Filtros de Data
+        df_oco = df_oco[df_oco['DATA_INICIO_FILTER'] != hoje].copy()
+        df_oco['DT_OBJ'] = pd.to_datetime(df_oco['DATA_INICIO_FILTER'], errors='coerce')
+
+        anos = df_oco['DT_OBJ'].dt.year.unique().tolist()
+        feriados = obter_feriados(anos)
+
+        df_oco['DIA_SEMANA'] = df_oco['DT_OBJ'].dt.dayofweek
+        df_oco['IS_FERIADO'] = df_oco['DATA_INICIO_FILTER'].map(lambda x: x in feriados)
+
+        # Ocorrências Válidas
+        df_faltas = df_oco[
+            (df_oco['TIPO_OCORRENCIA'] == 'FALTA') &
+            (df_oco['DIA_SEMANA'] < 5) & (df_oco['IS_FERIADO'] == False)
+        ].copy()
+
+        df_atrasos = df_oco[df_oco['TIPO_OCORRENCIA'] == 'ATRASO'].copy()
+
+        # Agregações
+        s_faltas = df_faltas.drop_duplicates(subset=['NRVINCULOM', 'DATA_INICIO']).groupby('NRVINCULOM').size().rename('Qtd_Faltas')
+        s_atrasos = df_atrasos.groupby('NRVINCULOM')['DIFF_HOURS'].sum().rename('Total_Horas_Atraso')
+        s_datas = df_oco.groupby('NRVINCULOM')['DATA_INICIO'].unique().apply(lambda x: ", ".join(sorted(x))).rename('Datas')
+
+        # Join na Mestra
+        df_mestra = df_mestra.set_index('NRVINCULOM')
+        df_mestra = df_mestra.join(s_faltas).join(s_atrasos).join(s_datas).fillna(0).reset_index()
+    else:
+        df_mestra['Qtd_Faltas'] = 0
+        df_mestra['Total_Horas_Atraso'] = 0.0
+        df_mestra['Datas'] = ""
+    return df_mestra
+
+def calcular_criticidade(df_mestra, validacoes, usuarios, snapshots):
+    """ScoreNum/Criticidade + colunas de validação (dicts por matrícula limpa vindos do banco)."""
+    df_mestra['ScoreNum'] = (df_mestra['Qtd_Faltas'] * PESO_FALTA) + (df_mestra['Total_Horas_Atraso'] * PESO_HORA_ATRASO)
+
+    # Formatação Visual do Score
+    def fmt_score(val):
+        if val == 0: return "OK"
+        return f"{int(val)}"
+
+    df_mestra['Criticidade Ponto'] = df_mestra['ScoreNum'].apply(fmt_score)
+
+    # Colunas de Banco
+    df_mestra['Procedente'] = df_mestra['NRVINCULOM'].map(validacoes).fillna(False)
+    df_mestra['ValidadoPor'] = df_mestra['NRVINCULOM'].map(usuarios).fillna("-")
+    df_mestra['UltimaValidacao'] = df_mestra['NRVINCULOM'].map(snapshots).fillna("-")
+
+    df_mestra['Tempo_Atraso_Fmt'] = df_mestra['Total_Horas_Atraso'].apply(decimal_para_hora)
+    return df_mestra
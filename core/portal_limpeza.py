@@ -0,0 +1,128 @@
+"""
+Cliente do portal de limpeza da SME (limpeza.sme.prefeitura.sp.gov.br) sem Streamlit.
+
+Usado por SME.py (ocorrências) e FATURAMENTO_CONAE.py (relatório do contrato). URLs e credenciais
+entram explícitas; o token fica com quem chama (st.session_state na página, variável num job).
+"""
+import json
+import time
+
+import requests
+
+from core import http_cliente
+
+ORIGEM = "https://limpeza.sme.prefeitura.sp.gov.br"
+
+# Headers de navegador (o portal bloqueia clientes sem eles)
+HEADERS_CHROME = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Origin": ORIGEM,
+    "sec-ch-ua": '"Google Chrome";v="143", "Chromium";v="143", "Not A(Brand";v="24"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin"
+}
+
+# ==============================================================================
+# AUTENTICAÇÃO
+# ==============================================================================
+def extrair_token(data):
+    """O token vem em data.token, token ou data (string), conforme a versão da API."""
+    if "data" in data and isinstance(data["data"], dict): return data["data"].get("token")
+    if "token" in data: return data["token"]
+    if "data" in data and isinstance(data["data"], str): return data["data"]
+    return None
+
+def autenticar(url_auth, email, senha, timeout=15):
+    """POST /auth. Retorna o token ou None (credencial recusada / resposta sem token)."""
+    h = HEADERS_CHROME.copy()
+    h["Content-Type"] = "application/json;charset=UTF-8"
+    h["Referer"] = f"{ORIGEM}/login"
+    r = http_cliente.post(url_auth, json={"email": email, "senha": senha}, headers=h, timeout=timeout)
+    if r.status_code != 200:
+        return None
+    return extrair_token(r.json())
+
+def headers_autorizados(token, referer):
+    h = HEADERS_CHROME.copy()
+    h["Authorization"] = f"Bearer {token}"
+    h["Referer"] = f"{ORIGEM}/{referer}"
+    return h
+
+# ==============================================================================
+# OCORRÊNCIAS
+# ==============================================================================
+def _filtro_periodo(data_inicio, data_fim):
+    return json.dumps({
+        "dataInicial": data_inicio.strftime("%Y-%m-%dT00:00:00.000Z"),
+        "dataFinal": data_fim.strftime("%Y-%m-%dT23:59:59.999Z"),
+        "flagSomenteAtivos": "true",
+    })
+
+def buscar_tabela_ocorrencias(url_tabela, headers, data_inicio, data_fim, tamanho_pagina=100):
+    """
+    Todas as páginas da /ocorrencia/tabela no período (lista de registros JSON).
+    Página com erro encerra a paginação e devolve o que já veio, como a tela sempre fez.
+    """
+    filtros = _filtro_periodo(data_inicio, data_fim)
+    registros = []
+    inicio, total = 0, 1
+    while inicio < total:
+        params = {"draw": "1", "filters": filtros, "length": tamanho_pagina, "start": inicio}
+        try:
+            r = http_cliente.get(url_tabela, params=params, headers=headers, timeout=20)
+            if r.status_code != 200:
+                break
+            body = r.json()
+            corpo = body.get("datatables", {}) if "datatables" in body else body
+            pagina = corpo.get("data", [])
+            if inicio == 0:
+                total = int(corpo.get("recordsTotal", 0))
+        except (requests.RequestException, ValueError, TypeError, AttributeError) as e:
+            # Corpo não-JSON (página de manutenção/sessão expirada) ou recordsTotal nulo
+            print(f"Erro paginando ocorrências SME (start={inicio}): {e}")
+            break
+        if total == 0: return []
+        if not pagina:
+            break
+        registros.extend(pagina)
+        inicio += tamanho_pagina
+        time.sleep(0.05)
+    return registros
+
+def buscar_export_ocorrencias(url_export, headers, data_inicio, data_fim):
+    """Texto CSV (';') da /ocorrencia/exportar no período; None se o portal não devolveu 200."""
+    r = http_cliente.get(url_export, params={"filtros": _filtro_periodo(data_inicio, data_fim)}, headers=headers, timeout=30)
+    if r.status_code != 200:
+        return None
+    try:
+        js = r.json()
+        if "data" in js: return js["data"]
+    except ValueError:
+        pass
+    return r.text
+
+# ==============================================================================
+# RELATÓRIO DO CONTRATO (FATURAMENTO)
+# ==============================================================================
+def buscar_relatorio_contrato(url, token, ano, mes, id_contrato, id_prestador, retentativa=False):
+    """
+    GET do relatório de faturamento por unidade; devolve a Response (quem chama trata 401/403 e o corpo).
+    retentativa=True na repetição após renovar o token (conta como retentativa nas métricas HTTP).
+    """
+    params = {"ano": ano, "mes": mes, "idContrato": id_contrato, "idPrestadorServico": id_prestador}
+    return http_cliente.get(url, params=params, headers=headers_autorizados(token, "dashboard"), timeout=25,
+                            retentativa=retentativa)
+
+def texto_relatorio(response):
+    """Corpo do relatório: CSV dentro de {"data": ...} ou o próprio texto."""
+    try:
+        js = response.json()
+        if "data" in js and js["data"]: return js["data"]
+    except ValueError:
+        pass
+    return response.text
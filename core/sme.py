@@ -0,0 +1,106 @@
+"""
+Tratamento das ocorrências do portal de limpeza da SME (tabela JSON + exportação CSV).
+"""
+import io
+
+import pandas as pd
+
+RENOMEAR_TABELA = {
+    'id': 'id',
+    'data': 'dataHoraOcorrencia',
+    'unidadeEscolar.descricao': 'ueNome',
+    'tipo': 'Categoria',
+    'observacaoFinal': 'observacao_json',
+    'ocorrenciaRespondida': 'ocorrenciaRespondida',
+    'flagEncerrado': 'flagEncerrado',
+    'flagGerarDesconto': 'flagGerarDesconto',
+    'flagEncerramentoAutomatico': 'flagEncerramentoAutomatico'
+}
+COLUNAS_CSV = ['id', 'observacao', 'acaoCorretiva']
+
+# ==============================================================================
+# REGRAS DE NEGÓCIO
+# ==============================================================================
+def definir_status_resposta(row):
+    if 'ocorrenciaRespondida' in row.index:
+        val = str(row['ocorrenciaRespondida']).lower()
+        if val == 'true': return '✅ Respondida' # Ajustado para feminino
+        if val == 'false': return '🚨 Sem Resposta'
+    if str(row.get('flagEncerrado')).lower() == 'true': return '✅ Respondida' # Ajustado para feminino
+    return '🚨 Sem Resposta'
+
+def definir_solucao(row):
+    # Normaliza boleanos
+    encerrado = str(row.get('flagEncerrado', 'false')).lower() == 'true'
+    auto_encerrado = str(row.get('flagEncerramentoAutomatico', 'false')).lower() == 'true'
+    gerar_desconto = str(row.get('flagGerarDesconto', 'false')).lower() == 'true'
+
+    # Se NÃO está encerrado (nem manual, nem auto) -> Aguardando
+    if not encerrado and not auto_encerrado:
+        return '⏳ Aguardando Parecer'
+
+    # Se está encerrado, verifica se tem desconto (glosa)
+    if gerar_desconto:
+        return '💰 Gerou Glosa'
+    else:
+        return '🌟 Solucionada' # Ajustado para feminino
+
+def cat_visual(val):
+    v = str(val).lower()
+    if 'insumo' in v or 'material' in v: return '🛠️ Insumos'
+    if 'equipe' in v or 'falta' in v or 'rh' in v: return '👥 Equipe'
+    return '📝 Outros'
+
+# ==============================================================================
+# MONTAGEM DO DATAFRAME
+# ==============================================================================
+def limpar_id(serie):
+    """Ids chegam como "1.234" no CSV e como número no JSON: texto só com dígitos."""
+    return serie.astype(str).str.replace('.', '', regex=False).str.replace(',', '', regex=False).str.strip()
+
+def montar_df_tabela(registros):
+    """Registros da /ocorrencia/tabela (todas as páginas) -> DataFrame com as colunas renomeadas."""
+    if not registros:
+        return pd.DataFrame()
+    df = pd.json_normalize(registros)
+    df = df.rename(columns=RENOMEAR_TABELA)
+    if 'id' in df.columns:
+        df['id'] = limpar_id(df['id'])
+    return df
+
+def ler_csv_export(conteudo):
+    """Texto da /ocorrencia/exportar (CSV ';') -> id + observação/ação corretiva."""
+    df = pd.read_csv(io.StringIO(conteudo), sep=';')
+    if 'id' in df.columns:
+        df['id'] = limpar_id(df['id'])
+    return df[[c for c in COLUNAS_CSV if c in df.columns]]
+
+def mesclar_ocorrencias(df_json, df_csv):
+    """Completa a tabela com as observações do CSV e deriva Data, status de resposta/solução e categoria."""
+    if not df_csv.empty:
+        df_final = pd.merge(df_json, df_csv, on='id', how='left', suffixes=('', '_csv'))
+        if 'observacao' in df_final.columns:
+            df_final['observacao'] = df_final['observacao'].fillna(df_final.get('observacao_json', '-'))
+        elif 'observacao_json' in df_final.columns:
+            df_final['observacao'] = df_final['observacao_json']
+
+        for c in ['observacao', 'acaoCorretiva', 'ueNome']:
+            if c in df_final.columns:
+                df_final[c] = df_final[c].fillna('-').astype(str)
+    else:
+        df_final = df_json
+        if 'observacao_json' in df_final.columns:
+            df_final['observacao'] = df_final['observacao_json']
+
+    if 'dataHoraOcorrencia' in df_final.columns:
+        df_final['dataHoraOcorrencia'] = pd.to_datetime(df_final['dataHoraOcorrencia'], errors='coerce')
+        df_final['Data'] = df_final['dataHoraOcorrencia'].dt.date
+
+    # Aplica funções globais
+    df_final['Status_Resposta'] = df_final.apply(definir_status_resposta, axis=1)
+    df_final['Status_Solucao'] = df_final.apply(definir_solucao, axis=1)
+
+    if 'Categoria' not in df_final.columns: df_final['Categoria'] = 'Geral'
+    df_final['Categoria_Visual'] = df_final['Categoria'].apply(cat_visual)
+
+    return df_final
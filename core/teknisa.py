@@ -0,0 +1,163 @@
+"""
+Cliente das APIs Teknisa (Portal Gestor e HCM) sem Streamlit.
+
+Credenciais entram explícitas (a página passa a seção do st.secrets; scripts e jobs em lote passam
+um dict lido do secrets.toml), então as mesmas chamadas rodam em thread, processo ou agendador.
+As funções levantam exceção em erro HTTP/rede; o fallback (DataFrame vazio, st.error) fica na página.
+"""
+import pandas as pd
+import requests
+
+from core import http_cliente
+from core.endpoints import URL_HCM_LOGIN, url_hcm, url_portal
+from core.json_stream import ler_resposta_json
+
+NRESTRUTURAM_PADRAO = "101091998"
+
+# Campos do getMesaOperacoes usados pelas páginas (o resto do registro é descartado na leitura)
+CAMPOS_MESA = [
+    'NMSITUFUNCH', 'NRESTRUTGEREN', 'NMESTRUTGEREN', 'NRVINCULOM', 'NMVINCULOM',
+    'NMOCUPACAOH', 'horas_trabalhadas', 'horas_escala', 'OBSERVACAO',
+]
+CAMPOS_OCORRENCIAS = ['NRVINCULOM', 'TIPO_OCORRENCIA', 'DATA_INICIO', 'DATA_INICIO_FILTER', 'DIFF_HOURS']
+
+# ==============================================================================
+# CREDENCIAIS
+# ==============================================================================
+def credenciais_portal(secao):
+    """Seção [api_portal_gestor] (st.secrets ou dict) -> dict usado nas chamadas do Portal Gestor."""
+    return {
+        "token": secao["token_fixo"],
+        "cd_operador": str(secao.get("cd_operador", "033555692836")),
+        "nr_org": str(secao.get("nr_org", "3260")),
+    }
+
+def credenciais_hcm(secao):
+    """Seção [hcm_api] (st.secrets ou dict) -> dict usado no login e nas chamadas do HCM."""
+    return {
+        "usuario": secao["usuario"],
+        "senha": secao["senha"],
+        "hash": secao["hash_sessao"],
+        "uid_browser": secao["user_id_browser"],
+        "projeto": str(secao.get("project_id", "750")),
+    }
+
+def _headers_portal(cred):
+    return {
+        "User-Agent": "Mozilla/5.0",
+        "Accept": "application/json",
+        "OAuth-Token": cred["token"],
+        "OAuth-Cdoperador": cred["cd_operador"],
+        "OAuth-Nrorg": cred["nr_org"],
+    }
+
+def _params_portal(cred, **extra):
+    return {"requestType": "FilterData", **extra, "NRORG": cred["nr_org"], "CDOPERADOR": cred["cd_operador"]}
+
+def _headers_hcm(cred, token):
+    return {
+        "User-Agent": "Mozilla/5.0", "Content-Type": "application/json",
+        "OAuth-Token": token, "OAuth-Hash": cred["hash"],
+        "OAuth-Project": cred["projeto"], "User-Id": cred["uid_browser"],
+        "OAuth-KeepConnected": "Yes",
+    }
+
+def _dataset(r, chave="data"):
+    r.raise_for_status()
+    return (r.json().get("dataset", {}) or {}).get(chave, []) or []
+
+# ==============================================================================
+# PORTAL GESTOR
+# ==============================================================================
+def buscar_mesa_operacoes(cred, dia, nr_estrutura=NRESTRUTURAM_PADRAO, campos=CAMPOS_MESA, timeout=30):
+    """
+    getMesaOperacoes de um dia/estrutura. Retorna (df, sha1 do payload).
+    Corpo lido em stream: só `campos` vão para o DataFrame, sem materializar o JSON inteiro.
+    """
+    params = _params_portal(cred, DIA=dia.strftime("%d/%m/%Y"), NRESTRUTURAM=str(nr_estrutura))
+    with http_cliente.get(url_portal("getMesaOperacoes"), params=params, headers=_headers_portal(cred),
+                          timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        return ler_resposta_json(r, ("dataset", "data"), campos)
+
+def buscar_estruturas(cred):
+    """Estruturas gerenciais: lista de (NMESTRUTURA, NRESTRUTURAM)."""
+    r = http_cliente.get(url_portal("getEstruturasGerenciais"), params=_params_portal(cred),
+                         headers=_headers_portal(cred), timeout=15)
+    return [(i.get("NMESTRUTURA", "Sem Nome"), i.get("NRESTRUTURAM")) for i in _dataset(r)]
+
+def buscar_periodos_apuracao(cred):
+    r = http_cliente.get(url_portal("getPeriodosDemonstrativo"), params=_params_portal(cred),
+                         headers=_headers_portal(cred), timeout=10)
+    return pd.DataFrame(_dataset(r))
+
+def buscar_dias_demonstrativo(cred, vinculo, periodo):
+    """Espelho de ponto (um dia por linha) de um vínculo no período de apuração."""
+    params = _params_portal(cred, NRVINCULOM=str(vinculo).split('.')[0], NRPERIODOAPURACAO=periodo)
+    r = http_cliente.get(url_portal("getDiasDemonstrativo"), params=params, headers=_headers_portal(cred), timeout=15)
+    return pd.DataFrame(_dataset(r))
+
+def funcionarios_ativos(df_mesa):
+    """Registros da Mesa só com situação 'Atividade Normal' (base de colaboradores do diagnóstico de ponto)."""
+    if df_mesa.empty or 'NMSITUFUNCH' not in df_mesa.columns:
+        return df_mesa
+    return df_mesa[df_mesa['NMSITUFUNCH'].str.strip() == 'Atividade Normal']
+
+# ==============================================================================
+# HCM
+# ==============================================================================
+def login_hcm(cred):
+    """Login do bot no HCM. Retorna (token, USER_ID); (None, None) se a resposta não trouxe userData."""
+    headers = {
+        "User-Agent": "Mozilla/5.0", "Content-Type": "application/json",
+        "Origin": "https://hcm.teknisa.com", "Referer": "https://hcm.teknisa.com/login/",
+        "User-Id": cred["uid_browser"],
+    }
+    payload = {
+        "disableLoader": False,
+        "filter": [
+            {"name": "EMAIL", "operator": "=", "value": cred["usuario"]},
+            {"name": "PASSWORD", "operator": "=", "value": cred["senha"]},
+            {"name": "PRODUCT_ID", "operator": "=", "value": int(cred["projeto"])},
+            {"name": "HASH", "operator": "=", "value": cred["hash"]},
+            {"name": "KEEP_CONNECTED", "operator": "=", "value": "S"}
+        ],
+        "page": 1, "requestType": "FilterData",
+        "origin": {"containerName": "AUTHENTICATION", "widgetName": "LOGIN"}
+    }
+    r = http_cliente.post(URL_HCM_LOGIN, headers=headers, json=payload, timeout=20)
+    dados = r.json().get("dataset", {}) or {}
+    if "userData" in dados:
+        return dados["userData"].get("TOKEN"), dados["userData"].get("USER_ID")
+    return None, None
+
+def token_hcm_valido(cred, token):
+    """Consulta mínima ao getPessoa: 200 = token ainda aceito."""
+    try:
+        r = http_cliente.post(url_hcm("getPessoa"), headers=_headers_hcm(cred, token),
+                              json={"page": 1, "itemsPerPage": 1, "requestType": "FilterData"}, timeout=5)
+        return r.status_code == 200
+    except requests.RequestException:
+        return False
+
+def buscar_ocorrencias_ponto(cred, token, lista_ids, periodo_apuracao, mes_competencia):
+    """
+    Faltas e atrasos (getMarcacaoPontoOcorrencias) dos vínculos no período.
+    itemsPerPage 99999: lido em stream, guardando só CAMPOS_OCORRENCIAS.
+    """
+    payload = {
+        "disableLoader": False,
+        "filter": [
+            {"name": "P_NRORG", "operator": "=", "value": "3260"},
+            {"name": "P_NRORG_PADRAO", "operator": "=", "value": "0"},
+            {"name": "P_DTMESCOMPETENC", "operator": "=", "value": mes_competencia},
+            {"name": "NRPERIODOAPURACAO", "value": int(periodo_apuracao), "operator": "=", "isCustomFilter": True},
+            {"name": "NRVINCULOM_LIST", "value": lista_ids, "operator": "IN", "isCustomFilter": True},
+            {"name": "P_TIPOOCORRENCIA", "value": ["ATRASO", "FALTA"], "operator": "IN", "isCustomFilter": True}
+        ],
+        "page": 1, "itemsPerPage": 99999, "requestType": "FilterData"
+    }
+    with http_cliente.post(url_hcm("getMarcacaoPontoOcorrencias"), headers=_headers_hcm(cred, token), json=payload,
+                           timeout=80, stream=True) as r:
+        r.raise_for_status()
+        return ler_resposta_json(r, ("dataset", "getMarcacaoPontoOcorrencias"), CAMPOS_OCORRENCIAS)[0]
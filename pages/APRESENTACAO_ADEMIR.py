@@ -1,7 +1,7 @@
 import streamlit as st
 import time
-import requests
 from streamlit_lottie import st_lottie
+from core import http_cliente
 
 # ==============================================================================
 # CONFIGURAÇÃO DA PÁGINA
@@ -18,7 +18,7 @@ st.set_page_config(
 # ==============================================================================
 @st.cache_data
 def load_lottieurl(url: str):
-    r = requests.get(url)
+    r = http_cliente.get(url)
     if r.status_code != 200:
         return None
     return r.json()
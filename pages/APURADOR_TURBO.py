@@ -1,7 +1,8 @@
 import streamlit as st
-import requests
 import pandas as pd
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from core import http_cliente
+from core.endpoints import BASE_PORTAL_GESTOR, url_portal
 
 # ==============================================================================
 # 1. CONFIGURAÇÃO DA PÁGINA
@@ -51,10 +52,10 @@ def get_headers_har():
 
 @st.cache_data(ttl=3600) 
 def fetch_periodos_apuracao():
-    url = "https://portalgestor.teknisa.com/backend/index.php/getPeriodosDemonstrativo"
+    url = url_portal("getPeriodosDemonstrativo")
     params = { "requestType": "FilterData", "NRORG": PG_NR_ORG, "CDOPERADOR": PG_CD_OPERADOR }
     try:
-        r = requests.get(url, params=params, headers=get_headers_har(), timeout=10)
+        r = http_cliente.get(url, params=params, headers=get_headers_har(), timeout=10)
         if r.status_code == 200:
             data = r.json()
             if "dataset" in data and "data" in data["dataset"]:
@@ -66,7 +67,7 @@ def buscar_vinculos_exatos(nr_periodo, nr_estrut):
     """
     Replica a requisição getVinculosDoGestor do log HAR.
     """
-    url = "https://portalgestor.teknisa.com/backend/index.php/getVinculosDoGestor"
+    url = url_portal("getVinculosDoGestor")
     
     # Parâmetros na URL (Query String) igual ao fetch
     params = {
@@ -85,7 +86,7 @@ def buscar_vinculos_exatos(nr_periodo, nr_estrut):
     }
 
     try:
-        r = requests.get(url, params=params, headers=get_headers_har(), timeout=30)
+        r = http_cliente.get(url, params=params, headers=get_headers_har(), timeout=30)
         
         # Salva o RAW response para debug se falhar
         st.session_state["last_response_json"] = r.text
@@ -221,8 +222,8 @@ if st.session_state["lista_funcionarios"]:
     
     if st.button("🔥 DISPARAR APURAÇÃO EM MASSA", type="primary", use_container_width=True):
         
-        session = requests.Session()
-        url_base = "https://portalgestor.teknisa.com/backend/index.php"
+        session = http_cliente.SessaoInstrumentada()
+        url_base = BASE_PORTAL_GESTOR
         headers = get_headers_har()
         
         total_items = len(df_lista)
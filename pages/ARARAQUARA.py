@@ -5,6 +5,8 @@ from sqlalchemy import text
 import numpy as np
 from PIL import Image
 import streamlit_authenticator as stauth
+from core.araraquara import gerar_tabela_comparativa, processar_educacao, processar_saude
+from core.db import obter_conexao
 
 # ==============================================================================
 # CONFIGURAÇÃO E ESTILOS
@@ -131,53 +133,7 @@ def buscar_dados_completos(_conn):
 # ==============================================================================
 # 2. PROCESSAMENTO
 # ==============================================================================
-
-def processar_educacao(df_real, df_meta):
-    meta_agg = df_meta.groupby('Insalubridade')['Qtd'].sum().reset_index()
-    meta_agg['Categoria'] = meta_agg['Insalubridade'].apply(lambda x: f"Insalubridade {int(x)}%")
-    meta_agg['Tipo_Dado'] = 'Edital'
-    meta_agg['Cor'] = '#808080'
-
-    real_filter = df_real[df_real['Contrato'] == 'EDUCACAO'].copy()
-    real_agg = real_filter.groupby('RecebeInsalubridade').size().reset_index(name='Qtd')
-    real_agg['Categoria'] = real_agg['RecebeInsalubridade'].apply(lambda x: f"Insalubridade {int(x)}%")
-    real_agg['Tipo_Dado'] = 'Real'
-    real_agg['Cor'] = '#00bfff'
-
-    return pd.concat([meta_agg[['Categoria', 'Tipo_Dado', 'Qtd', 'Cor']], real_agg[['Categoria', 'Tipo_Dado', 'Qtd', 'Cor']]])
-
-def processar_saude(df_real, df_meta):
-    real_filter = df_real[df_real['Contrato'] == 'SAUDE'].copy()
-    def normalizar_escala_saude(row):
-        esc = row['Escala']
-        if 'NOTURNO' in esc: return 'NOTURNO 12 HORAS'
-        elif '12X36' in esc and 'DIURNO' in esc: return 'DIURNO 12 HORAS'
-        elif any(x in esc for x in ['5X2', '6X1', '8H', 'DIARISTA']): return 'DIURNO 8 HORAS'
-        return 'OUTROS'
-    real_filter['Tipo_Normalizado'] = real_filter.apply(normalizar_escala_saude, axis=1)
-    
-    real_agg = real_filter.groupby(['Tipo_Normalizado', 'RecebeInsalubridade']).size().reset_index(name='Qtd')
-    real_agg['Chave'] = real_agg.apply(lambda x: f"{x['Tipo_Normalizado']} ({int(x['RecebeInsalubridade'])}%)", axis=1)
-    real_agg['Tipo_Dado'] = 'Real'
-    real_agg['Cor'] = '#00bfff'
-
-    meta_agg = df_meta.groupby(['Tipo', 'Insalubridade'])['Qtd'].sum().reset_index()
-    meta_agg['Chave'] = meta_agg.apply(lambda x: f"{x['Tipo']} ({int(x['Insalubridade'])}%)", axis=1)
-    meta_agg['Tipo_Dado'] = 'Edital'
-    meta_agg['Cor'] = '#808080'
-
-    return pd.concat([meta_agg[['Chave', 'Tipo_Dado', 'Qtd', 'Cor']], real_agg[['Chave', 'Tipo_Dado', 'Qtd', 'Cor']]]).rename(columns={'Chave': 'Categoria'})
-
-def gerar_tabela_comparativa(df_chart):
-    if df_chart.empty: return pd.DataFrame()
-    df_pivot = df_chart.pivot_table(index='Categoria', columns='Tipo_Dado', values='Qtd', aggfunc='sum').fillna(0)
-    if 'Edital' not in df_pivot.columns: df_pivot['Edital'] = 0
-    if 'Real' not in df_pivot.columns: df_pivot['Real'] = 0
-    df_pivot = df_pivot.reset_index()
-    df_pivot['Edital'] = df_pivot['Edital'].astype(int); df_pivot['Real'] = df_pivot['Real'].astype(int)
-    df_pivot['Diferença'] = df_pivot['Real'] - df_pivot['Edital']
-    df_pivot['Diff_Display'] = df_pivot['Diferença'].apply(lambda x: f"+{x}" if x > 0 else str(x))
-    return df_pivot[['Categoria', 'Edital', 'Real', 'Diff_Display']]
+# Agregações edital x real: core/araraquara.py
 
 def estilo_tabela_araraquara(row):
     styles = ['text-align: center;'] * 4
@@ -202,7 +158,7 @@ def main():
         # Removido: st.markdown(f"**Usuário:** ...")
         st.markdown("---")
 
-        conn = st.connection("postgres", type="sql")
+        conn = obter_conexao()
         df_real, df_meta_edu, df_meta_saude = buscar_dados_completos(conn)
 
         if df_real.empty: st.info("Nenhum colaborador encontrado."); st.stop()
@@ -1,11 +1,13 @@
 import streamlit as st
-import requests
 import pandas as pd
 import time
 import pytz
 from datetime import datetime
 from PIL import Image
 from sqlalchemy import text
+from core import http_cliente
+from core.db import obter_conexao
+from core.endpoints import URL_HCM_LOGIN, url_hcm
 
 # ==============================================================================
 # 1. CONFIGURAÇÃO DA PÁGINA
@@ -42,22 +44,8 @@ def get_data_brasil():
     return datetime.now(fuso_br)
 
 def init_db_token():
-    """Cria a tabela HCMTokens se não existir"""
-    conn = st.connection("postgres", type="sql")
-    try:
-        with conn.session as session:
-            session.execute(text("""
-                CREATE TABLE IF NOT EXISTS public."HCMTokens" (
-                    id VARCHAR(50) PRIMARY KEY,
-                    access_token TEXT,
-                    user_uid TEXT,
-                    updated_at TIMESTAMP
-                );
-            """))
-            session.commit()
-    except Exception as e:
-        st.error(f"Erro ao inicializar tabela de tokens: {e}")
-    return conn
+    """Conexão compartilhada; a tabela HCMTokens é criada pelo bootstrap de core.db"""
+    return obter_conexao()
 
 def get_token_db(conn):
     """Busca o token salvo no banco"""
@@ -120,7 +108,7 @@ def get_headers_request(token):
 
 def login_teknisa_novo():
     """Realiza o login real na API"""
-    url_login = "https://hcm.teknisa.com/backend_login/index.php/login"
+    url_login = URL_HCM_LOGIN
     headers = get_headers_base()
     headers["User-Id"] = HCM_UID_BROWSER
 
@@ -145,7 +133,7 @@ def login_teknisa_novo():
     }
 
     try:
-        r = requests.post(url_login, headers=headers, json=payload, timeout=25)
+        r = http_cliente.post(url_login, headers=headers, json=payload, timeout=25)
         r.raise_for_status()
         data = r.json()
         
@@ -165,7 +153,7 @@ def validar_token(token):
         "page": 1, "itemsPerPage": 1, "requestType": "FilterData"
     }
     try:
-        r = requests.post("https://hcm.teknisa.com/backend/index.php/getPessoa", headers=headers, json=payload_teste, timeout=10)
+        r = http_cliente.post(url_hcm("getPessoa"), headers=headers, json=payload_teste, timeout=10)
         if r.status_code == 200: return True, f"Status 200 OK"
         elif r.status_code in [401, 403]: return False, f"Token Expirado ({r.status_code})"
         else: return False, f"Erro inesperado ({r.status_code})"
@@ -262,10 +250,10 @@ if st.button("🚀 Iniciar Busca", use_container_width=True):
                 }
                 
                 try:
-                    r = requests.post("https://hcm.teknisa.com/backend/index.php/getPessoa", headers=headers, json=pl_pessoa, timeout=10)
+                    r = http_cliente.post(url_hcm("getPessoa"), headers=headers, json=pl_pessoa, timeout=10)
                 except:
                     time.sleep(1) 
-                    r = requests.post("https://hcm.teknisa.com/backend/index.php/getPessoa", headers=headers, json=pl_pessoa, timeout=10)
+                    r = http_cliente.post(url_hcm("getPessoa"), headers=headers, json=pl_pessoa, timeout=10, retentativa=True)
 
                 try: resp_json = r.json()
                 except: resp_json = {}
@@ -283,13 +271,13 @@ if st.button("🚀 Iniciar Busca", use_container_width=True):
                             ], "requestType": "FilterData"
                         }
                         
-                        r_c = requests.post("https://hcm.teknisa.com/backend/index.php/getFormaComunicacaoParc", headers=headers, json=pl_contato)
+                        r_c = http_cliente.post(url_hcm("getFormaComunicacaoParc"), headers=headers, json=pl_contato)
                         try: contatos = r_c.json().get("dataset", {}).get("comunicaparc_get", [])
                         except: contatos = []
                         
                         if not contatos:
                             pl_contato["filter"] = [{"name": "P_NRPARCNEGOCIO", "value": p.get("NRPARCNEGOCIO")}]
-                            r_c = requests.post("https://hcm.teknisa.com/backend/index.php/getFormaComunicacaoParc", headers=headers, json=pl_contato)
+                            r_c = http_cliente.post(url_hcm("getFormaComunicacaoParc"), headers=headers, json=pl_contato)
                             try: contatos = r_c.json().get("dataset", {}).get("comunicaparc_get", [])
                             except: contatos = []
 
@@ -1,11 +1,17 @@
 import streamlit as st
-import requests
 import pandas as pd
 import pytz
 import urllib.parse
 from datetime import datetime
 from sqlalchemy import text
 import plotly.express as px
+from core import http_cliente
+from core.db import obter_conexao
+from core.ponto import calcular_criticidade, clean_id, decimal_para_hora, feriados_fixos, montar_base_mestra
+from core.teknisa import (
+    CAMPOS_MESA, buscar_dias_demonstrativo, buscar_estruturas, buscar_mesa_operacoes, buscar_ocorrencias_ponto,
+    buscar_periodos_apuracao, credenciais_hcm, credenciais_portal, funcionarios_ativos, login_hcm, token_hcm_valido,
+)
 
 # ==============================================================================
 # 1. CONFIGURAÇÃO DA PÁGINA
@@ -21,22 +27,14 @@ if not st.session_state.get("authentication_status"):
 
 # --- CREDENCIAIS HCM ---
 try:
-    SECRETS_HCM = st.secrets["hcm_api"]
-    HCM_USER = SECRETS_HCM["usuario"]
-    HCM_PASS = SECRETS_HCM["senha"]
-    HCM_HASH = SECRETS_HCM["hash_sessao"]
-    HCM_UID_BROWSER = SECRETS_HCM["user_id_browser"]
-    HCM_PROJECT = SECRETS_HCM.get("project_id", "750")
+    CRED_HCM = credenciais_hcm(st.secrets["hcm_api"])
 except Exception as e:
     st.error(f"⚠️ Erro Config HCM: {e}")
     st.stop()
 
 # --- CREDENCIAIS PORTAL GESTOR ---
 try:
-    SECRETS_PG = st.secrets["api_portal_gestor"]
-    PG_TOKEN = SECRETS_PG["token_fixo"]
-    PG_CD_OPERADOR = SECRETS_PG["cd_operador"]
-    PG_NR_ORG = SECRETS_PG["nr_org"]
+    CRED_PG = credenciais_portal(st.secrets["api_portal_gestor"])
 except Exception as e:
     st.error(f"⚠️ Erro Config Portal Gestor: {e}")
     st.stop()
@@ -48,20 +46,8 @@ def get_data_brasil():
     return datetime.now(pytz.timezone('America/Sao_Paulo'))
 
 def init_db_token():
-    conn = st.connection("postgres", type="sql")
-    try:
-        with conn.session as session:
-            session.execute(text("""
-                CREATE TABLE IF NOT EXISTS public."HCMTokens" (
-                    id VARCHAR(50) PRIMARY KEY,
-                    access_token TEXT,
-                    user_uid TEXT,
-                    updated_at TIMESTAMP
-                );
-            """))
-            session.commit()
-    except: pass
-    return conn
+    # Tabela HCMTokens é criada pelo bootstrap de core.db na primeira conexão do processo
+    return obter_conexao()
 
 def get_token_db(conn):
     try:
@@ -83,46 +69,15 @@ def save_token_db(conn, token, uid):
             session.commit()
     except: pass
 
-def login_hcm_novo():
-    url = "https://hcm.teknisa.com/backend_login/index.php/login"
-    headers = {
-        "User-Agent": "Mozilla/5.0", "Content-Type": "application/json",
-        "Origin": "https://hcm.teknisa.com", "Referer": "https://hcm.teknisa.com/login/",
-        "User-Id": HCM_UID_BROWSER
-    }
-    payload = {
-        "disableLoader": False,
-        "filter": [
-            {"name": "EMAIL", "operator": "=", "value": HCM_USER},
-            {"name": "PASSWORD", "operator": "=", "value": HCM_PASS},
-            {"name": "PRODUCT_ID", "operator": "=", "value": int(HCM_PROJECT)},
-            {"name": "HASH", "operator": "=", "value": HCM_HASH},
-            {"name": "KEEP_CONNECTED", "operator": "=", "value": "S"}
-        ],
-        "page": 1, "requestType": "FilterData",
-        "origin": {"containerName": "AUTHENTICATION", "widgetName": "LOGIN"}
-    }
-    try:
-        r = requests.post(url, headers=headers, json=payload, timeout=20)
-        data = r.json()
-        if "dataset" in data and "userData" in data["dataset"]:
-            return data["dataset"]["userData"].get("TOKEN"), data["dataset"]["userData"].get("USER_ID")
-    except: pass
-    return None, None
-
 def obter_sessao_hcm():
     conn = init_db_token()
     token, uid = get_token_db(conn)
-    if token:
-        headers = {
-            "OAuth-Token": token, "OAuth-Hash": HCM_HASH, "User-Id": HCM_UID_BROWSER,
-            "OAuth-Project": HCM_PROJECT, "Content-Type": "application/json"
-        }
-        try:
-            r = requests.post("https://hcm.teknisa.com/backend/index.php/getPessoa", headers=headers, json={"page":1,"itemsPerPage":1,"requestType":"FilterData"}, timeout=5)
-            if r.status_code == 200: return token
-        except: pass
-    new_token, new_uid = login_hcm_novo()
+    if token and token_hcm_valido(CRED_HCM, token):
+        return token
+    try: new_token, new_uid = login_hcm(CRED_HCM)
+    except Exception as e:
+        print(f"Erro login HCM: {e}")
+        new_token, new_uid = None, None
     if new_token:
         save_token_db(conn, new_token, new_uid)
         return new_token
@@ -131,13 +86,6 @@ def obter_sessao_hcm():
 # ==============================================================================
 # 4. BANCO DE DADOS - VALIDAÇÃO & SNAPSHOT
 # ==============================================================================
-def clean_id(val):
-    try:
-        if pd.isna(val): return "0"
-        return str(int(float(val)))
-    except:
-        return str(val).strip()
-
 def save_validacao_batch_snapshot(conn, df_changes, periodo, usuario_responsavel):
     if df_changes.empty: return
     user_safe = usuario_responsavel if usuario_responsavel else "Sistema"
@@ -224,7 +172,7 @@ def fetch_validacoes_completo(conn, periodo):
 @st.cache_data(ttl=600)
 def fetch_dados_supervisores_completo():
     try:
-        conn = st.connection("postgres", type="sql")
+        conn = obter_conexao()
         q1 = """
         SELECT col."ColaboradorID" as "Matricula", s."NomeSupervisor" as "Supervisor"
         FROM "Colaboradores" col
@@ -258,7 +206,7 @@ def fetch_dados_supervisores_completo():
 def fetch_feriados_brasil(ano):
     url = f"https://brasilapi.com.br/api/feriados/v1/{ano}"
     try:
-        r = requests.get(url, timeout=5)
+        r = http_cliente.get(url, timeout=5)
         if r.status_code == 200: return r.json() 
     except: pass
     return []
@@ -271,26 +219,9 @@ def get_feriados_set(anos_lista):
         if dados:
             for f in dados: feriados_dict[f['date']] = f['name']
         else:
-            feriados_dict.update({
-                f"{ano}-01-01": "Confraternização Universal",
-                f"{ano}-04-21": "Tiradentes",
-                f"{ano}-05-01": "Dia do Trabalho",
-                f"{ano}-09-07": "Independência do Brasil",
-                f"{ano}-10-12": "Nossa Senhora Aparecida",
-                f"{ano}-11-02": "Finados",
-                f"{ano}-11-15": "Proclamação da República",
-                f"{ano}-11-20": "Dia da Consciência Negra",
-                f"{ano}-12-25": "Natal"
-            })
+            feriados_dict.update(feriados_fixos(ano))
     return feriados_dict
 
-def decimal_para_hora(val):
-    try:
-        if pd.isna(val) or val == 0: return "00:00"
-        horas = int(val)
-        minutos = int((val - horas) * 60)
-        return f"{horas:02d}:{minutos:02d}"
-    except: return "00:00"
 
 def gerar_link_whatsapp(telefone, mensagem):
     texto_encoded = urllib.parse.quote_plus(mensagem)
@@ -302,78 +233,25 @@ def gerar_link_whatsapp(telefone, mensagem):
 # ==============================================================================
 @st.cache_data(ttl=3600)
 def fetch_estruturas_gestor():
-    url = "https://portalgestor.teknisa.com/backend/index.php/getEstruturasGerenciais"
-    params = { "requestType": "FilterData", "NRORG": PG_NR_ORG, "CDOPERADOR": PG_CD_OPERADOR }
-    headers = { "OAuth-Token": PG_TOKEN, "OAuth-Cdoperador": PG_CD_OPERADOR, "OAuth-Nrorg": PG_NR_ORG, "User-Agent": "Mozilla/5.0" }
-    try:
-        r = requests.get(url, params=params, headers=headers, timeout=15)
-        if r.status_code == 200:
-            data = r.json()
-            items = (data.get("dataset", {}) or {}).get("data", [])
-            return [(i.get("NMESTRUTURA", "Sem Nome"), i.get("NRESTRUTURAM")) for i in items]
-    except: pass
-    return []
+    try: return buscar_estruturas(CRED_PG)
+    except: return []
 
 def fetch_ids_portal_gestor(data_ref, codigo_estrutura):
-    url = "https://portalgestor.teknisa.com/backend/index.php/getMesaOperacoes"
-    params = {
-        "requestType": "FilterData", "DIA": data_ref.strftime("%d/%m/%Y"),
-        "NRESTRUTURAM": codigo_estrutura, "NRORG": PG_NR_ORG, "CDOPERADOR": PG_CD_OPERADOR
-    }
-    headers = { "OAuth-Token": PG_TOKEN, "OAuth-Cdoperador": PG_CD_OPERADOR, "OAuth-Nrorg": PG_NR_ORG, "User-Agent": "Mozilla/5.0" }
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=30)
-        if r.status_code == 200:
-            data = r.json()
-            if "dataset" in data and "data" in data["dataset"]:
-                df = pd.DataFrame(data["dataset"]["data"])
-                if not df.empty and 'NMSITUFUNCH' in df.columns:
-                    df = df[df['NMSITUFUNCH'].str.strip() == 'Atividade Normal']
-                return df
+        df, _ = buscar_mesa_operacoes(CRED_PG, data_ref, codigo_estrutura, campos=CAMPOS_MESA)
+        return funcionarios_ativos(df)
     except Exception as e:
         st.error(f"Erro Portal Gestor: {e}")
     return pd.DataFrame()
 
 @st.cache_data(ttl=3600) 
 def fetch_periodos_apuracao():
-    url = "https://portalgestor.teknisa.com/backend/index.php/getPeriodosDemonstrativo"
-    params = { "requestType": "FilterData", "NRORG": PG_NR_ORG, "CDOPERADOR": PG_CD_OPERADOR }
-    headers = { "OAuth-Token": PG_TOKEN, "OAuth-Cdoperador": PG_CD_OPERADOR, "OAuth-Nrorg": PG_NR_ORG, "User-Agent": "Mozilla/5.0" }
-    try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            if "dataset" in data and "data" in data["dataset"]:
-                return pd.DataFrame(data["dataset"]["data"])
-    except: pass
-    return pd.DataFrame()
+    try: return buscar_periodos_apuracao(CRED_PG)
+    except: return pd.DataFrame()
 
 def fetch_ocorrencias_hcm_turbo(token, lista_ids, periodo_apuracao, mes_competencia):
-    url = "https://hcm.teknisa.com/backend/index.php/getMarcacaoPontoOcorrencias"
-    headers = {
-        "User-Agent": "Mozilla/5.0", "Content-Type": "application/json",
-        "OAuth-Token": token, "OAuth-Hash": HCM_HASH,
-        "OAuth-Project": HCM_PROJECT, "User-Id": HCM_UID_BROWSER,
-        "OAuth-KeepConnected": "Yes"
-    }
-    payload = {
-        "disableLoader": False,
-        "filter": [
-            {"name": "P_NRORG", "operator": "=", "value": "3260"},
-            {"name": "P_NRORG_PADRAO", "operator": "=", "value": "0"},
-            {"name": "P_DTMESCOMPETENC", "operator": "=", "value": mes_competencia},
-            {"name": "NRPERIODOAPURACAO", "value": int(periodo_apuracao), "operator": "=", "isCustomFilter": True},
-            {"name": "NRVINCULOM_LIST", "value": lista_ids, "operator": "IN", "isCustomFilter": True},
-            {"name": "P_TIPOOCORRENCIA", "value": ["ATRASO", "FALTA"], "operator": "IN", "isCustomFilter": True}
-        ],
-        "page": 1, "itemsPerPage": 99999, "requestType": "FilterData"
-    }
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=80)
-        if r.status_code == 200:
-            data = r.json()
-            if "dataset" in data and "getMarcacaoPontoOcorrencias" in data["dataset"]:
-                return pd.DataFrame(data["dataset"]["getMarcacaoPontoOcorrencias"])
+        return buscar_ocorrencias_ponto(CRED_HCM, token, lista_ids, periodo_apuracao, mes_competencia)
     except Exception as e:
         st.error(f"Erro na requisição: {e}")
     return pd.DataFrame()
@@ -383,19 +261,8 @@ def fetch_ocorrencias_hcm_turbo(token, lista_ids, periodo_apuracao, mes_competen
 # ==============================================================================
 @st.cache_data(ttl=300)
 def fetch_dias_demonstrativo(vinculo, periodo):
-    url = "https://portalgestor.teknisa.com/backend/index.php/getDiasDemonstrativo"
-    params = {
-        "requestType": "FilterData", "NRVINCULOM": str(vinculo).split('.')[0],
-        "NRPERIODOAPURACAO": periodo, "NRORG": PG_NR_ORG, "CDOPERADOR": PG_CD_OPERADOR
-    }
-    headers = { "OAuth-Token": PG_TOKEN, "OAuth-Cdoperador": PG_CD_OPERADOR, "OAuth-Nrorg": PG_NR_ORG }
-    try:
-        r = requests.get(url, params=params, headers=headers, timeout=15)
-        if r.status_code == 200:
-            items = r.json().get("dataset", {}).get("data", [])
-            return pd.DataFrame(items)
-    except: pass
-    return pd.DataFrame()
+    try: return buscar_dias_demonstrativo(CRED_PG, vinculo, periodo)
+    except: return pd.DataFrame()
 
 @st.dialog("📅 Espelho de Ponto", width="large")
 def mostrar_espelho_modal(nome, vinculo, periodo):
@@ -538,7 +405,7 @@ if st.session_state["busca_realizada"]:
             df_oco = fetch_ocorrencias_hcm_turbo(token, lista_ids, per_id, mes_hcm)
             
             # Busca Validações (Garante consistência de tipos)
-            conn = st.connection("postgres", type="sql")
+            conn = obter_conexao()
             d_proc, d_user, d_snap = fetch_validacoes_completo(conn, per_id)
 
             st.session_state["dados_cache"] = {
@@ -584,67 +451,9 @@ if st.session_state["busca_realizada"]:
     # 3. PROCESSAMENTO
     hoje = datetime.now().strftime('%Y-%m-%d')
     
-    # Cria Base Mestra com Todos os Funcionários do Filtro
-    df_mestra = df_func[['NRVINCULOM', 'NMVINCULOM', 'Supervisor']].rename(columns={'NMVINCULOM':'Funcionario'}).copy()
-    
-    if not df_oco.empty:
-        df_oco['DIFF_HOURS'] = pd.to_numeric(df_oco['DIFF_HOURS'], errors='coerce').fillna(0)
-        df_oco['NRVINCULOM'] = df_oco['NRVINCULOM'].apply(clean_id)
-        df_oco['DATA_INICIO_FILTER'] = df_oco['DATA_INICIO_FILTER'].astype(str)
-        df_oco['TIPO_OCORRENCIA'] = df_oco['TIPO_OCORRENCIA'].str.strip().str.upper()
-
-        # Filtros de Data
-        df_oco = df_oco[df_oco['DATA_INICIO_FILTER'] != hoje].copy()
-        df_oco['DT_OBJ'] = pd.to_datetime(df_oco['DATA_INICIO_FILTER'], errors='coerce')
-        
-        anos = df_oco['DT_OBJ'].dt.year.unique().tolist()
-        feriados = get_feriados_set(anos)
-        
-        df_oco['DIA_SEMANA'] = df_oco['DT_OBJ'].dt.dayofweek 
-        df_oco['IS_FERIADO'] = df_oco['DATA_INICIO_FILTER'].map(lambda x: x in feriados)
-        
-        # Ocorrências Válidas
-        df_faltas = df_oco[
-            (df_oco['TIPO_OCORRENCIA'] == 'FALTA') & 
-            (df_oco['DIA_SEMANA'] < 5) & (df_oco['IS_FERIADO'] == False)
-        ].copy()
-        
-        df_atrasos = df_oco[df_oco['TIPO_OCORRENCIA'] == 'ATRASO'].copy()
-
-        # Agregações
-        s_faltas = df_faltas.drop_duplicates(subset=['NRVINCULOM', 'DATA_INICIO']).groupby('NRVINCULOM').size().rename('Qtd_Faltas')
-        s_atrasos = df_atrasos.groupby('NRVINCULOM')['DIFF_HOURS'].sum().rename('Total_Horas_Atraso')
-        s_datas = df_oco.groupby('NRVINCULOM')['DATA_INICIO'].unique().apply(lambda x: ", ".join(sorted(x))).rename('Datas')
-
-        # Join na Mestra
-        df_mestra = df_mestra.set_index('NRVINCULOM')
-        df_mestra = df_mestra.join(s_faltas).join(s_atrasos).join(s_datas).fillna(0).reset_index()
-    else:
-        df_mestra['Qtd_Faltas'] = 0
-        df_mestra['Total_Horas_Atraso'] = 0.0
-        df_mestra['Datas'] = ""
-
-    # ==============================================================================
-    # CRITICIDADE: Pesos (Sem Teto)
-    # ==============================================================================
-    PESO_FALTA = 1
-    PESO_HORA_ATRASO = 0.125
-
-    df_mestra['ScoreNum'] = (df_mestra['Qtd_Faltas'] * PESO_FALTA) + (df_mestra['Total_Horas_Atraso'] * PESO_HORA_ATRASO)
-    
-    # Formatação Visual do Score
-    def fmt_score(val):
-        if val == 0: return "OK"
-        return f"{int(val)}"
-    
-    df_mestra['Criticidade Ponto'] = df_mestra['ScoreNum'].apply(fmt_score)
-
-    # Colunas de Banco
-    df_mestra['Procedente'] = df_mestra['NRVINCULOM'].map(dict_validacoes).fillna(False)
-    df_mestra['ValidadoPor'] = df_mestra['NRVINCULOM'].map(dict_usuarios).fillna("-")
-    df_mestra['UltimaValidacao'] = df_mestra['NRVINCULOM'].map(dict_snapshots).fillna("-")
-    
-    df_mestra['Tempo_Atraso_Fmt'] = df_mestra['Total_Horas_Atraso'].apply(decimal_para_hora)
+    # Cria Base Mestra com Todos os Funcionários do Filtro (agregação em core/ponto.py)
+    df_mestra = montar_base_mestra(df_func, df_oco, hoje, get_feriados_set)
+    df_mestra = calcular_criticidade(df_mestra, dict_validacoes, dict_usuarios, dict_snapshots)
 
     # KPIs
     c1, c2, c3, c4 = st.columns(4)
@@ -757,7 +566,7 @@ if st.session_state["busca_realizada"]:
                 indices_modificados = list(dict_changes.keys())
                 df_to_save = edited_df.iloc[indices_modificados].copy()
                 
-                conn = st.connection("postgres", type="sql")
+                conn = obter_conexao()
                 usuario_atual = st.session_state.get("name", "Usuario Desconhecido")
                 
                 save_validacao_batch_snapshot(conn, df_to_save, per_cache, usuario_atual)
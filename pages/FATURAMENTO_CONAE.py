@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import requests
-import io
 import json
 from datetime import datetime, timedelta
 from PIL import Image
+from core.faturamento import ler_relatorio
+from core.portal_limpeza import autenticar, buscar_relatorio_contrato, texto_relatorio
 
 # ==============================================================================
 # CONFIGURAÇÃO DA PÁGINA
@@ -43,22 +43,6 @@ for key in keys_to_init:
     if key not in st.session_state:
         st.session_state[key] = None
 
-# ==============================================================================
-# HEADERS DE NAVEGADOR (CORREÇÃO DE BLOQUEIO)
-# ==============================================================================
-HEADERS_CHROME = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36",
-    "Accept": "application/json, text/plain, */*",
-    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-    "Origin": "https://limpeza.sme.prefeitura.sp.gov.br",
-    "sec-ch-ua": '"Google Chrome";v="143", "Chromium";v="143", "Not A(Brand";v="24"',
-    "sec-ch-ua-mobile": "?0",
-    "sec-ch-ua-platform": '"Windows"',
-    "Sec-Fetch-Dest": "empty",
-    "Sec-Fetch-Mode": "cors",
-    "Sec-Fetch-Site": "same-origin"
-}
-
 # ==============================================================================
 # FUNÇÕES DE PROCESSAMENTO
 # ==============================================================================
@@ -66,29 +50,6 @@ def carregar_logo():
     try: return Image.open("logo.png")
     except: return None
 
-def processar_dataframe(df):
-    if df is None or df.empty: return None
-    df.columns = df.columns.str.strip()
-    
-    numeric_cols = [
-        'totalContrato', 'descontoContrato', 'liquidoContrato',
-        'totalUnidade', 'glosaImrUnidade', 'glosaRhUnidade', 
-        'liquidoUnidade', 'percentualImrUnidade', 'pontuacaoUnidade'
-    ]
-    
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            
-    if 'glosaImrUnidade' in df.columns and 'glosaRhUnidade' in df.columns:
-        df['Total Glosas'] = df['glosaImrUnidade'] + df['glosaRhUnidade']
-    
-    if 'nomeFiscal' in df.columns:
-        df['nomeFiscal'] = df['nomeFiscal'].fillna('').astype(str).str.strip()
-
-    return df
-
 # --- AUTENTICAÇÃO API (Funcional) ---
 def autenticar_api():
     """Faz login na API e extrai o token corretamente do JSON aninhado"""
@@ -96,33 +57,11 @@ def autenticar_api():
     url_auth = f"{base}/auth"
     if url_auth.endswith("//auth"): url_auth = url_auth.replace("//auth", "/auth")
     
-    payload = {
-        "email": SECRETS["email"],
-        "senha": SECRETS["senha"]
-    }
-    
-    h_login = HEADERS_CHROME.copy()
-    h_login["Content-Type"] = "application/json;charset=UTF-8"
-    h_login["Referer"] = "https://limpeza.sme.prefeitura.sp.gov.br/login"
-    
     try:
-        response = requests.post(url_auth, json=payload, headers=h_login, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Extração correta (data -> data -> token)
-            token = None
-            if "data" in data and isinstance(data["data"], dict):
-                token = data["data"].get("token")
-            elif "token" in data:
-                token = data["token"]
-            elif "data" in data and isinstance(data["data"], str):
-                token = data["data"]
-            
-            if token:
-                st.session_state['api_token'] = token
-                return token
+        token = autenticar(url_auth, SECRETS["email"], SECRETS["senha"], timeout=10)
+        if token:
+            st.session_state['api_token'] = token
+            return token
     except:
         pass
     return None
@@ -136,18 +75,9 @@ def fetch_api_data(ano, mes, silent=False):
          base = SECRETS['base_url'].rstrip('/')
          url = f"{base}/relatorio/relatorio-contrato/exportar/"
     
-    params = {
-        "ano": ano,
-        "mes": mes,
-        "idContrato": SECRETS["id_contrato"],
-        "idPrestadorServico": SECRETS["id_prestador"]
-    }
-    
-    def _make_request(token):
-        h = HEADERS_CHROME.copy()
-        h["Authorization"] = f"Bearer {token}"
-        h["Referer"] = "https://limpeza.sme.prefeitura.sp.gov.br/dashboard"
-        return requests.get(url, params=params, headers=h, timeout=25)
+    def _make_request(token, retentativa=False):
+        return buscar_relatorio_contrato(url, token, ano, mes, SECRETS["id_contrato"], SECRETS["id_prestador"],
+                                         retentativa=retentativa)
 
     if not silent:
         st.toast(f"Sincronizando: {mes}/{ano}...", icon="⏳")
@@ -166,22 +96,14 @@ def fetch_api_data(ano, mes, silent=False):
             if not silent: st.toast("Renovando token...", icon="🔑")
             novo_token = autenticar_api()
             if novo_token:
-                response = _make_request(novo_token)
+                response = _make_request(novo_token, retentativa=True)
             else:
                 if not silent: st.error("Falha na renovação do token.")
                 return None
 
         if response.status_code == 200:
             try:
-                try:
-                    json_response = response.json()
-                    if "data" in json_response and json_response["data"]:
-                        df = pd.read_csv(io.StringIO(json_response["data"]), sep=';')
-                        return processar_dataframe(df)
-                except: pass
-                
-                df = pd.read_csv(io.StringIO(response.text), sep=';')
-                return processar_dataframe(df)
+                return ler_relatorio(texto_relatorio(response))
             except:
                 if not silent: st.error("Erro ao processar dados.")
                 return None
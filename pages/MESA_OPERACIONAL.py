@@ -1,11 +1,20 @@
 import streamlit as st
 import pandas as pd
-import requests
-import urllib.parse
-from datetime import datetime, time, date
+import numpy as np
+import threading
+import time
+from datetime import datetime, date, timedelta
 from PIL import Image
 from sqlalchemy import text
 import io
+import plotly.express as px
+from core.db import obter_conexao
+from core.mesa import (
+    DIAG_COMPLETA, DIAG_PROBLEMA, DIV_ESCOLA, DIV_FORA_MESA, DIV_SEM_CADASTRO, ROTULO_DIVERGENCIA,
+    STATUS_A_INICIAR, STATUS_FALTA, STATUS_PRESENTE, STATUS_SEM_ESCALA, calcular_divergencias, montar_alertas,
+    processar_dados_unificados, resumir_escolas, resumir_status_por_unidade, rotular_diagnostico,
+)
+from core.teknisa import NRESTRUTURAM_PADRAO, buscar_mesa_operacoes, credenciais_portal
 
 # ==============================================================================
 # 1. CONFIGURAÇÃO DA PÁGINA
@@ -26,9 +35,7 @@ if 'mesa_data_ref' not in st.session_state:
 
 # Recupera Credenciais
 try:
-    TOKEN_FIXO = st.secrets["api_portal_gestor"]["token_fixo"]
-    CD_OPERADOR = st.secrets["api_portal_gestor"].get("cd_operador", "033555692836")
-    NR_ORG = st.secrets["api_portal_gestor"].get("nr_org", "3260")
+    CRED_PORTAL = credenciais_portal(st.secrets["api_portal_gestor"])
 except Exception as e:
     st.error("⚠️ Erro de Configuração: Credenciais da API não encontradas no secrets.toml.")
     st.stop()
@@ -39,7 +46,7 @@ except Exception as e:
 @st.cache_data(ttl=600)
 def fetch_dados_auxiliares_db():
     try:
-        conn = st.connection("postgres", type="sql")
+        conn = obter_conexao()
         
         # 1. Relação Escola -> Supervisor
         q_unidades = """
@@ -47,12 +54,12 @@ def fetch_dados_auxiliares_db():
         FROM "Unidades" u
         JOIN "Supervisores" s ON u."SupervisorID" = s."SupervisorID"
         """
-        df_unidades = conn.query(q_unidades)
+        df_unidades = conn.query(q_unidades, ttl=0)
         df_unidades['UnidadeID'] = pd.to_numeric(df_unidades['UnidadeID'], errors='coerce').fillna(0).astype(int)
         
         # 2. Relação Supervisor -> Celular
         q_telefones = 'SELECT "NomeSupervisor", "Celular" FROM "Supervisores"'
-        df_telefones = conn.query(q_telefones)
+        df_telefones = conn.query(q_telefones, ttl=0)
         
         map_telefones = dict(zip(
             df_telefones['NomeSupervisor'].str.strip().str.upper(), 
@@ -64,192 +71,337 @@ def fetch_dados_auxiliares_db():
         st.error(f"Erro DB: {e}")
         return pd.DataFrame(), {}
 
-def fetch_dados_conae_local(unidade_id):
-    """Busca comparativo unitário (usado no detalhe da escola)"""
-    try:
-        conn = st.connection("postgres", type="sql")
-        
-        q_resumo = """
-        WITH ContagemReal AS (
-            SELECT "UnidadeID", "CargoID", COUNT(*) as "QtdReal"
-            FROM "Colaboradores"
-            WHERE "Ativo" = TRUE
-            GROUP BY "UnidadeID", "CargoID"
-        )
-        SELECT 
-            c."NomeCargo" AS "Cargo", 
-            q."Quantidade" AS "Edital",
-            COALESCE(cr."QtdReal", 0) AS "Real",
-            (COALESCE(cr."QtdReal", 0) - q."Quantidade") AS "Saldo"
-        FROM "QuadroEdital" q
-        JOIN "Unidades" u ON q."UnidadeID" = u."UnidadeID"
-        JOIN "Cargos" c ON q."CargoID" = c."CargoID"
-        LEFT JOIN ContagemReal cr ON q."UnidadeID" = cr."UnidadeID" AND q."CargoID" = cr."CargoID"
-        WHERE q."UnidadeID" = :uid
-        ORDER BY c."NomeCargo";
-        """
-        
-        q_pessoas = """
-        SELECT c."NomeCargo" as "Cargo", col."Nome" as "Funcionario", col."ColaboradorID" as "ID"
-        FROM "Colaboradores" col
-        JOIN "Cargos" c ON col."CargoID" = c."CargoID"
-        WHERE col."UnidadeID" = :uid AND col."Ativo" = TRUE
-        ORDER BY c."NomeCargo", col."Nome"
-        """
-
-        df_resumo = conn.query(q_resumo, params={"uid": int(unidade_id)}, ttl=0)
-        df_pessoas = conn.query(q_pessoas, params={"uid": int(unidade_id)}, ttl=0)
-        
-        if not df_pessoas.empty:
-            df_pessoas['ID'] = pd.to_numeric(df_pessoas['ID'], errors='coerce').fillna(0).astype(int)
-
-        return df_resumo, df_pessoas
-    except Exception as e:
-        return pd.DataFrame(), pd.DataFrame()
+# Quadro (edital x real) e lista nominal de TODAS as unidades num único comando; o detalhe da escola
+# lê da memória em vez de consultar o banco a cada clique.
+# Contagem mantida por triggers (sql/001_contagem_colaboradores.sql); recontagem se a migração não rodou
+SQL_CONTAGEM = 'SELECT "UnidadeID", "CargoID", "QtdAtivos" AS "QtdReal" FROM "ContagemColaboradores"'
+SQL_RECONTAGEM = """
+    SELECT "UnidadeID", "CargoID", COUNT(*) as "QtdReal"
+    FROM "Colaboradores"
+    WHERE "Ativo" = TRUE
+    GROUP BY "UnidadeID", "CargoID"
+"""
+SQL_BASE_CONAE = """
+WITH ContagemReal AS (
+    {contagem}
+),
+Quadro AS (
+    SELECT 
+        q."UnidadeID",
+        c."NomeCargo" AS "Cargo", 
+        q."Quantidade" AS "Edital",
+        COALESCE(cr."QtdReal", 0) AS "Real",
+        (COALESCE(cr."QtdReal", 0) - q."Quantidade") AS "Saldo"
+    FROM "QuadroEdital" q
+    JOIN "Unidades" u ON q."UnidadeID" = u."UnidadeID"
+    JOIN "Cargos" c ON q."CargoID" = c."CargoID"
+    LEFT JOIN ContagemReal cr ON q."UnidadeID" = cr."UnidadeID" AND q."CargoID" = cr."CargoID"
+),
+Pessoas AS (
+    SELECT 
+        u."NomeUnidade" as "Escola_DB",
+        COALESCE(s."NomeSupervisor", 'Não Identificado') as "Supervisor_DB",
+        c."NomeCargo" as "Cargo", 
+        col."Nome" as "Funcionario", 
+        col."ColaboradorID" as "ID",
+        col."UnidadeID"
+    FROM "Colaboradores" col
+    JOIN "Unidades" u ON col."UnidadeID" = u."UnidadeID"
+    JOIN "Cargos" c ON col."CargoID" = c."CargoID"
+    LEFT JOIN "Supervisores" s ON u."SupervisorID" = s."SupervisorID"
+    WHERE col."Ativo" = TRUE
+)
+SELECT
+    (SELECT json_agg(Quadro) FROM Quadro) AS quadro,
+    (SELECT json_agg(Pessoas) FROM Pessoas) AS pessoas
+"""
 
 @st.cache_data(ttl=300)
-def fetch_censo_completo_conae():
+def fetch_base_conae():
     """
-    Busca TODOS os funcionários ativos de TODAS as escolas para diagnóstico global.
+    Busca TODOS os funcionários ativos e o quadro de TODAS as escolas (uma ida ao banco).
+    Retorna (df_quadro, df_censo); df_censo alimenta o diagnóstico global.
     """
     try:
-        conn = st.connection("postgres", type="sql")
-        query = """
-        SELECT 
-            u."NomeUnidade" as "Escola_DB",
-            s."NomeSupervisor" as "Supervisor_DB",
-            c."NomeCargo" as "Cargo", 
-            col."Nome" as "Funcionario", 
-            col."ColaboradorID" as "ID",
-            col."UnidadeID"
-        FROM "Colaboradores" col
-        JOIN "Unidades" u ON col."UnidadeID" = u."UnidadeID"
-        JOIN "Cargos" c ON col."CargoID" = c."CargoID"
-        JOIN "Supervisores" s ON u."SupervisorID" = s."SupervisorID"
-        WHERE col."Ativo" = TRUE
-        """
-        df = conn.query(query, ttl=0)
+        conn = obter_conexao()
+        try:
+            linha = conn.query(SQL_BASE_CONAE.format(contagem=SQL_CONTAGEM), ttl=0).iloc[0]
+        except Exception:
+            linha = conn.query(SQL_BASE_CONAE.format(contagem=SQL_RECONTAGEM), ttl=0).iloc[0]
+
+        df_quadro = pd.DataFrame(linha['quadro'] or [], columns=['UnidadeID', 'Cargo', 'Edital', 'Real', 'Saldo'])
+        df = pd.DataFrame(linha['pessoas'] or [], columns=['Escola_DB', 'Supervisor_DB', 'Cargo', 'Funcionario', 'ID', 'UnidadeID'])
+        for d in (df_quadro, df):
+            d['UnidadeID'] = pd.to_numeric(d['UnidadeID'], errors='coerce').fillna(0).astype(int)
         df['ID'] = pd.to_numeric(df['ID'], errors='coerce').fillna(0).astype(int)
-        df['UnidadeID'] = pd.to_numeric(df['UnidadeID'], errors='coerce').fillna(0).astype(int)
-        return df
+
+        carregado_em = time.time()  # versão da carga (chave do índice e do cache de divergências)
+        df_quadro.attrs['carregado_em'] = df.attrs['carregado_em'] = carregado_em
+        return df_quadro, df
     except Exception as e:
         st.error(f"Erro ao buscar censo completo: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame()
+
+def fetch_censo_completo_conae():
+    """Funcionários ativos de todas as escolas (diagnóstico global)."""
+    return fetch_base_conae()[1]
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _indexar_base_conae(carregado_em, _df_quadro, _df_censo):
+    """Ordena por UnidadeID uma vez e guarda UnidadeID -> fatia; compartilhado entre sessões sem cópia."""
+    def fatias(df, ordem):
+        if df.empty:
+            return df, {}
+        df = df.sort_values(['UnidadeID'] + ordem, ignore_index=True)
+        uids = df['UnidadeID'].to_numpy()
+        inicios = np.flatnonzero(np.r_[True, uids[1:] != uids[:-1]])
+        fins = np.r_[inicios[1:], len(uids)]
+        return df, {int(uids[i]): (int(i), int(j)) for i, j in zip(inicios, fins)}
+
+    quadro, pos_quadro = fatias(_df_quadro, ['Cargo'])
+    pessoas, pos_pessoas = fatias(_df_censo, ['Cargo', 'Funcionario'])
+    return {'quadro': quadro, 'pos_quadro': pos_quadro, 'pessoas': pessoas, 'pos_pessoas': pos_pessoas}
+
+def indice_conae():
+    df_quadro, df_censo = fetch_base_conae()
+    return _indexar_base_conae(df_censo.attrs.get('carregado_em'), df_quadro, df_censo)
+
+def fetch_dados_conae_local(unidade_id):
+    """Comparativo unitário (detalhe da escola), servido do índice em memória."""
+    idx = indice_conae()
+    uid = int(unidade_id)
+    if uid not in idx['pos_quadro']:
+        return pd.DataFrame(), pd.DataFrame()
+    i, j = idx['pos_quadro'][uid]
+    df_resumo = idx['quadro'].iloc[i:j][['Cargo', 'Edital', 'Real', 'Saldo']]
+    i, j = idx['pos_pessoas'].get(uid, (0, 0))
+    df_pessoas = idx['pessoas'].iloc[i:j][['Cargo', 'Funcionario', 'ID']]
+    return df_resumo, df_pessoas
 
 # ==============================================================================
 # 4. API REQUISITION
 # ==============================================================================
-def fetch_mesa_operacional(data_selecionada):
-    url = "https://portalgestor.teknisa.com/backend/index.php/getMesaOperacoes"
-    data_str = data_selecionada.strftime("%d/%m/%Y")
-    params = {
-        "requestType": "FilterData",
-        "DIA": data_str,
-        "NRESTRUTURAM": "101091998", 
-        "NRORG": NR_ORG,
-        "CDOPERADOR": CD_OPERADOR
-    }
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json",
-        "OAuth-Token": TOKEN_FIXO,
-        "OAuth-Cdoperador": CD_OPERADOR,
-        "OAuth-Nrorg": NR_ORG
+def requisitar_mesa_operacional(data_selecionada, nr_estrutura=NRESTRUTURAM_PADRAO):
+    """
+    Chamada crua ao getMesaOperacoes (sem st.*, roda também na thread do coletor).
+    Retorna (df, sha1 do payload); levanta exceção em erro HTTP/rede ou JSON inválido.
+    """
+    return buscar_mesa_operacoes(CRED_PORTAL, data_selecionada, nr_estrutura)
+
+# ==============================================================================
+# 4.1 COLETOR EM SEGUNDO PLANO (SNAPSHOT COMPARTILHADO ENTRE SESSÕES)
+# ==============================================================================
+# Uma thread por processo coleta cada (data, NRESTRUTURAM) que alguma sessão está olhando.
+# As sessões só leem o último snapshot: N supervisores na mesma data = 1 chamada à API.
+INTERVALO_COLETA = 120     # s entre coletas da data de hoje (datas passadas não mudam: só no "Atualizar")
+TTL_INTERESSE = 900        # chave sem leitura há 15 min sai da fila de coleta
+MAX_SNAPSHOTS = 8
+
+@st.cache_resource
+def _coletor_mesa():
+    estado = {
+        'lock': threading.Lock(),
+        'snapshots': {},     # chave -> {'df', 'versao', 'assinatura', 'coletado_em', 'coletado_ts', 'duracao', 'erro'}
+        'interesse': {},     # chave -> último time.time() em que uma sessão leu
+        'locks_chave': {},   # chave -> Lock (uma coleta por vez por chave; nunca removido)
+        'ultima_versao': 0,  # contador do processo: versão nunca se repete, nem após descarte da chave
+        'serie_ts': {},      # chave -> time.time() da última gravação na série
+        'engine': None,
     }
+
+    def laco():
+        while True:
+            time.sleep(5)
+            try:
+                agora = time.time()
+                with estado['lock']:
+                    for chave in [c for c, t in estado['interesse'].items() if agora - t > TTL_INTERESSE]:
+                        del estado['interesse'][chave]
+                    pendentes = [
+                        c for c in estado['interesse']
+                        if c[0] >= date.today() and (
+                            c not in estado['snapshots'] or agora - estado['snapshots'][c]['coletado_ts'] >= INTERVALO_COLETA
+                        )
+                    ]
+                for chave in pendentes:
+                    _coletar(estado, chave)
+            except Exception as e:
+                print(f"Erro no coletor da Mesa: {e}")
+
+    # Engine capturada aqui (thread da sessão); a thread do coletor grava a série por ela
+    try: estado['engine'] = obter_conexao().engine
+    except Exception as e: print(f"Coletor sem banco para a série: {e}")
+
+    threading.Thread(target=laco, name="coletor-mesa-operacional", daemon=True).start()
+    return estado
+
+def _coletar(estado, chave, desde=None):
+    """
+    Coleta a chave e publica nova versão se o payload mudou.
+    desde: se outra sessão/thread coletou depois desse instante enquanto esperávamos o lock, reaproveita.
+    """
+    with estado['lock']:
+        lock_chave = estado['locks_chave'].setdefault(chave, threading.Lock())
+    with lock_chave:
+        with estado['lock']:
+            anterior = estado['snapshots'].get(chave)
+        if desde is not None and anterior and anterior['coletado_ts'] >= desde:
+            return anterior
+
+        inicio = time.time()
+        try:
+            df, assinatura = requisitar_mesa_operacional(chave[0], chave[1])
+            mudou = anterior is None or anterior['assinatura'] != assinatura
+            if mudou:
+                with estado['lock']:
+                    estado['ultima_versao'] += 1
+                    versao = estado['ultima_versao']
+            novo = {
+                'df': df if mudou else anterior['df'],
+                'versao': versao if mudou else anterior['versao'],
+                'assinatura': assinatura, 'erro': None,
+            }
+        except Exception as e:
+            print(f"Erro coletando Mesa {chave}: {e}")
+            novo = {
+                'df': anterior['df'] if anterior else None,
+                'versao': anterior['versao'] if anterior else 0,
+                'assinatura': anterior['assinatura'] if anterior else None,
+                'erro': str(e),
+            }
+        novo.update(coletado_em=datetime.now(), coletado_ts=time.time(), duracao=time.time() - inicio)
+        if novo['erro'] is None:
+            _registrar_serie(estado, chave, novo)
+
+        with estado['lock']:
+            estado['snapshots'][chave] = novo
+            if len(estado['snapshots']) > MAX_SNAPSHOTS:
+                # Descarta as chaves lidas há mais tempo (as sem interesse primeiro).
+                # O lock da chave fica: outra thread pode estar coletando ou esperando por ele.
+                ordem = sorted(estado['snapshots'], key=lambda c: estado['interesse'].get(c, 0))
+                for c in ordem[:len(estado['snapshots']) - MAX_SNAPSHOTS]:
+                    estado['snapshots'].pop(c, None)
+        return novo
+
+def obter_snapshot_mesa(data_selecionada, nr_estrutura=NRESTRUTURAM_PADRAO, forcar=False):
+    """Último snapshot da chave; coleta na hora só se ainda não existe (ou forcar). Registra o interesse da sessão."""
+    estado = _coletor_mesa()
+    chave = (data_selecionada, str(nr_estrutura))
+    pedido_em = time.time()
+    with estado['lock']:
+        estado['interesse'][chave] = pedido_em
+        snap = estado['snapshots'].get(chave)
+    if snap is None or forcar:
+        snap = _coletar(estado, chave, desde=pedido_em if forcar else 0)
+    return snap
+
+# ==============================================================================
+# 4.2 SÉRIE HISTÓRICA (MesaSerieStatus)
+# ==============================================================================
+# Cada coleta vira linhas estreitas (unidade, status, qtd), no máximo a cada INTERVALO_SERIE
+# por chave: curvas intradiárias e comparação entre dias sem voltar à API.
+INTERVALO_SERIE = 600
+
+SQL_INSERIR_SERIE = """
+INSERT INTO "MesaSerieStatus" ("NrEstrutura", "DataRef", "ColetadoEm", "UnidadeID", "Status", "Qtd")
+VALUES (:estr, :dia, :coletado, :uid, :status, :qtd)
+ON CONFLICT DO NOTHING
+"""
+
+def _registrar_serie(estado, chave, snap):
+    if estado.get('engine') is None or snap['df'] is None:
+        return
+    if time.time() - estado['serie_ts'].get(chave, 0) < INTERVALO_SERIE:
+        return
+    try:
+        dia, estr = chave
+        df_cont = resumir_status_por_unidade(snap['df'], dia, snap['coletado_em'])
+        if df_cont.empty:
+            return
+        linhas = [
+            {'estr': int(estr), 'dia': dia, 'coletado': snap['coletado_em'].replace(microsecond=0),
+             'uid': int(u), 'status': int(c), 'qtd': int(q)}
+            for u, c, q in df_cont[['UnidadeID', 'Status', 'Qtd']].itertuples(index=False)
+        ]
+        with estado['engine'].begin() as c:
+            c.execute(text(SQL_INSERIR_SERIE), linhas)
+        estado['serie_ts'][chave] = time.time()
+    except Exception as e:
+        print(f"Erro gravando série da Mesa {chave}: {e}")
+
+def _sql_serie(filtrar_supervisor, filtrar_unidade, ultimo_do_dia):
+    """
+    ultimo_do_dia=False -> curva do dia (:dia) por horário de coleta, só coletas feitas no próprio dia
+    ultimo_do_dia=True  -> uma linha por dia desde :ini, usando a última coleta de cada dia
+    """
+    filtros = []
+    if filtrar_supervisor: filtros.append('s."NomeSupervisor" = :sup')
+    if filtrar_unidade: filtros.append('m."UnidadeID" = :uid')
+    filtro = ''.join(f' AND {f}' for f in filtros)
+    if ultimo_do_dia:
+        return f"""
+        WITH Ultimas AS (
+            SELECT "DataRef", MAX("ColetadoEm") AS "ColetadoEm"
+            FROM "MesaSerieStatus"
+            WHERE "NrEstrutura" = :estr AND "DataRef" >= :ini
+            GROUP BY "DataRef"
+        )
+        SELECT m."DataRef" AS "Eixo", m."Status", SUM(m."Qtd") AS "Qtd"
+        FROM "MesaSerieStatus" m
+        JOIN Ultimas ul ON ul."DataRef" = m."DataRef" AND ul."ColetadoEm" = m."ColetadoEm"
+        LEFT JOIN "Unidades" u ON u."UnidadeID" = m."UnidadeID"
+        LEFT JOIN "Supervisores" s ON s."SupervisorID" = u."SupervisorID"
+        WHERE m."NrEstrutura" = :estr {filtro}
+        GROUP BY 1, 2 ORDER BY 1
+        """
+    return f"""
+    SELECT m."ColetadoEm" AS "Eixo", m."Status", SUM(m."Qtd") AS "Qtd"
+    FROM "MesaSerieStatus" m
+    LEFT JOIN "Unidades" u ON u."UnidadeID" = m."UnidadeID"
+    LEFT JOIN "Supervisores" s ON s."SupervisorID" = u."SupervisorID"
+    WHERE m."NrEstrutura" = :estr AND m."DataRef" = :dia
+      AND CAST(m."ColetadoEm" AS DATE) = m."DataRef" {filtro}
+    GROUP BY 1, 2 ORDER BY 1
+    """
+
+@st.cache_data(ttl=120, show_spinner=False)
+def fetch_serie_mesa(dia=None, desde=None, supervisor=None, unidade_id=None, nr_estrutura=NRESTRUTURAM_PADRAO):
+    """Série pivotada: Eixo | Presentes | Faltas | A_Iniciar | Sem_Escala | Presenca_% (Presentes / (Presentes + Faltas))."""
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=30)
-        if r.status_code == 200:
-            data = r.json()
-            if "dataset" in data and "data" in data["dataset"]:
-                return pd.DataFrame(data["dataset"]["data"])
+        conn = obter_conexao()
+        params = {'estr': int(nr_estrutura), 'dia': dia, 'ini': desde, 'sup': supervisor,
+                  'uid': int(unidade_id) if unidade_id else None}
+        df = conn.query(_sql_serie(bool(supervisor), bool(unidade_id), desde is not None), params=params, ttl=0)
     except Exception as e:
-        st.error(f"Erro API: {e}")
-    return pd.DataFrame()
+        print(f"Erro lendo série da Mesa: {e}")
+        return pd.DataFrame()
+    if df.empty:
+        return df
+    nomes = {1: 'Presentes', 2: 'Faltas', 3: 'A_Iniciar', 4: 'Sem_Escala'}
+    df_piv = (df.pivot_table(index='Eixo', columns='Status', values='Qtd', aggfunc='sum', fill_value=0)
+                .reindex(columns=list(nomes), fill_value=0).rename(columns=nomes)
+                .rename_axis(columns=None).reset_index())
+    base = (df_piv['Presentes'] + df_piv['Faltas']).replace(0, np.nan)
+    df_piv['Presenca_%'] = (df_piv['Presentes'] / base * 100).round(1).fillna(0)
+    return df_piv
 
 # ==============================================================================
 # 5. PROCESSAMENTO E LÓGICA
 # ==============================================================================
-def processar_dados_unificados(df_api, df_unidades, map_telefones, data_analise):
-    if df_api.empty: return df_api
-
-    if 'NMSITUFUNCH' in df_api.columns:
-        df_api = df_api[df_api['NMSITUFUNCH'] == 'Atividade Normal'].copy()
-    
-    if df_api.empty: return df_api
-
-    # Ajuste IDs e Tipos
-    df_api['UnidadeID'] = pd.to_numeric(df_api['NRESTRUTGEREN'], errors='coerce').fillna(0).astype(int)
-    
-    # Merge com Unidades
-    df_merged = pd.merge(df_api, df_unidades, on="UnidadeID", how="left")
-    
-    # Fallback de nome de escola se a API não trouxe ou para garantir o nome interno
-    if 'NomeUnidade' in df_merged.columns:
-        df_merged['Escola_Interna'] = df_merged['NomeUnidade']
-    
-    df_merged['Supervisor'] = df_merged['Supervisor'].fillna("Não Identificado")
-    df_merged['Supervisor_Key'] = df_merged['Supervisor'].str.strip().str.upper()
-    df_merged['Celular'] = df_merged['Supervisor_Key'].map(map_telefones)
-
-    df_merged = df_merged.rename(columns={
-        'NMESTRUTGEREN': 'Escola_API', 
-        'NMVINCULOM': 'Funcionario',
-        'NRVINCULOM': 'ID', 
-        'NMOCUPACAOH': 'Cargo',
-        'horas_trabalhadas': 'Batidas',
-        'horas_escala': 'Escala',
-        'OBSERVACAO': 'Obs'
-    })
-
-    df_merged['ID'] = pd.to_numeric(df_merged['ID'], errors='coerce').fillna(0).astype(int)
-    df_merged['Escola'] = df_merged['Escola_API'] # Usa o nome da API por padrão na visualização
-
-    # Horários e Status
-    hoje = date.today()
-    agora = datetime.now().time()
-    eh_hoje = (data_analise == hoje)
-    eh_passado = (data_analise < hoje)
-    
-    def extrair_hora_inicio(lista_escala):
-        if not isinstance(lista_escala, list) or not lista_escala: return None
-        try:
-            str_hora = lista_escala[0][0] 
-            h, m = map(int, str_hora.split(':'))
-            return time(h, m)
-        except: return None
-
-    def get_status(row):
-        batidas = row.get('Batidas')
-        escala = row.get('Escala')
-        tem_batida = isinstance(batidas, list) and len(batidas) > 0
-        if tem_batida: return '🟢 Presente'
-        tem_escala = isinstance(escala, list) and len(escala) > 0
-        if tem_escala:
-            if eh_passado: return '🔴 Falta'
-            if eh_hoje:
-                hora_inicio = extrair_hora_inicio(escala)
-                if hora_inicio:
-                    if agora >= hora_inicio: return '🔴 Falta'
-                    else: return '⏳ A Iniciar'
-                else: return '🔴 Falta'
-            return '⏳ A Iniciar'
-        return '🟡 S/ Escala'
-
-    df_merged['Status_Individual'] = df_merged.apply(get_status, axis=1)
-
-    def format_hora(lista):
-        if not isinstance(lista, list) or not lista: return "-"
-        try: return " | ".join([f"{x[0]}-{x[1]}" for x in lista if len(x) == 2])
-        except: return "-"
-
-    df_merged['Escala_Formatada'] = df_merged['Escala'].apply(format_hora)
-    df_merged['Ponto_Real'] = df_merged['Batidas'].apply(format_hora)
-    
-    return df_merged
+# Regras de status, resumo por escola, alertas e divergências ficam em core/mesa.py
 
 # ==============================================================================
 # 6. DIAGNÓSTICO GLOBAL
 # ==============================================================================
+@st.cache_data(max_entries=4, show_spinner=False)
+def divergencias_do_snapshot(versao, _df_mesa, _df_banco):
+    """Cache por (versão do snapshot da Mesa, carga do censo): reabrir o diagnóstico/detalhe não recalcula."""
+    return calcular_divergencias(_df_mesa, _df_banco)
+
+def obter_divergencias(df_mesa, df_banco):
+    versao = (st.session_state.get('mesa_versao'), df_banco.attrs.get('carregado_em'))
+    return divergencias_do_snapshot(versao, df_mesa, df_banco)
+
 @st.dialog("📊 Diagnóstico Global de Divergências", width="large")
 def modal_diagnostico_global(df_mesa):
     st.caption("Comparação completa entre Funcionários na API (Mesa) e Funcionários Ativos no Banco de Dados.")
@@ -265,68 +417,49 @@ def modal_diagnostico_global(df_mesa):
         st.error("Não há dados da Mesa Operacional carregados. Aguarde o processamento da tela principal.")
         return
 
-    # --- PROCESSAMENTO DAS DIVERGÊNCIAS ---
-    divergencias = []
-
-    # 1. Agrupar Mesa por Escola (ID) para comparação eficiente
-    # Criamos um set de IDs presentes na mesa
-    ids_mesa_ativos = set(df_mesa[df_mesa['ID'] > 0]['ID'].unique())
-    
-    # 2. Agrupar Banco
-    ids_banco_ativos = set(df_banco[df_banco['ID'] > 0]['ID'].unique())
-
-    # --- CASO A: NO BANCO MAS NÃO NA MESA ---
-    # Colaboradores ativos no DB que não apareceram na lista da API hoje
-    diff_banco_mesa = list(ids_banco_ativos - ids_mesa_ativos)
-    
-    if diff_banco_mesa:
-        # Filtra os detalhes desses IDs no dataframe do banco
-        df_missing_mesa = df_banco[df_banco['ID'].isin(diff_banco_mesa)].copy()
-        df_missing_mesa['Tipo_Divergencia'] = "⚠️ No Banco, Fora da Mesa"
-        df_missing_mesa = df_missing_mesa[['Escola_DB', 'Supervisor_DB', 'Tipo_Divergencia', 'ID', 'Funcionario', 'Cargo']]
-        # Renomear para padronizar
-        df_missing_mesa.columns = ['Escola', 'Supervisor', 'Divergencia', 'Matricula', 'Funcionario', 'Cargo']
-        divergencias.append(df_missing_mesa)
-
-    # --- CASO B: NA MESA MAS NÃO NO BANCO ---
-    # Colaboradores que estão na escala da API mas não constam como ativos no DB
-    diff_mesa_banco = list(ids_mesa_ativos - ids_banco_ativos)
-    
-    if diff_mesa_banco:
-        df_missing_banco = df_mesa[df_mesa['ID'].isin(diff_mesa_banco)].copy()
-        df_missing_banco['Tipo_Divergencia'] = "🚫 Na Mesa, Sem Cadastro Ativo"
-        # Tenta pegar nome da escola, priorizando o da API
-        df_missing_banco = df_missing_banco[['Escola', 'Supervisor', 'Tipo_Divergencia', 'ID', 'Funcionario', 'Cargo']]
-        df_missing_banco.columns = ['Escola', 'Supervisor', 'Divergencia', 'Matricula', 'Funcionario', 'Cargo']
-        divergencias.append(df_missing_banco)
+    # --- PROCESSAMENTO DAS DIVERGÊNCIAS (motor compartilhado, em cache por snapshot) ---
+    # Classe 3: mesma matrícula, UnidadeID diferente entre banco e Mesa (lotado numa escola, escalado em outra)
+    df_div = obter_divergencias(df_mesa, df_banco)
 
     # --- CONSOLIDAÇÃO ---
-    if divergencias:
-        df_final = pd.concat(divergencias, ignore_index=True)
-        # Ordenar
-        df_final = df_final.sort_values(by=['Divergencia', 'Escola', 'Funcionario'])
+    if not df_div.empty:
+        df_final = df_div.assign(
+            Divergencia=df_div['Classe'].map(ROTULO_DIVERGENCIA),
+            Escola_Mesa=df_div['Escola_Mesa'].where(df_div['Classe'] == DIV_ESCOLA, "")
+        )
+        df_final = df_final.sort_values(by=['Classe', 'Escola', 'Funcionario'])
         
         # Métricas
-        qtd_banco_fora = len(df_final[df_final['Divergencia'].str.contains("No Banco")])
-        qtd_mesa_fora = len(df_final[df_final['Divergencia'].str.contains("Na Mesa")])
+        contagem = df_final['Classe'].value_counts()
+        qtd_banco_fora = int(contagem.get(DIV_FORA_MESA, 0))
+        qtd_mesa_fora = int(contagem.get(DIV_SEM_CADASTRO, 0))
+        qtd_escola = int(contagem.get(DIV_ESCOLA, 0))
         
-        c1, c2 = st.columns(2)
+        c1, c2, c3 = st.columns(3)
         c1.metric("Faltando na Mesa (Erro Integração?)", qtd_banco_fora, delta_color="inverse")
         c2.metric("Sobrando na Mesa (Inativo/Sem Cadastro?)", qtd_mesa_fora, delta_color="inverse")
+        c3.metric("Escola Divergente (Lotação ≠ Escala)", qtd_escola, delta_color="inverse")
         
         st.markdown("---")
         
         # Filtros no Modal
-        f_sup = st.selectbox("Filtrar Supervisor (Relatório):", ["Todos"] + sorted(df_final['Supervisor'].unique()))
+        f1, f2 = st.columns(2)
+        f_sup = f1.selectbox("Filtrar Supervisor (Relatório):", ["Todos"] + sorted(df_final['Supervisor'].unique()))
+        f_tipo = f2.multiselect("Tipos de Divergência:", list(ROTULO_DIVERGENCIA), default=list(ROTULO_DIVERGENCIA),
+                                format_func=ROTULO_DIVERGENCIA.get)
         if f_sup != "Todos":
             df_final = df_final[df_final['Supervisor'] == f_sup]
+        df_final = df_final[df_final['Classe'].isin(f_tipo)]
+        df_final = df_final[['Escola', 'Supervisor', 'Divergencia', 'Matricula', 'Funcionario', 'Cargo', 'Escola_Mesa']]
 
         st.dataframe(
             df_final,
             use_container_width=True,
             hide_index=True,
             column_config={
-                "Matricula": st.column_config.NumberColumn("Matrícula", format="%d")
+                "Escola": st.column_config.TextColumn("Escola (Banco)"),
+                "Matricula": st.column_config.NumberColumn("Matrícula", format="%d"),
+                "Escola_Mesa": st.column_config.TextColumn("Escalado na Mesa em")
             }
         )
         
@@ -344,6 +477,57 @@ def modal_diagnostico_global(df_mesa):
         st.success("🎉 Incrível! Nenhuma divergência encontrada entre Mesa e Banco de Dados.")
 
 
+# ==============================================================================
+# 6.1 TENDÊNCIAS (SÉRIE HISTÓRICA)
+# ==============================================================================
+JANELAS_TENDENCIA = {"7 dias": 7, "14 dias": 14, "30 dias": 30, "90 dias": 90}
+
+@st.dialog("📈 Tendências de Presença", width="large")
+def modal_tendencias(data_ref):
+    st.caption("Curvas a partir das coletas gravadas (MesaSerieStatus), sem nova consulta à API.")
+    df_unidades, _ = fetch_dados_auxiliares_db()
+
+    c1, c2 = st.columns(2)
+    sups = sorted(df_unidades['Supervisor'].dropna().unique()) if not df_unidades.empty else []
+    f_sup = c1.selectbox("Supervisor:", ["Todos"] + sups, key="tend_sup")
+    df_esc = df_unidades if f_sup == "Todos" else df_unidades[df_unidades['Supervisor'] == f_sup]
+    mapa_esc = dict(zip(df_esc['NomeUnidade'], df_esc['UnidadeID'])) if not df_esc.empty else {}
+    f_esc = c2.selectbox("Escola:", ["Todas"] + sorted(mapa_esc), key="tend_esc")
+    sup = None if f_sup == "Todos" else f_sup
+    uid = None if f_esc == "Todas" else mapa_esc[f_esc]
+
+    tab_dia, tab_dias = st.tabs(["🕒 Intradiário", "📅 Dia a Dia"])
+
+    with tab_dia:
+        df_dia = fetch_serie_mesa(dia=data_ref, supervisor=sup, unidade_id=uid)
+        if df_dia.empty:
+            st.info(f"Nenhuma coleta gravada em {data_ref.strftime('%d/%m/%Y')}.")
+        else:
+            fig = px.line(df_dia, x='Eixo', y=['Presentes', 'Faltas', 'A_Iniciar'], markers=True,
+                          labels={'Eixo': 'Horário da coleta', 'value': 'Colaboradores', 'variable': ''})
+            st.plotly_chart(fig, use_container_width=True)
+            fig_p = px.line(df_dia, x='Eixo', y='Presenca_%', markers=True,
+                            labels={'Eixo': 'Horário da coleta', 'Presenca_%': 'Presença (%)'})
+            fig_p.update_yaxes(range=[0, 105])
+            st.plotly_chart(fig_p, use_container_width=True)
+
+    with tab_dias:
+        janela = st.selectbox("Período:", list(JANELAS_TENDENCIA), index=1, key="tend_janela")
+        desde = data_ref - timedelta(days=JANELAS_TENDENCIA[janela])
+        df_dias = fetch_serie_mesa(desde=desde, supervisor=sup, unidade_id=uid)
+        if df_dias.empty:
+            st.info("Sem histórico gravado no período.")
+        else:
+            st.caption("Última coleta de cada dia.")
+            fig = px.bar(df_dias, x='Eixo', y=['Presentes', 'Faltas'], barmode='group',
+                         labels={'Eixo': 'Dia', 'value': 'Colaboradores', 'variable': ''})
+            st.plotly_chart(fig, use_container_width=True)
+            df_tab = df_dias.sort_values('Eixo', ascending=False).rename(columns={'Eixo': 'Dia'})
+            df_tab['Δ Faltas'] = df_tab['Faltas'] - df_tab['Faltas'].shift(-1)
+            st.dataframe(df_tab, use_container_width=True, hide_index=True,
+                         column_config={"Presenca_%": st.column_config.NumberColumn("Presença", format="%.1f%%"),
+                                        "Δ Faltas": st.column_config.NumberColumn("Δ Faltas (dia anterior)", format="%+d")})
+
 # ==============================================================================
 # 7. UI - SIDEBAR
 # ==============================================================================
@@ -367,7 +551,10 @@ if st.session_state['mesa_data_ref'] != data_selecionada:
 
 if st.sidebar.button("🔄 Atualizar Dados", use_container_width=True):
     st.session_state['mesa_dados'] = None
-    st.cache_data.clear()
+    st.session_state['mesa_forcar_coleta'] = True
+    # Limpa só os caches desta página (st.cache_data.clear() afetaria todas as páginas e usuários)
+    fetch_dados_auxiliares_db.clear()
+    fetch_base_conae.clear()
     st.rerun()
 
 st.sidebar.divider()
@@ -384,17 +571,31 @@ if st.sidebar.button("🏥 Diagnóstico Geral", use_container_width=True):
     else:
         st.sidebar.warning("⚠️ Carregue os dados primeiro (Aguarde o processamento da tela principal).")
 
+if st.sidebar.button("📈 Tendências", use_container_width=True):
+    abriu_modal_diagnostico = True
+    modal_tendencias(data_selecionada)
+
 # ==============================================================================
 # 8. CARREGAMENTO DOS DADOS
 # ==============================================================================
-if st.session_state['mesa_dados'] is None:
-    with st.spinner(f"Buscando dados de {data_selecionada.strftime('%d/%m/%Y')}..."):
-        df_unidades, map_telefones = fetch_dados_auxiliares_db()
-        raw_api = fetch_mesa_operacional(data_selecionada)
-        df_proc = processar_dados_unificados(raw_api, df_unidades, map_telefones, data_selecionada)
-        
-        st.session_state['mesa_dados'] = df_proc
-        st.session_state['mesa_data_ref'] = data_selecionada
+# Snapshot compartilhado (coletor em segundo plano); a sessão só reprocessa quando sai versão nova
+forcar_coleta = st.session_state.pop('mesa_forcar_coleta', False)
+with st.spinner(f"Buscando dados de {data_selecionada.strftime('%d/%m/%Y')}..."):
+    snap = obter_snapshot_mesa(data_selecionada, forcar=forcar_coleta)
+
+versao_snap = (data_selecionada, snap['versao'])
+if st.session_state['mesa_dados'] is None or st.session_state.get('mesa_versao') != versao_snap:
+    df_unidades, map_telefones = fetch_dados_auxiliares_db()
+    raw_api = snap['df'] if snap['df'] is not None else pd.DataFrame()
+    df_proc = processar_dados_unificados(raw_api, df_unidades, map_telefones, data_selecionada)
+    
+    st.session_state['mesa_dados'] = df_proc
+    st.session_state['mesa_data_ref'] = data_selecionada
+    st.session_state['mesa_versao'] = versao_snap
+    st.session_state['mesa_alertas'] = montar_alertas(df_proc, datetime.now())
+
+    # Pré-carga do quadro/lista nominal de todas as unidades (detalhe da escola e diagnóstico leem daqui)
+    indice_conae()
 
 df = st.session_state['mesa_dados']
 data_exibicao = st.session_state['mesa_data_ref'].strftime("%d/%m/%Y")
@@ -403,105 +604,41 @@ data_exibicao = st.session_state['mesa_data_ref'].strftime("%d/%m/%Y")
 # 9. DASHBOARD PRINCIPAL
 # ==============================================================================
 st.title("📉 Monitoramento de Faltas")
-st.caption(f"Dados referentes a: **{data_exibicao}**")
 
-# FUNCIONALIDADE WHATSAPP (HELPER)
-def gerar_link_whatsapp(telefone, mensagem):
-    texto_encoded = urllib.parse.quote_plus(mensagem)
-    fone_limpo = "".join(filter(str.isdigit, str(telefone))) if telefone else ""
-    return f"https://api.whatsapp.com/send?phone=55{fone_limpo}&text={texto_encoded}"
+idade_seg = int(time.time() - snap['coletado_ts'])
+idade = "agora" if idade_seg < 60 else f"há {idade_seg // 60} min"
+st.caption(f"Dados referentes a: **{data_exibicao}** · 🛰️ Coletado às {snap['coletado_em'].strftime('%H:%M:%S')} ({idade}) · versão {snap['versao']}")
+if snap['erro']:
+    if snap['df'] is None:
+        st.error(f"Erro API: {snap['erro']}")
+    else:
+        st.warning(f"⚠️ Última coleta falhou ({snap['erro']}). Exibindo a versão {snap['versao']}.")
 
 # --- FUNÇÃO DO POPUP DE ALERTA ---
 @st.dialog("📢 Central de Alertas", width="large")
-def dialog_disparar_alertas(df_completo):
+def dialog_disparar_alertas(alertas):
     st.caption("Envie mensagens para os supervisores. Prioriza escolas com problema de registro.")
     
-    # 1. Filtra apenas as linhas com FALTA
-    df_faltas_bruto = df_completo[df_completo['Status_Individual'] == '🔴 Falta']
-    
-    if df_faltas_bruto.empty:
+    if not alertas:
         st.success("🎉 Nenhuma falta registrada para alerta no momento!")
         return
 
-    supervisores_com_falta = sorted(df_faltas_bruto['Supervisor'].unique())
-    
-    for supervisor in supervisores_com_falta:
+    # Payloads prontos (montar_alertas, uma vez por snapshot): aqui só renderiza
+    for alerta in alertas:
         with st.container(border=True):
             c1, c2 = st.columns([3, 1])
             
-            # Dados deste supervisor
-            df_sup_faltas = df_faltas_bruto[df_faltas_bruto['Supervisor'] == supervisor]
-            df_sup_total = df_completo[df_completo['Supervisor'] == supervisor]
-            
-            # --- PREPARAÇÃO DOS DADOS (PARA ORDENAÇÃO) ---
-            escolas_list = []
-            
-            # Itera sobre cada escola que tem falta para classificar
-            for escola, dados_falta in df_sup_faltas.groupby('Escola'):
-                # Verifica se TEM ALGUMA PRESENÇA na escola (no dataframe total)
-                tem_presenca = not df_sup_total[
-                    (df_sup_total['Escola'] == escola) & 
-                    (df_sup_total['Status_Individual'] == '🟢 Presente')
-                ].empty
-                
-                eh_problema_app = not tem_presenca
-                
-                # Lista de nomes faltantes
-                lista_nomes = dados_falta['Funcionario'].tolist()
-                
-                escolas_list.append({
-                    'nome': escola,
-                    'funcionarios': lista_nomes,
-                    'problema_app': eh_problema_app,
-                    'qtd': len(lista_nomes)
-                })
-            
-            # --- ORDENAÇÃO ---
-            escolas_list.sort(key=lambda x: x['problema_app'], reverse=True)
-            
-            # --- CÁLCULO DOS TOTALIZADORES ---
-            total_faltas = sum(e['qtd'] for e in escolas_list)
-            total_escolas_problema = sum(1 for e in escolas_list if e['problema_app'])
-            
-            # --- MONTAGEM DA MENSAGEM ---
-            msg_lines = [f"Ola *{supervisor}*, resumo de ausencias ({datetime.now().strftime('%H:%M')}):"]
-            msg_lines.append("")
-            msg_lines.append(f"\U0001F4CA *Total Faltas:* {total_faltas}")
-            if total_escolas_problema > 0:
-                msg_lines.append(f"\u26A0\uFE0F *Escolas c/ Problema App:* {total_escolas_problema}")
-            msg_lines.append("")
-            
-            for item in escolas_list:
-                nomes_str = ", ".join(item['funcionarios'])
-                if item['problema_app']:
-                    cabecalho = f"\U0001F6A8 *{item['nome']}* (\u26A0\uFE0F POSSIVEL PROBLEMA SMARTPHONE)"
-                else:
-                    cabecalho = f"\U0001F3EB *{item['nome']}*"
-                msg_lines.append(f"{cabecalho}")
-                msg_lines.append(f"\U0001F6AB {nomes_str}")
-                msg_lines.append("")
-            
-            msg_final = "\n".join(msg_lines).strip()
-            
-            # --- UI: EXIBIÇÃO NO STREAMLIT ---
-            telefone_bruto = None
-            if 'Celular' in df_sup_faltas.columns:
-                val = df_sup_faltas['Celular'].iloc[0]
-                if pd.notna(val) and str(val).strip() != "" and str(val).strip().lower() != "none":
-                    telefone_bruto = val
-            
             with c1:
-                st.markdown(f"**👤 {supervisor}**")
+                st.markdown(f"**👤 {alerta['supervisor']}**")
                 kpi1, kpi2 = st.columns(2)
-                kpi1.metric("Faltas", total_faltas)
-                kpi2.metric("Escolas Críticas", total_escolas_problema)
+                kpi1.metric("Faltas", alerta['total_faltas'])
+                kpi2.metric("Escolas Críticas", alerta['escolas_problema'])
                 with st.expander("Ver mensagem gerada"):
-                    st.text(msg_final)
+                    st.text(alerta['mensagem'])
             
             with c2:
-                if telefone_bruto:
-                    link = gerar_link_whatsapp(telefone_bruto, msg_final)
-                    st.link_button("📲 Enviar WhatsApp", link, use_container_width=True)
+                if alerta['link']:
+                    st.link_button("📲 Enviar WhatsApp", alerta['link'], use_container_width=True)
                 else:
                     st.warning("Sem Celular")
                     st.caption("Cadastre no Banco")
@@ -513,7 +650,7 @@ if df is not None and not df.empty:
         st.info("💡 Clique ao lado para notificar os supervisores sobre as faltas identificadas.")
     with c_btn2:
         if st.button("📢 Disparar Alertas", use_container_width=True):
-            dialog_disparar_alertas(df)
+            dialog_disparar_alertas(st.session_state.get('mesa_alertas') or [])
     st.markdown("---")
 
 # === FILTROS NA SIDEBAR ===
@@ -538,9 +675,10 @@ if df is not None and not df.empty:
         st.warning("Nenhum dado encontrado para o filtro selecionado.")
         st.stop()
 
-    qtd_presente = len(df_filtrado[df_filtrado['Status_Individual'] == '🟢 Presente'])
-    qtd_falta = len(df_filtrado[df_filtrado['Status_Individual'] == '🔴 Falta'])
-    qtd_a_entrar = len(df_filtrado[df_filtrado['Status_Individual'] == '⏳ A Iniciar'])
+    contagem_status = df_filtrado['Status_Individual'].value_counts()
+    qtd_presente = int(contagem_status.get(STATUS_PRESENTE, 0))
+    qtd_falta = int(contagem_status.get(STATUS_FALTA, 0))
+    qtd_a_entrar = int(contagem_status.get(STATUS_A_INICIAR, 0))
     qtd_efetivo = qtd_presente + qtd_falta + qtd_a_entrar
 
     k1, k2, k3, k4 = st.columns(4)
@@ -551,54 +689,20 @@ if df is not None and not df.empty:
     
     st.divider()
 
-    resumo = df_filtrado.groupby(['Escola', 'Supervisor']).agg(
-        Efetivo=('Status_Individual', 'count'), 
-        Faltas=('Status_Individual', lambda x: (x == '🔴 Falta').sum()),
-        Presentes=('Status_Individual', lambda x: (x == '🟢 Presente').sum()),
-        A_Entrar=('Status_Individual', lambda x: (x == '⏳ A Iniciar').sum())
-    ).reset_index()
-
-    def definir_diagnostico(row):
-        presentes = row['Presentes']
-        faltas = row['Faltas']
-        a_entrar = row['A_Entrar']
-        
-        if presentes == 0:
-            if faltas > 0: return "⚠️ POSSÍVEL PROBLEMA SMARTPHONE"
-            elif a_entrar > 0 and faltas == 0: return "🕒 AGUARDANDO INÍCIO"
-            else: return "⚠️ VERIFICAR"
-        
-        if faltas == 0:
-            if a_entrar == 0: return "🌟 ESCOLA COMPLETA"
-            else: return "✅ PARCIAL (Aguardando Tarde/Noite)"
-        
-        base_calc = presentes + faltas
-        if base_calc > 0:
-            perc = (presentes / base_calc) * 100
-            return f"{perc:.0f}% Presentes (Turno Atual)"
-        return "-"
-
-    resumo['Diagnostico'] = resumo.apply(definir_diagnostico, axis=1)
+    resumo = resumir_escolas(df_filtrado)
 
     if filtro_status == "🌟 ESCOLA COMPLETA":
-        resumo = resumo[resumo['Diagnostico'].str.contains("COMPLETA", na=False)]
+        resumo = resumo[resumo['Diag_Codigo'] == DIAG_COMPLETA]
     elif filtro_status == "⚠️ POSSÍVEL PROBLEMA SMARTPHONE":
-        resumo = resumo[resumo['Diagnostico'].str.contains("PROBLEMA", na=False)]
-
-    def get_sort_key(row):
-        d = row['Diagnostico']
-        if "PROBLEMA" in d: return 0
-        if "COMPLETA" in d: return 3
-        if "AGUARDANDO" in d: return 2
-        return 1
+        resumo = resumo[resumo['Diag_Codigo'] == DIAG_PROBLEMA]
 
     if not resumo.empty:
-        resumo['sort_group'] = resumo.apply(get_sort_key, axis=1)
-        resumo['perc_presenca'] = resumo['Presentes'] / (resumo['Efetivo'].replace(0, 1))
         resumo = resumo.sort_values(by=['sort_group', 'perc_presenca'], ascending=[True, True])
 
-    qtd_problema = len(resumo[resumo['Diagnostico'].str.contains("PROBLEMA", na=False)])
-    qtd_completas = len(resumo[resumo['Diagnostico'].str.contains("COMPLETA", na=False)])
+    qtd_problema = int((resumo['Diag_Codigo'] == DIAG_PROBLEMA).sum())
+    qtd_completas = int((resumo['Diag_Codigo'] == DIAG_COMPLETA).sum())
+    # Rótulo de texto só para as linhas que vão para a tela
+    resumo = resumo.assign(Diagnostico=rotular_diagnostico(resumo))
     
     c_info1, c_info2 = st.columns(2)
     with c_info1:
@@ -636,8 +740,9 @@ if df is not None and not df.empty:
 
             # --- NOVOS KPIs (ADICIONADOS AQUI) ---
             qtd_total_local = len(df_local)
-            qtd_pres_local = len(df_local[df_local['Status_Individual'] == '🟢 Presente'])
-            qtd_falt_local = len(df_local[df_local['Status_Individual'] == '🔴 Falta'])
+            cont_status = df_local['Status_Individual'].value_counts()
+            qtd_pres_local = int(cont_status.get(STATUS_PRESENTE, 0))
+            qtd_falt_local = int(cont_status.get(STATUS_FALTA, 0))
 
             k1, k2, k3 = st.columns(3)
             k1.metric("Total Previsto", qtd_total_local)
@@ -647,7 +752,7 @@ if df is not None and not df.empty:
 
             st.divider()
 
-            mapa_ordem = {'🔴 Falta': 0, '🟢 Presente': 1, '⏳ A Iniciar': 2, '🟡 S/ Escala': 3}
+            mapa_ordem = {STATUS_FALTA: 0, STATUS_PRESENTE: 1, STATUS_A_INICIAR: 2, STATUS_SEM_ESCALA: 3}
             df_show = df_local.copy()
             df_show['ordem'] = df_show['Status_Individual'].map(mapa_ordem)
             df_show = df_show.sort_values('ordem')
@@ -702,33 +807,41 @@ if df is not None and not df.empty:
                         st.markdown("---")
                         st.markdown("###### 🔍 Divergências (Cruzamento por Matrícula/ID)")
                         
-                        set_mesa = set(df_local['ID'].unique())
-                        set_mesa.discard(0) 
-                        set_banco = set(df_pessoas_conae['ID'].unique())
-                        set_banco.discard(0)
-
-                        ids_fora_mesa = sorted(list(set_banco - set_mesa))
-                        ids_sem_cadastro = sorted(list(set_mesa - set_banco))
+                        # Mesmo motor do diagnóstico global, recortado para esta unidade
+                        df_div = obter_divergencias(df, fetch_censo_completo_conae())
+                        # Lado do banco: uma linha por matrícula (a classe 3 repete por escola da Mesa)
+                        df_miss = (df_div[df_div['Ausente_Escola_Banco'] & (df_div['UnidadeID_Banco'] == uid_target)]
+                                   .groupby('Matricula', as_index=False, sort=False)
+                                   .agg(Funcionario=('Funcionario', 'first'), Cargo=('Cargo', 'first'),
+                                        Na_Mesa_Em=('Escola_Mesa', lambda e: ", ".join(sorted(set(e.dropna()))))))
+                        df_mesa_aqui = df_div[df_div['UnidadeID_Mesa'] == uid_target]
+                        df_extra = df_mesa_aqui[df_mesa_aqui['Classe'] == DIV_SEM_CADASTRO]
+                        df_outra = df_mesa_aqui[df_mesa_aqui['Classe'] == DIV_ESCOLA]
+                        cfg_matricula = {"Matricula": st.column_config.NumberColumn("Matrícula", format="%d")}
 
                         c_div1, c_div2 = st.columns(2)
                         
                         with c_div1:
-                            if ids_fora_mesa:
-                                st.warning(f"⚠️ {len(ids_fora_mesa)} No Banco, mas fora da Mesa")
-                                df_miss = df_pessoas_conae[df_pessoas_conae['ID'].isin(ids_fora_mesa)]
-                                st.dataframe(df_miss, hide_index=True, use_container_width=True,
-                                    column_config={"ID": st.column_config.NumberColumn("Matrícula", format="%d")})
+                            if not df_miss.empty:
+                                st.warning(f"⚠️ {len(df_miss)} No Banco, mas fora da Mesa")
+                                st.dataframe(df_miss[['Matricula', 'Funcionario', 'Cargo', 'Na_Mesa_Em']], hide_index=True, use_container_width=True,
+                                    column_config={**cfg_matricula, "Na_Mesa_Em": st.column_config.TextColumn("🔀 Escalado em")})
                             else:
                                 st.success("✅ Todos do Banco estão na Mesa")
 
                         with c_div2:
-                            if ids_sem_cadastro:
-                                st.error(f"🚫 {len(ids_sem_cadastro)} Na Mesa, mas Inativos/Sem Cadastro")
-                                df_extra = df_local[df_local['ID'].isin(ids_sem_cadastro)]
-                                st.dataframe(df_extra[['ID', 'Funcionario', 'Cargo']], hide_index=True, use_container_width=True,
-                                    column_config={"ID": st.column_config.NumberColumn("Matrícula", format="%d")})
+                            if not df_extra.empty:
+                                st.error(f"🚫 {len(df_extra)} Na Mesa, mas Inativos/Sem Cadastro")
+                                st.dataframe(df_extra[['Matricula', 'Funcionario', 'Cargo']], hide_index=True, use_container_width=True,
+                                    column_config=cfg_matricula)
                             else:
-                                st.success("✅ Ninguém sobrando na Mesa")
+                                st.success("✅ Ninguém na Mesa sem cadastro ativo")
+
+                        if not df_outra.empty:
+                            # Ativos no banco em outra unidade: não são inativos nem sem cadastro
+                            st.info(f"{ROTULO_DIVERGENCIA[DIV_ESCOLA]}: {len(df_outra)} na Mesa aqui, cadastrados em outra escola")
+                            st.dataframe(df_outra[['Matricula', 'Funcionario', 'Cargo', 'Escola']], hide_index=True, use_container_width=True,
+                                column_config={**cfg_matricula, "Escola": st.column_config.TextColumn("Cadastrado em")})
                         
                         st.markdown("---")
                         st.markdown("###### 📋 Lista Nominal Completa (Banco de Dados)")
@@ -0,0 +1,112 @@
+import streamlit as st
+import plotly.express as px
+from datetime import datetime
+from core import http_cliente
+
+# ==============================================================================
+# 1. CONFIGURAÇÃO DA PÁGINA
+# ==============================================================================
+st.set_page_config(page_title="Monitor de APIs", layout="wide", page_icon="📡")
+
+# ==============================================================================
+# 2. SEGURANÇA
+# ==============================================================================
+if not st.session_state.get("authentication_status"):
+    st.warning("🔒 Acesso restrito. Faça login na página inicial.")
+    st.stop()
+
+# ==============================================================================
+# 3. DADOS (métricas do processo, registradas por core/http_cliente.py)
+# ==============================================================================
+df = http_cliente.tabela_metricas()
+desde = datetime.fromtimestamp(http_cliente.coletando_desde())
+
+# ==============================================================================
+# 4. SIDEBAR
+# ==============================================================================
+with st.sidebar:
+    st.header("📡 Monitor de APIs")
+    if st.button("🔄 Atualizar", use_container_width=True):
+        st.rerun()
+    if st.button("🧹 Zerar métricas", use_container_width=True):
+        http_cliente.zerar_metricas()
+        st.rerun()
+    st.divider()
+    servicos = sorted(df['Serviço'].unique()) if not df.empty else []
+    filtro_servicos = st.multiselect("Serviço:", servicos)
+    st.divider()
+    st.download_button("📥 CSV", http_cliente.exportar_csv(), "metricas_http.csv", "text/csv", use_container_width=True)
+    st.download_button("📥 Prometheus", http_cliente.exportar_prometheus(), "metricas_http.prom", "text/plain",
+                       use_container_width=True)
+
+# ==============================================================================
+# 5. DASHBOARD
+# ==============================================================================
+st.title("📡 Chamadas Externas")
+st.caption(f"Todas as chamadas HTTP deste processo (todas as sessões e o coletor da Mesa) desde "
+           f"**{desde.strftime('%d/%m/%Y %H:%M:%S')}** · percentis sobre as últimas "
+           f"{http_cliente.AMOSTRAS_RECENTES} chamadas de cada endpoint")
+
+if df.empty:
+    st.info("Nenhuma chamada externa registrada ainda. Use as outras páginas e volte aqui.")
+    st.stop()
+
+if filtro_servicos:
+    df = df[df['Serviço'].isin(filtro_servicos)]
+
+total = int(df['Chamadas'].sum())
+falhas = int(df['Timeouts'].sum() + df['Erros_Rede'].sum() + df['HTTP_4xx_5xx'].sum())
+tempo_total = (df['Media_ms'] * df['Chamadas']).sum() / 1000
+
+c1, c2, c3, c4, c5 = st.columns(5)
+c1.metric("Chamadas", f"{total:,}".replace(",", "."))
+c2.metric("Tempo total em APIs", f"{tempo_total:,.1f} s".replace(",", "X").replace(".", ",").replace("X", "."))
+c3.metric("Falhas", falhas, help="Timeouts + erros de rede + respostas 4xx/5xx", delta_color="inverse")
+c4.metric("⏱️ Timeouts", int(df['Timeouts'].sum()))
+c5.metric("🔁 Retentativas", int(df['Retentativas'].sum()))
+
+st.divider()
+
+# Onde o tempo vai: tempo acumulado por endpoint (chamadas x média) e p95
+g1, g2 = st.columns(2)
+with g1:
+    st.subheader("Tempo acumulado por endpoint")
+    df_tempo = df.assign(Tempo_s=df['Media_ms'] * df['Chamadas'] / 1000).nlargest(15, 'Tempo_s')
+    fig = px.bar(df_tempo.sort_values('Tempo_s'), x='Tempo_s', y='Endpoint', color='Serviço', orientation='h',
+                 labels={'Tempo_s': 'Segundos'}, hover_data=['Chamadas', 'Media_ms'])
+    fig.update_layout(height=420, margin=dict(l=0, r=0, t=10, b=0))
+    st.plotly_chart(fig, use_container_width=True)
+with g2:
+    st.subheader("Latência p95")
+    df_p95 = df.nlargest(15, 'p95_ms')
+    fig = px.bar(df_p95.sort_values('p95_ms'), x='p95_ms', y='Endpoint', color='Serviço', orientation='h',
+                 labels={'p95_ms': 'ms'}, hover_data=['p50_ms', 'p99_ms', 'Timeout_s'])
+    fig.update_layout(height=420, margin=dict(l=0, r=0, t=10, b=0))
+    st.plotly_chart(fig, use_container_width=True)
+
+st.subheader("Por endpoint")
+st.dataframe(
+    df, use_container_width=True, hide_index=True,
+    column_config={
+        "p50_ms": st.column_config.NumberColumn("p50", format="%.0f ms"),
+        "p95_ms": st.column_config.NumberColumn("p95", format="%.0f ms"),
+        "p99_ms": st.column_config.NumberColumn("p99", format="%.0f ms"),
+        "Media_ms": st.column_config.NumberColumn("Média", format="%.0f ms"),
+        "Max_ms": st.column_config.NumberColumn("Máx.", format="%.0f ms"),
+        "Timeout_s": st.column_config.NumberColumn("Timeout", format="%g s", help="Timeout configurado na chamada"),
+        "Erros_Rede": st.column_config.NumberColumn("Erros rede"),
+        "HTTP_4xx_5xx": st.column_config.NumberColumn("4xx/5xx"),
+        "KB_Medio": st.column_config.NumberColumn("KB médio", format="%.1f"),
+        "KB_Max": st.column_config.NumberColumn("KB máx.", format="%.1f"),
+        "Ultima": st.column_config.DatetimeColumn("Última", format="DD/MM HH:mm:ss"),
+    },
+)
+
+st.subheader("Distribuição de latência")
+opcoes = list(df[['Serviço', 'Método', 'Endpoint']].itertuples(index=False, name=None))
+escolha = st.selectbox("Endpoint:", opcoes, format_func=lambda o: f"{o[0]} · {o[1]} {o[2]}")
+if escolha:
+    df_hist = http_cliente.histograma(*escolha)
+    fig = px.bar(df_hist, x='Faixa', y='Qtd', labels={'Faixa': 'Latência', 'Qtd': 'Chamadas'})
+    fig.update_layout(height=300, margin=dict(l=0, r=0, t=10, b=0))
+    st.plotly_chart(fig, use_container_width=True)
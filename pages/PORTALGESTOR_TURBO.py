@@ -6,6 +6,8 @@ from datetime import datetime, date
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 from dateutil import tz
+from core import http_cliente
+from core.endpoints import BASE_PORTAL_GESTOR
 
 # ==============================================================================
 # 1. CONFIGURAÇÃO DA PÁGINA
@@ -32,7 +34,7 @@ except Exception as e:
 # ==============================================================================
 # 3. FUNÇÕES DE SUPORTE (API & LÓGICA)
 # ==============================================================================
-BASE_URL = "https://portalgestor.teknisa.com/backend/index.php"
+BASE_URL = BASE_PORTAL_GESTOR
 
 def get_headers():
     return {
@@ -57,7 +59,7 @@ def fetch_estruturas():
         "CDOPERADOR": CD_OPERADOR
     }
     try:
-        r = requests.get(url, params=params, headers=get_headers(), timeout=15)
+        r = http_cliente.get(url, params=params, headers=get_headers(), timeout=15)
         if r.status_code == 200:
             data = r.json()
             items = (data.get("dataset", {}) or {}).get("data", [])
@@ -76,7 +78,7 @@ def fetch_periodos():
         "CDOPERADOR": CD_OPERADOR
     }
     try:
-        r = requests.get(url, params=params, headers=get_headers(), timeout=15)
+        r = http_cliente.get(url, params=params, headers=get_headers(), timeout=15)
         if r.status_code == 200:
             data = r.json()
             items = (data.get("dataset", {}) or {}).get("data", [])
@@ -171,7 +173,7 @@ st.markdown("Busque ocorrências pendentes e aprove em lote com alta velocidade.
 
 # Estado da Sessão Requests
 if "session_api" not in st.session_state:
-    st.session_state["session_api"] = requests.Session()
+    st.session_state["session_api"] = http_cliente.SessaoInstrumentada()
 
 # --- ÁREA DE FILTROS (MOVIDA PARA CÁ) ---
 with st.container(border=True):
@@ -282,10 +284,11 @@ if raw_data:
             concluidos = 0
             sucessos = 0
             
-            with requests.Session() as s:
+            with http_cliente.SessaoInstrumentada() as s:
                 # Configura Retry
                 adapter = requests.adapters.HTTPAdapter(max_retries=2)
                 s.mount('https://', adapter)
+                s.mount('http://', adapter)
                 
                 with ThreadPoolExecutor(max_workers=max_workers) as executor:
                     futures = {
@@ -1,12 +1,12 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import requests
-import json
 import time
-import io
 from datetime import datetime, timedelta
 from PIL import Image
+from core import http_cliente
+from core.portal_limpeza import autenticar, buscar_export_ocorrencias, buscar_tabela_ocorrencias, headers_autorizados
+from core.sme import definir_solucao, ler_csv_export, mesclar_ocorrencias, montar_df_tabela
 
 # ==============================================================================
 # 1. CONFIGURAÇÃO DA PÁGINA
@@ -46,51 +46,10 @@ URL_EXPORT = f"{BASE_URL_API}/ocorrencia/exportar"
 URL_MSG_BASE = f"{BASE_URL_API}/ocorrencia/ocorrencia-mensagem/buscar-por-ocorrencia"
 URL_ENVIAR_MSG = f"{BASE_URL_API}/ocorrencia/ocorrencia-mensagem/"
 
-HEADERS_CHROME = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36",
-    "Accept": "application/json, text/plain, */*",
-    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-    "Origin": "https://limpeza.sme.prefeitura.sp.gov.br",
-    "sec-ch-ua": '"Google Chrome";v="143", "Chromium";v="143", "Not A(Brand";v="24"',
-    "sec-ch-ua-mobile": "?0",
-    "sec-ch-ua-platform": '"Windows"',
-    "Sec-Fetch-Dest": "empty",
-    "Sec-Fetch-Mode": "cors",
-    "Sec-Fetch-Site": "same-origin"
-}
-
 # ==============================================================================
 # 4. FUNÇÕES DE LÓGICA DE NEGÓCIO (GLOBAIS)
 # ==============================================================================
-def definir_status_resposta(row):
-    if 'ocorrenciaRespondida' in row.index:
-        val = str(row['ocorrenciaRespondida']).lower()
-        if val == 'true': return '✅ Respondida' # Ajustado para feminino
-        if val == 'false': return '🚨 Sem Resposta'
-    if str(row.get('flagEncerrado')).lower() == 'true': return '✅ Respondida' # Ajustado para feminino
-    return '🚨 Sem Resposta'
-
-def definir_solucao(row):
-    # Normaliza boleanos
-    encerrado = str(row.get('flagEncerrado', 'false')).lower() == 'true'
-    auto_encerrado = str(row.get('flagEncerramentoAutomatico', 'false')).lower() == 'true'
-    gerar_desconto = str(row.get('flagGerarDesconto', 'false')).lower() == 'true'
-    
-    # Se NÃO está encerrado (nem manual, nem auto) -> Aguardando
-    if not encerrado and not auto_encerrado:
-        return '⏳ Aguardando Parecer'
-        
-    # Se está encerrado, verifica se tem desconto (glosa)
-    if gerar_desconto:
-        return '💰 Gerou Glosa' 
-    else:
-        return '🌟 Solucionada' # Ajustado para feminino
-
-def cat_visual(val):
-    v = str(val).lower()
-    if 'insumo' in v or 'material' in v: return '🛠️ Insumos'
-    if 'equipe' in v or 'falta' in v or 'rh' in v: return '👥 Equipe'
-    return '📝 Outros'
+# Regras de status/solução/categoria: core/sme.py
 
 # ==============================================================================
 # 5. FUNÇÕES DE AUTENTICAÇÃO E ENVIO
@@ -100,22 +59,11 @@ def carregar_logo():
     except: return None
 
 def autenticar_e_pegar_token():
-    payload = {"email": SECRETS["email"], "senha": SECRETS["senha"]}
-    h = HEADERS_CHROME.copy()
-    h["Content-Type"] = "application/json;charset=UTF-8"
-    h["Referer"] = "https://limpeza.sme.prefeitura.sp.gov.br/login"
     try:
-        r = requests.post(URL_AUTH, json=payload, headers=h, timeout=15)
-        if r.status_code == 200:
-            data = r.json()
-            token = None
-            if "data" in data and isinstance(data["data"], dict): token = data["data"].get("token")
-            elif "token" in data: token = data["token"]
-            elif "data" in data and isinstance(data["data"], str): token = data["data"]
-            
-            if token:
-                st.session_state['api_token'] = token
-                return token
+        token = autenticar(URL_AUTH, SECRETS["email"], SECRETS["senha"])
+        if token:
+            st.session_state['api_token'] = token
+            return token
     except: pass
     return None
 
@@ -123,10 +71,7 @@ def get_header_request():
     token = st.session_state.get('api_token')
     if not token: token = autenticar_e_pegar_token()
     if token:
-        h = HEADERS_CHROME.copy()
-        h["Authorization"] = f"Bearer {token}"
-        h["Referer"] = "https://limpeza.sme.prefeitura.sp.gov.br/ocorrencia/"
-        return h
+        return headers_autorizados(token, "ocorrencia/")
     return None
 
 def enviar_resposta_api(id_oc, mensagem):
@@ -140,7 +85,7 @@ def enviar_resposta_api(id_oc, mensagem):
     }
     
     try:
-        r = requests.post(URL_ENVIAR_MSG, json=payload, headers=h, timeout=15)
+        r = http_cliente.post(URL_ENVIAR_MSG, json=payload, headers=h, timeout=15)
         if r.status_code == 200 or r.status_code == 201:
             return True, "Enviado"
         else:
@@ -152,79 +97,15 @@ def enviar_resposta_api(id_oc, mensagem):
 # 6. FETCHERS (JSON + CSV)
 # ==============================================================================
 def fetch_json_paginado(data_inicio, data_fim, headers):
-    dt_ini = data_inicio.strftime("%Y-%m-%dT00:00:00.000Z")
-    dt_fim = data_fim.strftime("%Y-%m-%dT23:59:59.999Z")
-    filtros = {"dataInicial": dt_ini, "dataFinal": dt_fim, "flagSomenteAtivos": "true"}
-    
-    todos_registros = []
-    start, length, total_records = 0, 100, 1 
-    
     st.toast("Baixando estrutura (JSON)...", icon="⏳")
-    
-    while start < total_records:
-        params = {"draw": "1", "filters": json.dumps(filtros), "length": length, "start": start}
-        try:
-            r = requests.get(URL_TABELA, params=params, headers=headers, timeout=20)
-            if r.status_code == 200:
-                body = r.json()
-                data_list = body.get("datatables", {}).get("data", []) if "datatables" in body else body.get("data", [])
-                total_n = body.get("datatables", {}).get("recordsTotal", 0) if "datatables" in body else body.get("recordsTotal", 0)
-                
-                if start == 0:
-                    total_records = int(total_n)
-                    if total_records == 0: return pd.DataFrame()
-                
-                if data_list: todos_registros.extend(data_list)
-                else: break
-                
-                start += length
-                time.sleep(0.05)
-            else: break
-        except: break
-            
-    if todos_registros:
-        df = pd.json_normalize(todos_registros)
-        rename_map = {
-            'id': 'id', 
-            'data': 'dataHoraOcorrencia', 
-            'unidadeEscolar.descricao': 'ueNome',
-            'tipo': 'Categoria', 
-            'observacaoFinal': 'observacao_json', 
-            'ocorrenciaRespondida': 'ocorrenciaRespondida', 
-            'flagEncerrado': 'flagEncerrado',
-            'flagGerarDesconto': 'flagGerarDesconto',
-            'flagEncerramentoAutomatico': 'flagEncerramentoAutomatico'
-        }
-        df = df.rename(columns=rename_map)
-        
-        if 'id' in df.columns:
-            df['id'] = df['id'].astype(str).str.replace('.', '', regex=False).str.replace(',', '', regex=False).str.strip()
-        
-        return df
-    return pd.DataFrame()
+    return montar_df_tabela(buscar_tabela_ocorrencias(URL_TABELA, headers, data_inicio, data_fim))
 
 def fetch_csv_export(data_inicio, data_fim, headers):
-    dt_i = data_inicio.strftime("%Y-%m-%dT00:00:00.000Z")
-    dt_f = data_fim.strftime("%Y-%m-%dT23:59:59.999Z")
-    params = {"filtros": json.dumps({"dataInicial": dt_i, "dataFinal": dt_f, "flagSomenteAtivos": "true"})}
-    
     st.toast("Preenchendo observações...", icon="📝")
     try:
-        r = requests.get(URL_EXPORT, params=params, headers=headers, timeout=30)
-        if r.status_code == 200:
-            content = r.text
-            try: 
-                js = r.json()
-                if "data" in js: content = js["data"]
-            except: pass
-            
-            df = pd.read_csv(io.StringIO(content), sep=';')
-            if 'id' in df.columns:
-                df['id'] = df['id'].astype(str).str.replace('.', '', regex=False).str.replace(',', '', regex=False).str.strip()
-            
-            cols_csv = ['id', 'observacao', 'acaoCorretiva']
-            return df[[c for c in cols_csv if c in df.columns]]
-            
+        content = buscar_export_ocorrencias(URL_EXPORT, headers, data_inicio, data_fim)
+        if content is not None:
+            return ler_csv_export(content)
     except: pass
     return pd.DataFrame()
 
@@ -237,44 +118,18 @@ def fetch_dados_mesclados(d_ini, d_fim):
 
     df_csv = fetch_csv_export(d_ini, d_fim, headers)
 
-    if not df_csv.empty:
-        df_final = pd.merge(df_json, df_csv, on='id', how='left', suffixes=('', '_csv'))
-        if 'observacao' in df_final.columns:
-            df_final['observacao'] = df_final['observacao'].fillna(df_final.get('observacao_json', '-'))
-        elif 'observacao_json' in df_final.columns:
-            df_final['observacao'] = df_final['observacao_json']
-        
-        for c in ['observacao', 'acaoCorretiva', 'ueNome']:
-            if c in df_final.columns:
-                df_final[c] = df_final[c].fillna('-').astype(str)
-    else:
-        df_final = df_json
-        if 'observacao_json' in df_final.columns:
-            df_final['observacao'] = df_final['observacao_json']
-            
-    if 'dataHoraOcorrencia' in df_final.columns:
-        df_final['dataHoraOcorrencia'] = pd.to_datetime(df_final['dataHoraOcorrencia'], errors='coerce')
-        df_final['Data'] = df_final['dataHoraOcorrencia'].dt.date
-    
-    # Aplica funções globais
-    df_final['Status_Resposta'] = df_final.apply(definir_status_resposta, axis=1)
-    df_final['Status_Solucao'] = df_final.apply(definir_solucao, axis=1)
-
-    if 'Categoria' not in df_final.columns: df_final['Categoria'] = 'Geral'
-    df_final['Categoria_Visual'] = df_final['Categoria'].apply(cat_visual)
-    
-    return df_final
+    return mesclar_ocorrencias(df_json, df_csv)
 
 def fetch_mensagens(id_oc):
     id_clean = str(id_oc).replace('.', '').replace(',', '').strip()
     url = f"{URL_MSG_BASE}/{id_clean}"
     try:
         h = get_header_request()
-        r = requests.get(url, headers=h, timeout=15)
+        r = http_cliente.get(url, headers=h, timeout=15)
         if r.status_code in [401, 403]:
              st.session_state['api_token'] = None
              h = get_header_request()
-             r = requests.get(url, headers=h, timeout=15)
+             r = http_cliente.get(url, headers=h, timeout=15, retentativa=True)
         if r.status_code == 200: return r.json().get("data", [])
         return []
     except: return []
@@ -0,0 +1,74 @@
+"""
+Resumo da Mesa Operacional por unidade e status para um intervalo de datas, sem Streamlit.
+
+Busca o getMesaOperacoes de cada dia (core/teknisa.py) em processos paralelos e aplica a mesma
+classificação da página (core/mesa.py). Uso (a partir da raiz do projeto, lendo .streamlit/secrets.toml):
+
+    python scripts/mesa_lote.py --inicio 2026-03-01 --fim 2026-03-31 --saida mesa_marco.csv
+    python scripts/mesa_lote.py --processos 8            # só hoje, resumo no terminal
+
+Aponte para o servidor local de testes com TEKNISA_PORTAL_GESTOR_URL (ver core/endpoints.py).
+Retorna código de saída 1 se algum dia falhar.
+"""
+import argparse
+import sys
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+from core.mesa import CODIGO_STATUS, resumir_status_por_unidade  # noqa: E402
+from core.teknisa import NRESTRUTURAM_PADRAO, buscar_mesa_operacoes, credenciais_portal  # noqa: E402
+
+ROTULO_STATUS = {codigo: rotulo for rotulo, codigo in CODIGO_STATUS.items()}
+
+def resumir_dia(cred, dia, nr_estrutura):
+    """Um dia: (dia, DataFrame Dia/UnidadeID/Status/Qtd, erro ou None). Roda no processo filho."""
+    try:
+        df_api, _ = buscar_mesa_operacoes(cred, dia, nr_estrutura)
+        # Dia encerrado: avaliado no fim do dia (quem não bateu ponto é falta, não "a iniciar")
+        agora = datetime.now() if dia >= date.today() else datetime.combine(dia, time(23, 59))
+        df = resumir_status_por_unidade(df_api, dia, agora)
+        df['Status'] = df['Status'].map(ROTULO_STATUS)
+        return dia, df.assign(Dia=dia)[['Dia', 'UnidadeID', 'Status', 'Qtd']], None
+    except Exception as e:
+        return dia, None, str(e)
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumo da Mesa Operacional por unidade/status num intervalo de datas.")
+    parser.add_argument("--inicio", type=date.fromisoformat, default=date.today(), help="YYYY-MM-DD (padrão: hoje)")
+    parser.add_argument("--fim", type=date.fromisoformat, help="YYYY-MM-DD (padrão: igual ao início)")
+    parser.add_argument("--estrutura", default=NRESTRUTURAM_PADRAO, help="NRESTRUTURAM")
+    parser.add_argument("--processos", type=int, default=4)
+    parser.add_argument("--saida", help="CSV de saída (sem ela, imprime o total por dia e status)")
+    args = parser.parse_args()
+
+    with open(RAIZ / ".streamlit" / "secrets.toml", "rb") as f:
+        cred = credenciais_portal(tomllib.load(f)["api_portal_gestor"])
+
+    fim = args.fim or args.inicio
+    dias = [args.inicio + timedelta(days=i) for i in range((fim - args.inicio).days + 1)]
+    partes, falhas = [], []
+    with ProcessPoolExecutor(max_workers=max(1, min(args.processos, len(dias)))) as pool:
+        for dia, df, erro in pool.map(resumir_dia, [cred] * len(dias), dias, [args.estrutura] * len(dias)):
+            if erro:
+                falhas.append(dia)
+                print(f"❌ {dia:%d/%m/%Y}: {erro}", file=sys.stderr)
+            else:
+                partes.append(df)
+
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=['Dia', 'UnidadeID', 'Status', 'Qtd'])
+    if args.saida:
+        df.to_csv(args.saida, index=False)
+        print(f"✅ {len(df)} linhas ({len(partes)} dias) em {args.saida}")
+    else:
+        print(df.pivot_table(index='Dia', columns='Status', values='Qtd', aggfunc='sum', fill_value=0).to_string())
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
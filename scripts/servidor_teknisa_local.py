@@ -0,0 +1,502 @@
+"""
+Servidor local que imita as APIs Teknisa (Portal Gestor e HCM) usadas pelas páginas.
+
+Reproduz o formato de requisição/resposta dos endpoints chamados pelo dashboard, com uma base
+sintética determinística (escolas, vínculos, escalas, ocorrências, pessoas e contatos) e injeção
+configurável de latência, erros 500, expiração de token (401) e limite de requisições (429).
+Serve para medir e testar carga do APURADOR_TURBO, PORTALGESTOR_TURBO, MESA_OPERACIONAL,
+DIAGNOSTICO_PONTO e BUSCA_CONTATOS sem tocar a produção.
+
+Uso (a partir da raiz do projeto):
+
+    python scripts/servidor_teknisa_local.py --escala 10 --latencia-ms 200 --taxa-erro 0.02
+
+    TEKNISA_PORTAL_GESTOR_URL=http://127.0.0.1:8765/portalgestor \\
+    TEKNISA_HCM_URL=http://127.0.0.1:8765/hcm streamlit run CONAE.py
+
+GET /_estatisticas devolve as contagens por endpoint/status desde a subida.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# ==============================================================================
+# 1. BASE SINTÉTICA
+# ==============================================================================
+TIPOS_ESCOLA = ["EMEF", "EMEI", "CEI", "CEU", "EMEBS", "CIEJA"]
+CARGOS = [
+    ("AUXILIAR DE LIMPEZA", 70), ("ENCARREGADO DE LIMPEZA", 8), ("PORTEIRO", 10),
+    ("AGENTE DE APOIO", 8), ("LIDER DE LIMPEZA", 4),
+]
+NOMES = ["ANA", "MARIA", "JOSE", "JOAO", "FRANCISCA", "ANTONIO", "ADRIANA", "CARLOS", "JULIANA",
+         "PAULO", "MARCIA", "LUCAS", "PATRICIA", "RAFAEL", "ALINE", "MARCOS", "SANDRA", "BRUNO"]
+SOBRENOMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA",
+              "LIMA", "GOMES", "COSTA", "RIBEIRO", "MARTINS", "CARVALHO", "ALMEIDA", "LOPES"]
+SITUACOES = [("Atividade Normal", 92), ("Férias", 4), ("Afastamento Doença", 3), ("Licença Maternidade", 1)]
+TURNOS = [
+    [["06:00", "10:00"], ["11:00", "14:00"]],
+    [["07:00", "11:00"], ["12:00", "16:00"]],
+    [["13:00", "17:00"], ["18:00", "21:00"]],
+    [["08:00", "12:00"], ["13:00", "17:00"]],
+]
+MOTIVOS_OCORRENCIA = [
+    ("Ausência de marcação / entrada e saída", 60), ("Atraso na entrada", 20),
+    ("Saída antecipada", 10), ("Hora extra não autorizada", 10),
+]
+NRESTRUTURAM_PADRAO = 101091998
+
+def _sortear(rng, pesos):
+    return rng.choices([v for v, _ in pesos], weights=[p for _, p in pesos])[0]
+
+def _hhmm(minutos):
+    minutos = max(0, min(minutos, 23 * 60 + 59))
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+def _minutos(hhmm):
+    return int(hhmm[:2]) * 60 + int(hhmm[3:])
+
+class BaseSintetica:
+    """Entidades fixas geradas na subida; registros por dia são derivados de (semente, vínculo, dia)."""
+
+    def __init__(self, escolas=150, vinculos_por_escola=10, estruturas=2, semente=42):
+        self.semente = semente
+        rng = random.Random(semente)
+
+        self.estruturas = [
+            {"NRESTRUTURAM": NRESTRUTURAM_PADRAO + i, "NMESTRUTURA": f"ESTRUTURA SINTETICA {i + 1:02d}"}
+            for i in range(estruturas)
+        ]
+        self.escolas = []
+        for i in range(escolas):
+            self.escolas.append({
+                "NRESTRUTGEREN": 500000 + i,
+                "NMESTRUTGEREN": f"{rng.choice(TIPOS_ESCOLA)} SINTETICA {i + 1:04d}",
+                "NRESTRUTURAM": self.estruturas[i % estruturas]["NRESTRUTURAM"],
+            })
+
+        self.vinculos = []
+        for e in self.escolas:
+            for _ in range(max(1, int(rng.gauss(vinculos_por_escola, vinculos_por_escola * 0.25)))):
+                n = len(self.vinculos)
+                self.vinculos.append({
+                    "NRVINCULOM": 2000000 + n,
+                    "NMVINCULOM": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+                    "NMOCUPACAOH": _sortear(rng, CARGOS),
+                    "NMSITUFUNCH": _sortear(rng, SITUACOES),
+                    "NRPARCNEGOCIO": 9000000 + n,
+                    "NRCPFPESSOA": f"{rng.randrange(10 ** 11):011d}",
+                    "DTNASCPESSOA": f"{date(1960, 1, 1) + timedelta(days=rng.randrange(15000)):%d/%m/%Y} 00:00:00",
+                    "DTADMISSAOPRE": f"{date(2015, 1, 1) + timedelta(days=rng.randrange(3500)):%d/%m/%Y} 00:00:00",
+                    "TURNO": rng.randrange(len(TURNOS)),
+                    "escola": e,
+                })
+        self.por_vinculo = {v["NRVINCULOM"]: v for v in self.vinculos}
+        self.por_estrutura = {}
+        for v in self.vinculos:
+            self.por_estrutura.setdefault(v["escola"]["NRESTRUTURAM"], []).append(v)
+
+        self.periodos = []
+        fim = (date.today().replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        for i in range(3):
+            ini = fim.replace(day=1)
+            self.periodos.append({
+                "NRPERIODOAPURACAO": 1904 - i,
+                "DSPERIODOAPURACAO": f"{ini:%d/%m/%Y} a {fim:%d/%m/%Y}",
+                "DTINICIO": ini, "DTFIM": fim,
+            })
+            fim = ini - timedelta(days=1)
+        self.por_periodo = {p["NRPERIODOAPURACAO"]: p for p in self.periodos}
+
+    def _rng(self, *chave):
+        return random.Random(":".join(str(c) for c in (self.semente,) + chave))
+
+    def dias_periodo(self, nr_periodo):
+        p = self.por_periodo.get(int(nr_periodo or 0), self.periodos[0])
+        dia, fim = p["DTINICIO"], min(p["DTFIM"], date.today())
+        while dia <= fim:
+            yield dia
+            dia += timedelta(days=1)
+
+    # --- Portal Gestor -------------------------------------------------------
+    def registro_mesa(self, v, dia, agora):
+        rng = self._rng("mesa", v["NRVINCULOM"], dia)
+        escala = TURNOS[v["TURNO"]] if dia.weekday() < 5 else []
+        batidas = []
+        if escala and rng.random() < 0.9 and dia <= agora.date():
+            limite = agora.hour * 60 + agora.minute if dia == agora.date() else 24 * 60
+            for ini, fim in escala:
+                ent = _minutos(ini) + rng.randint(-10, 15)
+                if ent > limite:
+                    break
+                sai = _minutos(fim) + rng.randint(-5, 10)
+                batidas.append([_hhmm(ent), _hhmm(sai)] if sai <= limite else [_hhmm(ent)])
+        e = v["escola"]
+        return {
+            "NRORG": 3260,
+            "NRESTRUTGEREN": e["NRESTRUTGEREN"],
+            "NMESTRUTGEREN": e["NMESTRUTGEREN"],
+            "NRVINCULOM": v["NRVINCULOM"],
+            "NMVINCULOM": v["NMVINCULOM"],
+            "NMOCUPACAOH": v["NMOCUPACAOH"],
+            "NMSITUFUNCH": v["NMSITUFUNCH"],
+            "NRCPFPESSOA": v["NRCPFPESSOA"],
+            "DTADMISSAOPRE": v["DTADMISSAOPRE"],
+            "DIA": f"{dia:%d/%m/%Y}",
+            "horas_escala": escala,
+            "horas_trabalhadas": batidas,
+            "OBSERVACAO": "" if batidas or not escala else rng.choice(["", "", "Atestado", "Falta justificada"]),
+        }
+
+    def mesa(self, dia, nr_estrutura):
+        agora = datetime.now()
+        return [self.registro_mesa(v, dia, agora) for v in self.por_estrutura.get(int(nr_estrutura or 0), [])]
+
+    def vinculos_do_gestor(self, nr_estrutura):
+        return [
+            {k: v[k] for k in ("NRVINCULOM", "NMVINCULOM", "NMSITUFUNCH")} | {"NMFUNCAO": v["NMOCUPACAOH"]}
+            for v in self.por_estrutura.get(int(nr_estrutura or 0), [])
+        ]
+
+    def ocorrencias_pendentes(self, nr_estrutura, nr_periodo):
+        saida = []
+        for v in self.por_estrutura.get(int(nr_estrutura or 0), []):
+            rng = self._rng("pend", v["NRVINCULOM"], nr_periodo)
+            for dia in self.dias_periodo(nr_periodo):
+                if dia.weekday() < 5 and rng.random() < 0.04:
+                    motivo = _sortear(rng, MOTIVOS_OCORRENCIA)
+                    saida.append({
+                        "NRPROGOCORRENCIA": int(f"{v['NRVINCULOM']}{dia:%m%d}"),
+                        "NRVINCULOM": v["NRVINCULOM"],
+                        "NMVINCULOM": v["NMVINCULOM"],
+                        "DTINICIOPROGOCOR": f"{dia:%d/%m/%Y} 00:00:00",
+                        "DSMOTIVOOCORFREQ": motivo,
+                        "NMTIPOPROGOCORRENCIA": "Ocorrência de Frequência",
+                        "DSOBSERVACAO": "",
+                    })
+        return saida
+
+    def dias_demonstrativo(self, nr_vinculo, nr_periodo):
+        v = self.por_vinculo.get(int(nr_vinculo or 0))
+        if not v:
+            return []
+        agora = datetime.now()
+        saida = []
+        for dia in self.dias_periodo(nr_periodo):
+            reg = self.registro_mesa(v, dia, agora)
+            pares = ["-".join(p) for p in reg["horas_trabalhadas"]] + ["", ""]
+            saida.append({
+                "DTAPURACAO": f"{dia:%d/%m/%Y}",
+                "DSPONTODIA": "Folga" if not reg["horas_escala"] else ("Normal" if reg["horas_trabalhadas"] else "Falta"),
+                "ENTRADA_SAIDA_1": pares[0],
+                "ENTRADA_SAIDA_2": pares[1],
+            })
+        return saida
+
+    # --- HCM -----------------------------------------------------------------
+    def ocorrencias_ponto(self, vinculos, nr_periodo):
+        saida = []
+        for nr in vinculos:
+            try:
+                nr = int(nr)
+            except (TypeError, ValueError):
+                continue
+            if nr not in self.por_vinculo:
+                continue
+            rng = self._rng("oco", nr, nr_periodo)
+            for dia in self.dias_periodo(nr_periodo):
+                if dia.weekday() >= 5:
+                    continue
+                sorteio = rng.random()
+                if sorteio < 0.03:
+                    tipo, horas = "FALTA", 8.0
+                elif sorteio < 0.09:
+                    tipo, horas = "ATRASO", round(rng.uniform(0.1, 2.0), 2)
+                else:
+                    continue
+                saida.append({
+                    "NRVINCULOM": nr,
+                    "TIPO_OCORRENCIA": tipo,
+                    "DATA_INICIO": f"{dia:%d/%m/%Y}",
+                    "DATA_INICIO_FILTER": f"{dia:%Y-%m-%d}",
+                    "DIFF_HOURS": horas,
+                    "NRPERIODOAPURACAO": nr_periodo,
+                })
+        return saida
+
+    def pessoas(self, termo, limite):
+        termo = (termo or "").strip("%").upper()
+        saida = []
+        for v in self.vinculos:
+            if termo in v["NMVINCULOM"]:
+                saida.append({
+                    "NMPESSOA": v["NMVINCULOM"], "NRCPFPESSOA": v["NRCPFPESSOA"],
+                    "DTADMISSAOPRE": v["DTADMISSAOPRE"], "DTNASCPESSOA": v["DTNASCPESSOA"],
+                    "NRPARCNEGOCIO": v["NRPARCNEGOCIO"], "NRORG": 3260, "NRVINCULOM": v["NRVINCULOM"],
+                })
+                if len(saida) >= limite:
+                    break
+        return saida
+
+    def contatos(self, nr_parc):
+        rng = self._rng("contato", nr_parc)
+        saida = [{"NMFORMACOMU": "CELULAR", "DSCOMUNICAPARC": f"119{rng.randrange(10 ** 8):08d}"}]
+        if rng.random() < 0.6:
+            saida.append({"NMFORMACOMU": "E-MAIL", "DSCOMUNICAPARC": f"pessoa{nr_parc}@exemplo.com"})
+        if rng.random() < 0.3:
+            saida.append({"NMFORMACOMU": "TELEFONE RESIDENCIAL", "DSCOMUNICAPARC": f"11{rng.randrange(10 ** 8):08d}"})
+        return saida
+
+# ==============================================================================
+# 2. FALHAS, LATÊNCIA E LIMITE DE REQUISIÇÕES
+# ==============================================================================
+class Simulador:
+    """Estado compartilhado entre as threads do servidor: tokens HCM, baldes de rate limit e estatísticas."""
+
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.tokens_hcm = {}      # token -> expira_em (time.time())
+        self.baldes = {}          # ip -> [fichas, ultimo_ts]
+        self.estatisticas = {}    # "endpoint status" -> [qtd, segundos]
+        self.rng = random.Random(args.semente + 1)
+
+    def sortear(self, taxa):
+        with self.lock:
+            return taxa > 0 and self.rng.random() < taxa
+
+    def permitir(self, ip):
+        """Token bucket por cliente: --limite-rps fichas/s, rajada de --rajada."""
+        if self.args.limite_rps <= 0:
+            return True
+        agora = time.monotonic()
+        with self.lock:
+            fichas, ultimo = self.baldes.get(ip, (self.args.rajada, agora))
+            fichas = min(self.args.rajada, fichas + (agora - ultimo) * self.args.limite_rps)
+            ok = fichas >= 1
+            self.baldes[ip] = (fichas - 1 if ok else fichas, agora)
+            return ok
+
+    def emitir_token(self):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens_hcm[token] = time.time() + self.args.validade_token
+        return token
+
+    def token_valido(self, token):
+        with self.lock:
+            return self.tokens_hcm.get(token, 0) > time.time()
+
+    def esperar(self, n_registros):
+        a = self.args
+        atraso = a.latencia_ms + (random.uniform(0, a.jitter_ms) if a.jitter_ms else 0) + a.ms_por_mil * n_registros / 1000
+        if atraso > 0:
+            time.sleep(atraso / 1000)
+
+    def registrar(self, endpoint, status, duracao):
+        with self.lock:
+            item = self.estatisticas.setdefault(f"{endpoint} {status}", [0, 0.0])
+            item[0] += 1
+            item[1] += duracao
+
+# ==============================================================================
+# 3. ENDPOINTS
+# ==============================================================================
+def _filtro(payload, nome, padrao=None):
+    for f in payload.get("filter", []) or []:
+        if f.get("name") == nome:
+            return f.get("value")
+    return padrao
+
+def _parametro(params, payload, nome):
+    """Portal Gestor aceita os campos na query string (GET) ou em row (POST)."""
+    if nome in params:
+        return params[nome][0]
+    return (payload.get("row") or {}).get(nome)
+
+def _dia(texto):
+    try:
+        return datetime.strptime(texto, "%d/%m/%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+def portal_gestor(base, sim, endpoint, params, payload):
+    """Retorna (status, corpo, n_registros)."""
+    p = lambda nome: _parametro(params, payload, nome)
+    if endpoint == "getEstruturasGerenciais":
+        return 200, {"dataset": {"data": base.estruturas}}, len(base.estruturas)
+    if endpoint == "getPeriodosDemonstrativo":
+        dados = [{k: v for k, v in per.items() if k.startswith(("NR", "DS"))} for per in base.periodos]
+        return 200, {"dataset": {"data": dados}}, len(dados)
+    if endpoint == "getMesaOperacoes":
+        dia = _dia(p("DIA"))
+        if dia is None:
+            return 500, {"error": "Parâmetro DIA inválido.<br>(HCMSERVICES)"}, 0
+        dados = base.mesa(dia, p("NRESTRUTURAM"))
+        return 200, {"dataset": {"data": dados}}, len(dados)
+    if endpoint == "getVinculosDoGestor":
+        dados = base.vinculos_do_gestor(p("NRESTRUTURAM"))
+        return 200, {"dataset": {"getVinculosDoGestor": dados}}, len(dados)
+    if endpoint == "getOcorrenciasPendentesPeriodoVinculosGestor":
+        dados = base.ocorrencias_pendentes(p("NRESTRUTURAM"), int(p("NRPERIODOAPURACAO") or 0))
+        return 200, {"dataset": {endpoint: dados}}, len(dados)
+    if endpoint == "getDiasDemonstrativo":
+        dados = base.dias_demonstrativo(p("NRVINCULOM"), int(p("NRPERIODOAPURACAO") or 0))
+        return 200, {"dataset": {"data": dados}}, len(dados)
+    if endpoint == "apurarPeriodo":
+        if sim.sortear(sim.args.taxa_bloqueio):
+            return 500, {"error": "Período de apuração bloqueado para o vínculo.<br>(HCMSERVICES)"}, 0
+        return 200, {"dataset": {"data": {"apurarPeriodo": {"apurado": True}, "info": []}}}, 1
+    if endpoint == "aprovarOcorrencia":
+        if not p("NRPROGOCORRENCIA"):
+            return 500, {"error": "NRPROGOCORRENCIA obrigatório.<br>(HCMSERVICES)"}, 0
+        return 200, {"dataset": {"data": {"aprovarOcorrencia": True}}}, 1
+    return 404, {"error": f"Endpoint {endpoint} não simulado."}, 0
+
+def hcm(base, sim, endpoint, payload):
+    if endpoint == "getMarcacaoPontoOcorrencias":
+        vinculos = _filtro(payload, "NRVINCULOM_LIST", []) or []
+        dados = base.ocorrencias_ponto(vinculos, int(_filtro(payload, "NRPERIODOAPURACAO", 0) or 0))
+        tipos = set(_filtro(payload, "P_TIPOOCORRENCIA", []) or [])
+        if tipos:
+            dados = [d for d in dados if d["TIPO_OCORRENCIA"] in tipos]
+        itens = int(payload.get("itemsPerPage") or len(dados) or 1)
+        pagina = max(1, int(payload.get("page") or 1))
+        dados = dados[(pagina - 1) * itens: pagina * itens]
+        return 200, {"dataset": {endpoint: dados}}, len(dados)
+    if endpoint == "getPessoa":
+        dados = base.pessoas(_filtro(payload, "NMPESSOA", ""), int(payload.get("itemsPerPage") or 50))
+        return 200, {"dataset": {endpoint: dados}}, len(dados)
+    if endpoint == "getFormaComunicacaoParc":
+        dados = base.contatos(_filtro(payload, "P_NRPARCNEGOCIO"))
+        return 200, {"dataset": {"comunicaparc_get": dados}}, len(dados)
+    return 404, {"error": f"Endpoint {endpoint} não simulado."}, 0
+
+def login_hcm(sim, payload):
+    if not _filtro(payload, "EMAIL") or not _filtro(payload, "PASSWORD"):
+        return 401, {"error": "Usuário ou senha inválidos."}, 0
+    return 200, {"dataset": {"userData": {"TOKEN": sim.emitir_token(), "USER_ID": "usuario-local"}}}, 1
+
+# ==============================================================================
+# 4. SERVIDOR HTTP
+# ==============================================================================
+def criar_handler(base, sim):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, formato, *args):
+            if sim.args.verbose:
+                super().log_message(formato, *args)
+
+        def do_GET(self):
+            self._atender()
+
+        def do_POST(self):
+            self._atender()
+
+        def _responder(self, status, corpo, extras=None):
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            for k, v in (extras or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def _atender(self):
+            inicio = time.perf_counter()
+            partes = urlsplit(self.path)
+            params = parse_qs(partes.query)
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(tamanho) or b"{}") if tamanho else {}
+            except ValueError:
+                payload = {}
+
+            caminho = partes.path.rstrip("/")
+            endpoint = caminho.rsplit("/", 1)[-1]
+            status, corpo, n, extras = self._despachar(caminho, endpoint, params, payload)
+
+            sim.esperar(n)
+            self._responder(status, corpo, extras)
+            sim.registrar(endpoint, status, time.perf_counter() - inicio)
+
+        def _despachar(self, caminho, endpoint, params, payload):
+            if caminho == "/_estatisticas":
+                with sim.lock:
+                    corpo = {k: {"qtd": q, "media_ms": round(s / q * 1000, 1)} for k, (q, s) in sorted(sim.estatisticas.items())}
+                return 200, corpo, 0, None
+
+            if not sim.permitir(self.client_address[0]):
+                return 429, {"error": "Muitas requisições."}, 0, {"Retry-After": "1"}
+            if sim.sortear(sim.args.taxa_erro):
+                return 500, {"error": "Erro interno simulado.<br>(HCMSERVICES)"}, 0, None
+
+            if caminho.startswith("/portalgestor/backend/index.php/"):
+                token = self.headers.get("OAuth-Token")
+                if not token or (sim.args.token_portal and token != sim.args.token_portal):
+                    return 401, {"error": "Token inválido."}, 0, None
+                return (*portal_gestor(base, sim, endpoint, params, payload), None)
+
+            if caminho == "/hcm/backend_login/index.php/login":
+                return (*login_hcm(sim, payload), None)
+
+            if caminho.startswith("/hcm/backend/index.php/"):
+                if not sim.token_valido(self.headers.get("OAuth-Token")) or sim.sortear(sim.args.taxa_expiracao):
+                    return 401, {"error": "Sessão expirada."}, 0, None
+                return (*hcm(base, sim, endpoint, payload), None)
+
+            return 404, {"error": f"Caminho {caminho} não simulado."}, 0, None
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local com o formato das APIs Teknisa (Portal Gestor / HCM).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica o nº de escolas (1 = tamanho atual da operação)")
+    parser.add_argument("--escolas", type=int, default=150)
+    parser.add_argument("--vinculos-por-escola", type=int, default=10)
+    parser.add_argument("--estruturas", type=int, default=2)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--latencia-ms", type=float, default=0, help="Latência base por requisição")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Acréscimo aleatório uniforme 0..jitter")
+    parser.add_argument("--ms-por-mil", type=float, default=0, help="Latência extra por 1000 registros devolvidos")
+    parser.add_argument("--taxa-erro", type=float, default=0, help="Fração de requisições respondidas com 500")
+    parser.add_argument("--taxa-bloqueio", type=float, default=0.05, help="Fração de apurarPeriodo com erro de negócio (500)")
+    parser.add_argument("--taxa-expiracao", type=float, default=0, help="Fração de chamadas HCM respondidas com 401")
+    parser.add_argument("--validade-token", type=float, default=3600, help="Segundos até o token do login HCM expirar")
+    parser.add_argument("--token-portal", default="", help="Se informado, OAuth-Token do Portal Gestor precisa ser igual")
+    parser.add_argument("--limite-rps", type=float, default=0, help="Requisições/s por cliente (0 = sem limite)")
+    parser.add_argument("--rajada", type=float, default=20, help="Rajada máxima do limite por cliente")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    base = BaseSintetica(int(args.escolas * args.escala), args.vinculos_por_escola, args.estruturas, args.semente)
+    sim = Simulador(args)
+    servidor = ThreadingHTTPServer((args.host, args.porta), criar_handler(base, sim))
+    servidor.daemon_threads = True
+
+    url = f"http://{args.host}:{args.porta}"
+    print(f"Base sintética: {len(base.escolas)} escolas, {len(base.vinculos)} vínculos, "
+          f"estruturas {[e['NRESTRUTURAM'] for e in base.estruturas]} ({time.perf_counter() - inicio:.1f}s)")
+    print(f"TEKNISA_PORTAL_GESTOR_URL={url}/portalgestor")
+    print(f"TEKNISA_HCM_URL={url}/hcm")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
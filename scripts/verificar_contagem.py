@@ -0,0 +1,48 @@
+"""
+Verificador de consistência da tabela "ContagemColaboradores" (sql/001_contagem_colaboradores.sql).
+
+Compara os totais mantidos pelos triggers com uma recontagem completa de "Colaboradores".
+Uso (a partir da raiz do projeto, lendo .streamlit/secrets.toml):
+
+    python scripts/verificar_contagem.py              # só relata divergências
+    python scripts/verificar_contagem.py --corrigir   # reconstrói a tabela se houver divergência
+
+Retorna código de saída 1 quando encontra divergências (útil em agendadores/cron).
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import text
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+from core.db import criar_engine  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica a contagem mantida por triggers em ContagemColaboradores.")
+    parser.add_argument("--corrigir", action="store_true", help="Reconstrói a tabela quando houver divergência")
+    args = parser.parse_args()
+
+    engine = criar_engine()
+    with engine.connect() as conn:
+        df = pd.read_sql(text('SELECT * FROM public.fn_verificar_contagem_colaboradores() ORDER BY 1, 2'), conn)
+
+        if df.empty:
+            print("✅ ContagemColaboradores consistente.")
+            return 0
+
+        print(f"⚠️ {len(df)} células unidade x cargo divergentes:")
+        print(df.to_string(index=False))
+
+        if args.corrigir:
+            conn.execute(text('LOCK TABLE "Colaboradores", "ColaboradoresVolantes" IN SHARE ROW EXCLUSIVE MODE'))
+            conn.execute(text('SELECT public.fn_reconstruir_contagem_colaboradores()'))
+            conn.commit()
+            print("🔧 Tabela reconstruída.")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+-- ==============================================================================
+-- 001 - CONTAGEM DE COLABORADORES POR UNIDADE/CARGO (MANTIDA POR TRIGGERS)
+-- ==============================================================================
+-- Substitui o CTE "ContagemReal" recalculado a cada carga do CONAE e da Mesa
+-- Operacional. Os triggers em "Colaboradores" e "ColaboradoresVolantes" mantêm
+-- os totais a cada escrita; as páginas só leem a tabela.
+--
+--   "QtdReal"   -> ativos que NÃO são volantes (quadro do CONAE)
+--   "QtdAtivos" -> todos os ativos, volantes incluídos (quadro da Mesa Operacional)
+--
+-- Idempotente: pode ser executado novamente (recria funções/triggers e refaz a carga).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public."ContagemColaboradores" (
+    "UnidadeID" INTEGER NOT NULL,
+    "CargoID"   INTEGER NOT NULL,
+    "QtdReal"   INTEGER NOT NULL DEFAULT 0,
+    "QtdAtivos" INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY ("UnidadeID", "CargoID")
+);
+
+-- ------------------------------------------------------------------------------
+-- Ajuste atômico (upsert) de uma célula unidade x cargo
+-- ------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.fn_ajustar_contagem(p_unidade INTEGER, p_cargo INTEGER, p_real INTEGER, p_ativos INTEGER)
+RETURNS VOID LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_unidade IS NULL OR p_cargo IS NULL OR (p_real = 0 AND p_ativos = 0) THEN
+        RETURN;
+    END IF;
+    INSERT INTO public."ContagemColaboradores" AS cc ("UnidadeID", "CargoID", "QtdReal", "QtdAtivos")
+    VALUES (p_unidade, p_cargo, p_real, p_ativos)
+    ON CONFLICT ("UnidadeID", "CargoID") DO UPDATE
+       SET "QtdReal"   = cc."QtdReal"   + EXCLUDED."QtdReal",
+           "QtdAtivos" = cc."QtdAtivos" + EXCLUDED."QtdAtivos";
+END;
+$$;
+
+-- ------------------------------------------------------------------------------
+-- Trigger: Colaboradores (entrada, saída, troca de unidade/cargo, ativação)
+-- ------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.fn_trg_contagem_colaboradores()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE
+    v_volante BOOLEAN;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD."Ativo" THEN
+        v_volante := EXISTS (SELECT 1 FROM "ColaboradoresVolantes" WHERE "ColaboradorID" = OLD."ColaboradorID");
+        PERFORM public.fn_ajustar_contagem(OLD."UnidadeID", OLD."CargoID", CASE WHEN v_volante THEN 0 ELSE -1 END, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW."Ativo" THEN
+        v_volante := EXISTS (SELECT 1 FROM "ColaboradoresVolantes" WHERE "ColaboradorID" = NEW."ColaboradorID");
+        PERFORM public.fn_ajustar_contagem(NEW."UnidadeID", NEW."CargoID", CASE WHEN v_volante THEN 0 ELSE 1 END, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_contagem_colaboradores ON public."Colaboradores";
+CREATE TRIGGER trg_contagem_colaboradores
+AFTER INSERT OR DELETE OR UPDATE OF "UnidadeID", "CargoID", "Ativo", "ColaboradorID" ON public."Colaboradores"
+FOR EACH ROW EXECUTE FUNCTION public.fn_trg_contagem_colaboradores();
+
+-- ------------------------------------------------------------------------------
+-- Trigger: ColaboradoresVolantes (virar / deixar de ser volante)
+-- ------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.fn_trg_contagem_volantes()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE
+    v_unidade INTEGER;
+    v_cargo   INTEGER;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT "UnidadeID", "CargoID" INTO v_unidade, v_cargo
+        FROM "Colaboradores" WHERE "ColaboradorID" = OLD."ColaboradorID" AND "Ativo" = TRUE;
+        IF FOUND THEN
+            PERFORM public.fn_ajustar_contagem(v_unidade, v_cargo, 1, 0);
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT "UnidadeID", "CargoID" INTO v_unidade, v_cargo
+        FROM "Colaboradores" WHERE "ColaboradorID" = NEW."ColaboradorID" AND "Ativo" = TRUE;
+        IF FOUND THEN
+            PERFORM public.fn_ajustar_contagem(v_unidade, v_cargo, -1, 0);
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_contagem_volantes ON public."ColaboradoresVolantes";
+CREATE TRIGGER trg_contagem_volantes
+AFTER INSERT OR DELETE OR UPDATE OF "ColaboradorID" ON public."ColaboradoresVolantes"
+FOR EACH ROW EXECUTE FUNCTION public.fn_trg_contagem_volantes();
+
+-- ------------------------------------------------------------------------------
+-- Verificação de consistência (tabela mantida x recontagem completa)
+-- ------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.fn_verificar_contagem_colaboradores()
+RETURNS TABLE ("UnidadeID" INTEGER, "CargoID" INTEGER,
+               "QtdRealTabela" INTEGER, "QtdRealRecontado" INTEGER,
+               "QtdAtivosTabela" INTEGER, "QtdAtivosRecontado" INTEGER)
+LANGUAGE sql STABLE AS $$
+    WITH Recontagem AS (
+        SELECT c."UnidadeID", c."CargoID",
+               COUNT(*) FILTER (WHERE v."ColaboradorID" IS NULL)::INTEGER AS "QtdReal",
+               COUNT(*)::INTEGER AS "QtdAtivos"
+        FROM "Colaboradores" c
+        LEFT JOIN "ColaboradoresVolantes" v ON c."ColaboradorID" = v."ColaboradorID"
+        -- Mesmo recorte da reconstrução e do trigger: sem unidade/cargo não entra na contagem
+        WHERE c."Ativo" = TRUE AND c."UnidadeID" IS NOT NULL AND c."CargoID" IS NOT NULL
+        GROUP BY c."UnidadeID", c."CargoID"
+    )
+    SELECT COALESCE(t."UnidadeID", r."UnidadeID"), COALESCE(t."CargoID", r."CargoID"),
+           COALESCE(t."QtdReal", 0), COALESCE(r."QtdReal", 0),
+           COALESCE(t."QtdAtivos", 0), COALESCE(r."QtdAtivos", 0)
+    FROM public."ContagemColaboradores" t
+    FULL JOIN Recontagem r ON t."UnidadeID" = r."UnidadeID" AND t."CargoID" = r."CargoID"
+    WHERE COALESCE(t."QtdReal", 0) <> COALESCE(r."QtdReal", 0)
+       OR COALESCE(t."QtdAtivos", 0) <> COALESCE(r."QtdAtivos", 0);
+$$;
+
+-- ------------------------------------------------------------------------------
+-- Reconstrução completa (carga inicial e correção após divergência)
+-- ------------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.fn_reconstruir_contagem_colaboradores()
+RETURNS VOID LANGUAGE sql AS $$
+    LOCK TABLE public."ContagemColaboradores" IN EXCLUSIVE MODE;
+    DELETE FROM public."ContagemColaboradores";
+    INSERT INTO public."ContagemColaboradores" ("UnidadeID", "CargoID", "QtdReal", "QtdAtivos")
+    SELECT c."UnidadeID", c."CargoID",
+           COUNT(*) FILTER (WHERE v."ColaboradorID" IS NULL),
+           COUNT(*)
+    FROM "Colaboradores" c
+    LEFT JOIN "ColaboradoresVolantes" v ON c."ColaboradorID" = v."ColaboradorID"
+    WHERE c."Ativo" = TRUE AND c."UnidadeID" IS NOT NULL AND c."CargoID" IS NOT NULL
+    GROUP BY c."UnidadeID", c."CargoID";
+$$;
+
+-- Carga inicial consistente: bloqueia escritas nas tabelas-fonte durante a recontagem
+LOCK TABLE "Colaboradores", "ColaboradoresVolantes" IN SHARE ROW EXCLUSIVE MODE;
+SELECT public.fn_reconstruir_contagem_colaboradores();
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- ==============================================================================
+-- 002 - ÍNDICE PARA A PAGINAÇÃO DE COLABORADORES POR UNIDADE (KEYSET)
+-- ==============================================================================
+-- O modal de detalhe da escola (CONAE) lê os colaboradores em páginas:
+--
+--   WHERE "UnidadeID" = :uid AND "Ativo"
+--     AND (COALESCE("Nome", ''), "ColaboradorID") > (:nome, :id)
+--   ORDER BY COALESCE("Nome", ''), "ColaboradorID" LIMIT :n
+--
+-- Com este índice parcial cada página é uma leitura de faixa do índice, com o
+-- mesmo custo para unidades de 10 ou de 10.000 colaboradores. A chave usa
+-- COALESCE("Nome", '') como a consulta: Nome nulo não quebra o cursor.
+--
+-- CONCURRENTLY não bloqueia escritas em "Colaboradores"; por isso fica fora de
+-- transação (executar com psql sem BEGIN). Idempotente.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_colaboradores_unidade_nome_chave_ativos"
+    ON public."Colaboradores" ("UnidadeID", (COALESCE("Nome", '')), "ColaboradorID")
+    WHERE "Ativo" = TRUE;
+
+-- Versão anterior (sobre "Nome" cru), não usada pela ordem com COALESCE
+DROP INDEX CONCURRENTLY IF EXISTS public."ix_colaboradores_unidade_nome_ativos";
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_colaboradores_volantes_colaborador"
+    ON public."ColaboradoresVolantes" ("ColaboradorID");